@@ -5,10 +5,16 @@ aprx is a small Python modules to extract some basic information from ArcGIS Pro
 
 __version__ = '0.1.0'
 
+from .archive import Archive
 from .project import Project
+from .project_item import ProjectItem
 from .map import Map
 from .map_frame import MapFrame
+from .element import Element, Legend, ScaleBar, NorthArrow, TextElement, GraphicElement
 from .map_view import MapView
 from .layer import Layer
 from .layout import Layout
 from .color import RGBA
+from .query import Query, compile_query
+from .diff import ReferenceProject, ProjectDiff
+from .snapshot import ProjectSnapshot, MapSnapshot, LayoutSnapshot, LayerSnapshot
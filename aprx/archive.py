@@ -0,0 +1,119 @@
+"""
+Implementation of the archive backend.
+"""
+
+import io
+from zipfile import ZIP_STORED, ZipFile
+
+from . import stats
+
+
+def embedded_project(zf: ZipFile):
+    """
+    Returns the ZipInfo of the project file (.aprx) embedded in a project package (.ppkx), or None
+    if the archive is not a package. If there are several project files, the one closest to the
+    root of the package is taken.
+    """
+    names = zf.namelist()
+    if 'GISProject.json' in names:
+        return None
+
+    projects = [name for name in names if name.lower().endswith('.aprx')]
+    if len(projects) == 0:
+        return None
+
+    return zf.getinfo(min(projects, key=lambda name: (name.count('/'), name)))
+
+
+class Archive:
+    """
+    Read-only access to the members of a project archive.
+
+    The zip file is kept open for the lifetime of the archive and members are decompressed on
+    demand, straight from the archive. Nothing is extracted to disk.
+
+    The archive is read from `path`, unless its content is provided in `data`, either as bytes or
+    as a file-like object (e.g. when the file has been read ahead of time). Members decompressed
+    ahead of time can be provided in `members`, as a dictionary of bytes by name.
+
+    A project package (.ppkx) holds the project file together with its data (file geodatabases,
+    rasters, ...). For a package, only the embedded project file is opened, and the data is never
+    decompressed. A project file stored without compression is read in place, from the package.
+    """
+    def __init__(self, path, data=None, members: dict = None):
+        self.path = path
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = io.BytesIO(data)
+        self.zip = ZipFile(self.path if data is None else data, 'r')
+        self.preloaded = {} if members is None else members
+
+        # The package, if the archive is a project package
+        self.package = None
+        embedded = embedded_project(self.zip)
+        if embedded is not None:
+            self.package = self.zip
+            if embedded.compress_type == ZIP_STORED:
+                project_file = self.package.open(embedded)
+            else:
+                stats.count('bytes_read', embedded.compress_size)
+                with stats.phase('unzip'):
+                    project_file = io.BytesIO(self.package.read(embedded))
+            self.zip = ZipFile(project_file, 'r')
+
+        # Index the members by name, and by lowercase name as a fallback. ArcGIS Pro is written
+        # for a case-insensitive file system, and a CIMPATH does not always match the case of the
+        # member in the archive.
+        self.members = {}
+        self.members_lower = {}
+        for info in self.zip.infolist():
+            if info.is_dir():
+                continue
+            self.members[info.filename] = info
+            self.members_lower.setdefault(info.filename.lower(), info)
+
+
+    def __repr__(self):
+        return f'<Archive: "{self.path}">'
+
+
+    def __contains__(self, name) -> bool:
+        return self.info(name) is not None
+
+
+    def info(self, name):
+        """
+        Returns the ZipInfo for the member with the given name, or None if there is no such member.
+        """
+        name = name.replace('\\', '/')
+        info = self.members.get(name, None)
+        if info is None:
+            info = self.members_lower.get(name.lower(), None)
+        return info
+
+
+    def read(self, name) -> bytes:
+        """
+        Decompresses the member with the given name and returns its content as bytes. The members
+        decompressed ahead of time are returned as they are, and not counted in the statistics.
+        """
+        info = self.info(name)
+        if info is None:
+            raise KeyError(f'There is no item named "{name}" in the archive "{self.path}"')
+
+        if info.filename in self.preloaded:
+            return self.preloaded[info.filename]
+
+        stats.count('members_read')
+        stats.count('bytes_read', info.compress_size)
+        stats.count('bytes_decompressed', info.file_size)
+        with stats.phase('unzip'):
+            return self.zip.read(info)
+
+
+    def close(self):
+        """
+        Closes the underlying zip file.
+        """
+        self.zip.close()
+        if self.package is not None:
+            self.package.close()
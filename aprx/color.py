@@ -6,6 +6,8 @@ class RGBA:
     """
     RGBA color.
     """
+    __slots__ = ('r', 'g', 'b', 'a')
+
     def __init__(self, r, g, b, a=100):
         self.r, self.g, self.b = r, g, b
         self.a = a
@@ -0,0 +1,111 @@
+"""
+Decoding of the CIM JSON documents.
+
+All CIM documents read from a project archive are decoded through `loads`, which works directly on
+the raw bytes of the archive member. If orjson is installed, it is used as decoder. orjson keeps a
+cache of the object keys, so the keys repeated in every CIM document (`type`, `enable`,
+`symbolLayers`, `color`, `values`, ...) are shared between all the parsed documents. Otherwise, the
+json module of the standard library is used. With the standard library, the CIM keys can be
+interned with `configure(intern_keys=True)`, at the cost of a slower decoding.
+"""
+
+import json
+import sys
+
+from . import stats
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# The keys repeated all over the CIM documents, interned by the standard library decoder
+CIM_KEYS = (
+    'type', 'enable', 'name', 'symbol', 'symbolLayers', 'color', 'values', 'width', 'size'
+)
+
+INTERNED_KEYS = { k: sys.intern(k) for k in CIM_KEYS }
+
+# The current settings of the decoder
+SETTINGS = {
+    'backend': 'json' if orjson is None else 'orjson',
+    'intern_keys': False,
+}
+
+# The UTF-8 byte order mark, not accepted by orjson
+BOM = b'\xef\xbb\xbf'
+
+
+def intern_pairs(pairs: list) -> dict:
+    """
+    Object hook for the json module building a dictionary with interned CIM keys.
+    """
+    return { INTERNED_KEYS.get(k, k): v for k, v in pairs }
+
+
+# The decoders of the standard library, without and with interned keys
+JSON_DECODERS = {
+    False: json.JSONDecoder(),
+    True: json.JSONDecoder(object_pairs_hook=intern_pairs),
+}
+
+
+def json_decoder() -> json.JSONDecoder:
+    """
+    Returns the decoder of the standard library, with the current settings.
+    """
+    return JSON_DECODERS[SETTINGS['intern_keys']]
+
+
+def configure(backend: str = None, intern_keys: bool = None) -> None:
+    """
+    Changes the decoder used for the CIM documents. `backend` is either "orjson" or "json".
+    """
+    if backend is not None:
+        if backend not in ('orjson', 'json'):
+            raise ValueError(f'Unknown JSON backend "{backend}"')
+        if backend == 'orjson' and orjson is None:
+            raise ValueError('The JSON backend "orjson" is not installed')
+        SETTINGS['backend'] = backend
+
+    if intern_keys is not None:
+        SETTINGS['intern_keys'] = intern_keys
+
+
+def is_fast() -> bool:
+    """
+    Returns True if a decoder faster than the standard library is used. In this case, decoding a
+    full document is faster than extracting parts of it with the standard library.
+    """
+    return SETTINGS['backend'] == 'orjson'
+
+
+def loads(data) -> object:
+    """
+    Decodes a JSON document given as bytes (or string).
+    """
+    stats.count('json_parsed')
+    with stats.phase('json'):
+        return decode_document(data)
+
+
+def decode_document(data) -> object:
+    """
+    Decodes a JSON document with the current backend.
+    """
+    if SETTINGS['backend'] == 'orjson':
+        if data[:3] == BOM:
+            data = data[3:]
+
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the standard library (e.g. NaN values or large integers),
+            # so the standard library gets a second chance.
+            pass
+
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8-sig')
+
+    return json_decoder().decode(data)
@@ -0,0 +1,231 @@
+"""
+Structural diff of a project against a reference project (e.g. the project given to the students).
+
+The documents compared are the layers (matched by CIMPATH), the order of the layers of every map
+and the camera of every map frame. Every JSON subtree gets a Merkle hash, computed from the hashes
+of its children, so identical subtrees are skipped without walking them, and only the differing
+paths are visited:
+
+reference = ReferenceProject('reference/TP1.aprx')   # hashed once
+diff = reference.diff(proj)
+diff.changed('layers/cantons.json', ('renderer',))    # True if the renderer changed
+for change in diff.changes:
+    print(change.path)    # e.g. "layers/cantons.json#renderer.symbol.symbol.symbolLayers[0].width"
+"""
+
+from hashlib import blake2b
+from typing import NamedTuple
+
+from . import stats
+from .project import Project
+
+
+class Node(NamedTuple):
+    """
+    A hashed JSON subtree. `children` is a dictionary for objects, a list for arrays and None for
+    values.
+    """
+    digest: bytes
+    value: object
+    children: object = None
+
+
+class Change(NamedTuple):
+    """
+    A difference between the reference and the project: the document (a CIMPATH, followed by the
+    name of the map frame for cameras), the keys of the JSON path in the document, the kind of
+    change ("changed", "added" or "removed"), and the values in the reference and in the project.
+    """
+    doc: str
+    keys: tuple
+    kind: str
+    old: object = None
+    new: object = None
+
+    @property
+    def path(self) -> str:
+        """
+        The path of the change, e.g. "layers/towns.json#labelClasses[0].textSymbol". A document
+        added or removed as a whole has no JSON path.
+        """
+        if len(self.keys) == 0:
+            return self.doc
+
+        return f'{self.doc}#{format_keys(self.keys)}'
+
+
+def format_keys(keys: tuple) -> str:
+    """
+    Formats the keys of a JSON path like in the queries (see aprx.query).
+    """
+    return ''.join(f'[{k}]' if isinstance(k, int) else f'.{k}' for k in keys).lstrip('.')
+
+
+def hash_tree(value) -> Node:
+    """
+    Hashes a JSON value and all its subtrees.
+    """
+    h = blake2b(digest_size=16)
+
+    if isinstance(value, dict):
+        children = { k: hash_tree(v) for k, v in value.items() }
+        h.update(b'{')
+        for k in sorted(children):
+            h.update(k.encode('utf-8'))
+            h.update(children[k].digest)
+        return Node(h.digest(), value, children)
+
+    if isinstance(value, list):
+        children = [hash_tree(v) for v in value]
+        h.update(b'[')
+        for child in children:
+            h.update(child.digest)
+        return Node(h.digest(), value, children)
+
+    h.update(f'{type(value).__name__}:{value!r}'.encode('utf-8'))
+    return Node(h.digest(), value)
+
+
+def diff_nodes(doc: str, ref: Node, new: Node, keys: tuple, changes: list) -> None:
+    """
+    Appends the differences between two hashed subtrees to `changes`. Identical subtrees are
+    skipped. Arrays of different lengths are reported as a whole.
+    """
+    if ref.digest == new.digest:
+        return
+
+    if isinstance(ref.children, dict) and isinstance(new.children, dict):
+        for k, ref_child in ref.children.items():
+            if k in new.children:
+                diff_nodes(doc, ref_child, new.children[k], keys + (k,), changes)
+            else:
+                changes.append(Change(doc, keys + (k,), 'removed', old=ref_child.value))
+
+        for k, new_child in new.children.items():
+            if k not in ref.children:
+                changes.append(Change(doc, keys + (k,), 'added', new=new_child.value))
+
+    elif (isinstance(ref.children, list) and isinstance(new.children, list)
+          and len(ref.children) == len(new.children)):
+        for i, (ref_child, new_child) in enumerate(zip(ref.children, new.children)):
+            diff_nodes(doc, ref_child, new_child, keys + (i,), changes)
+
+    else:
+        changes.append(Change(doc, keys, 'changed', ref.value, new.value))
+
+
+def project_documents(project) -> dict:
+    """
+    Returns the compared documents of a project: the JSON of every layer, the layer references of
+    every map, and the camera of every map frame, by document name.
+    """
+    docs = {}
+    for mp in project.maps:
+        docs[mp.cim_path] = { 'layers': mp.layer_refs }
+        for lyr in mp.layers:
+            docs[lyr.path] = lyr.json
+
+    for layout in project.layouts:
+        for mf in layout.map_frames:
+            docs[f'{layout.cim_path}/{mf.name}'] = {
+                'camera': mf.json.get('view', {}).get('camera', None)
+            }
+
+    return docs
+
+
+class ReferenceProject:
+    """
+    The hashed documents of a reference project. The project is read and hashed once, and can
+    then be compared with any number of projects.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        proj = Project(path)
+        self.nodes = { doc: hash_tree(value) for doc, value in project_documents(proj).items() }
+        proj.close()
+
+
+    def __repr__(self):
+        return f'<ReferenceProject: "{self.path}">'
+
+
+    def value(self, doc: str, keys: tuple = ()):
+        """
+        Returns the value at the JSON path in a document of the reference, or None.
+        """
+        node = self.nodes.get(doc, None)
+        for k in keys:
+            if node is None or node.children is None:
+                return None
+            try:
+                node = node.children[k]
+            except (KeyError, IndexError, TypeError):
+                return None
+
+        return None if node is None else node.value
+
+
+    def diff(self, project) -> 'ProjectDiff':
+        """
+        Compares a project with the reference.
+        """
+        with stats.phase('diff'):
+            changes = []
+            docs = project_documents(project)
+            for doc, value in docs.items():
+                ref = self.nodes.get(doc, None)
+                if ref is None:
+                    changes.append(Change(doc, (), 'added', new=value))
+                else:
+                    diff_nodes(doc, ref, hash_tree(value), (), changes)
+
+            for doc, ref in self.nodes.items():
+                if doc not in docs:
+                    changes.append(Change(doc, (), 'removed', old=ref.value))
+
+        return ProjectDiff(self, changes)
+
+
+class ProjectDiff:
+    """
+    The changes of a project compared with a reference project, indexed by document.
+    """
+    def __init__(self, reference: ReferenceProject, changes: list):
+        self.reference = reference
+        self.changes = changes
+
+        self.by_doc = {}
+        for change in self.changes:
+            self.by_doc.setdefault(change.doc, []).append(change)
+
+
+    def __repr__(self):
+        return f'<ProjectDiff: {len(self.changes)} changes>'
+
+
+    @property
+    def paths(self) -> list:
+        """
+        Returns the paths of all changes.
+        """
+        return [change.path for change in self.changes]
+
+
+    def changes_at(self, doc: str, keys: tuple = ()) -> list:
+        """
+        Returns the changes of a document at the JSON path, below it, or above it (e.g. an array
+        of layers which changed as a whole).
+        """
+        n = len(keys)
+        return [
+            change for change in self.by_doc.get(doc, ())
+            if change.keys[:n] == keys or keys[:len(change.keys)] == change.keys
+        ]
+
+
+    def changed(self, doc: str, keys: tuple = ()) -> bool:
+        """
+        Returns True if the document changed at the JSON path, below it or above it.
+        """
+        return len(self.changes_at(doc, keys)) > 0
@@ -0,0 +1,153 @@
+"""
+Implementation of the layout elements.
+
+The elements of a layout (map frames, legends, scale bars, north arrows, texts and other graphics)
+are wrapped into Element instances, created once per layout (see Layout.element_index). The
+elements related to a map frame (legends, scale bars, north arrows) link back to it.
+"""
+
+# The CIM types of the north arrows, scale bars and text graphics. The types of the scale bars all
+# end with "ScaleBar", except for the scale line.
+NORTH_ARROW_TYPES = frozenset(('CIMMarkerNorthArrow',))
+SCALE_LINE_TYPES = frozenset(('CIMScaleLine',))
+TEXT_GRAPHIC_TYPES = frozenset(('CIMTextGraphic', 'CIMParagraphTextGraphic'))
+
+
+class Element:
+    """
+    An element of a layout. `kind` is the kind of element ("map_frame", "legend", "scale_bar",
+    "north_arrow", "text", "graphic" or "element" for the others).
+    """
+    kind = 'element'
+
+    def __init__(self, project: object, element_json: dict, layout: object = None):
+        self.project = project
+        self.json = element_json
+        self.layout = layout
+
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: "{self.name}">'
+
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the element in the layout.
+        """
+        return self.json.get('name', None)
+
+
+    @property
+    def element_type(self) -> str:
+        """
+        The CIM type of the element (e.g. "CIMLegend").
+        """
+        return self.json.get('type', None)
+
+
+    @property
+    def visible(self) -> bool:
+        """
+        Whether the element is visible in the layout.
+        """
+        return self.json.get('visible', False)
+
+
+    @property
+    def map_frame(self):
+        """
+        Returns the map frame the element is related to (e.g. for a legend or a scale bar), or None.
+        """
+        name = self.json.get('mapFrame', None)
+        if name is None or self.layout is None:
+            return None
+
+        return self.layout.map_frame_by_name(name)
+
+
+class Legend(Element):
+    """
+    A legend of a map frame.
+    """
+    kind = 'legend'
+
+    @property
+    def title(self) -> str:
+        """
+        The title of the legend, or None if the title is not shown.
+        """
+        return self.json.get('title', None) if self.json.get('showTitle', False) else None
+
+
+    @property
+    def item_names(self) -> list:
+        """
+        Returns the names of the items of the legend (the layers), from the top of the legend.
+        """
+        return [item.get('name', None) for item in self.json.get('items', [])]
+
+
+class ScaleBar(Element):
+    """
+    A scale bar (or scale line) of a map frame.
+    """
+    kind = 'scale_bar'
+
+    @property
+    def unit_label(self) -> str:
+        """
+        The label of the unit of the scale bar (e.g. "Km").
+        """
+        return self.json.get('unitLabel', None)
+
+
+class NorthArrow(Element):
+    """
+    A north arrow of a map frame.
+    """
+    kind = 'north_arrow'
+
+
+class GraphicElement(Element):
+    """
+    A graphic element (e.g. a rectangle or a picture) which is not a text.
+    """
+    kind = 'graphic'
+
+
+class TextElement(GraphicElement):
+    """
+    A text in a layout. The text can contain dynamic text tags (e.g. `<dyn type="date"/>`).
+    """
+    kind = 'text'
+
+    @property
+    def text(self) -> str:
+        """
+        The text of the element.
+        """
+        return self.json.get('graphic', {}).get('text', None)
+
+
+def element_class(element_json: dict) -> type:
+    """
+    Returns the class wrapping a layout element, according to its CIM type. Map frames are
+    handled by the layout.
+    """
+    elem_type = element_json.get('type', '')
+
+    if elem_type == 'CIMLegend':
+        return Legend
+
+    if elem_type.endswith('ScaleBar') or elem_type in SCALE_LINE_TYPES:
+        return ScaleBar
+
+    if elem_type in NORTH_ARROW_TYPES:
+        return NorthArrow
+
+    if elem_type == 'CIMGraphicElement':
+        graphic_type = element_json.get('graphic', {}).get('type', None)
+        return TextElement if graphic_type in TEXT_GRAPHIC_TYPES else GraphicElement
+
+    return Element
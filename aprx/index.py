@@ -0,0 +1,32 @@
+"""
+Helpers for the dictionary indexes used to look up maps, layouts and layers.
+"""
+
+
+def build_index(items: list, attr: str) -> dict:
+    """
+    Builds a dictionary index of the items on the given attribute. Every value of the attribute is
+    mapped to the list of items having this value, in their original order. Duplicate values are
+    thus kept.
+    """
+    index = {}
+    for it in items:
+        index.setdefault(getattr(it, attr), []).append(it)
+
+    return index
+
+
+def first(index: dict, key):
+    """
+    Returns the first item indexed under the key, or None if there is no such item.
+    """
+    lst = index.get(key, None)
+    return lst[0] if lst else None
+
+
+def unique(index: dict, key):
+    """
+    Returns the item indexed under the key, or None if there is no item or if the key is ambiguous.
+    """
+    lst = index.get(key, None)
+    return lst[0] if lst is not None and len(lst) == 1 else None
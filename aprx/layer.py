@@ -1,8 +1,9 @@
 
-import json
 import os
 
-from .color import RGBA
+from .symbology import (
+    RENDERER, extract_labels, extract_style, extract_symbol, renderer_symbols
+)
 
 class Layer:
     def __init__(self, project, layer_path):
@@ -10,8 +11,10 @@ class Layer:
         self.path = layer_path
 
         # Read the content from the JSON
-        with open(os.path.join(self.project.tmp_dir, self.path), 'r', encoding='utf-8') as f:
-            self.json = json.loads(f.read())
+        self.json = self.project.read_json(self.path)
+
+        # The properties extracted from the JSON, computed on first access
+        self.cache = {}
 
     @property
     def id(self):
@@ -23,6 +26,14 @@ class Layer:
         return os.path.splitext(os.path.basename(self.path))[0]
 
 
+    @property
+    def uri(self):
+        """
+        The uRI of the layer, as used in the list of layers of a map.
+        """
+        return f'CIMPATH={self.path}'
+
+
     @property
     def name(self):
         """
@@ -37,113 +48,59 @@ class Layer:
         Returns a dictionary with some properties for the labels of this layer:
         { shown: true|false, expression: { value, engine }, font: { family, style, size } }
         """
-        props = { 'shown': False, 'font': None }
-        props['shown'] = self.json.get('labelVisibility', False)
-        if props['shown'] is False:
-            return props
-
-        label_classes = self.json.get('labelClasses', None)
-        if label_classes is None or len(label_classes) == 0:
-            return props
+        if self.cache.get('labels', None) is None:
+            self.cache['labels'] = extract_labels(self.json)
 
-        lbl_cls = label_classes[0]
-        lbl_symb = lbl_cls['textSymbol']['symbol']
-
-        props['font'] = {
-            'family': lbl_symb['fontFamilyName'],
-            'style': lbl_symb['fontStyleName'],
-            'size': lbl_symb['height']
-        }
-
-        props['expression'] = {
-            'value': lbl_cls['expression'],
-            'engine': lbl_cls['expressionEngine']
-        }
-
-        return props
+        return self.cache['labels']
 
 
     @property
-    def symbol(self):
+    def renderer_symbols(self) -> list:
         """
-        Returns a simplified version of the symbol as a dictionary with some of the properties.
-        If no symbol is found, None is returned.
+        Returns the CIM symbols of the renderer: one for a simple renderer, one per class (and the
+        default symbol) for unique value and class breaks renderers.
         """
-        renderer = self.json.get('renderer', None)
-        if renderer is None:
-            return None
-
-        symb_ref = renderer.get('symbol', None)
-        if symb_ref is None:
-            return None
-
-        symb_ref_symb = symb_ref.get('symbol', None)
-        if symb_ref_symb is None:
-            return None
+        if self.cache.get('renderer_symbols', None) is None:
+            self.cache['renderer_symbols'] = renderer_symbols(RENDERER(self.json))
 
-        # Technically, there can be several overlapping symbols. We only extract the *last* one
-        # (the one which is rendered on top)
-        symb_lyrs = symb_ref_symb.get('symbolLayers', None)
-        if symb_lyrs is None or len(symb_lyrs) == 0:
-            return None
+        return self.cache['renderer_symbols']
 
-        symb = symb_lyrs[-1]
 
-        # Extract the fill color which depends on the symbol type
-        fcol = None
+    @property
+    def symbols(self) -> list:
+        """
+        Returns the simplified version of every symbol of the renderer (see `symbol`).
+        """
+        if self.cache.get('symbols', None) is None:
+            renderer_type = (RENDERER(self.json) or {}).get('type', None)
+            self.cache['symbols'] = [
+                extract_symbol(symb, renderer_type) for symb in self.renderer_symbols
+            ]
 
-        if symb['type'] == 'CIMVectorMarker':
-            fill = symb['markerGraphics'][-1]['symbol']['symbolLayers'][-1]
-            r,g,b,a = fill['color']['values']
-            fcol = RGBA(r,g,b,a)
+        return self.cache['symbols']
 
-        if symb['type'] == 'CIMCharacterMarker':
-            fill = symb['symbol']['symbolLayers'][-1]
-            r,g,b,a = fill['color']['values']
-            fcol = RGBA(r,g,b,a)
 
-        return {
-            'type': symb['type'],
-            'enable': symb.get('enable', False),
-            'size': symb.get('size', 0),
-            'color': fcol
-        }
+    @property
+    def symbol(self):
+        """
+        Returns a simplified version of the symbol as a dictionary with some of the properties:
+        { type, enable, size, color, renderer }. For renderers with several classes, this is the
+        symbol of the first class. If no symbol is found, None is returned.
+        """
+        symbols = self.symbols
+        return symbols[0] if len(symbols) > 0 else None
 
 
     @property
     def style(self):
         """
-        Returns the style for a simple stroke/fill setting.
+        Returns the style for a simple stroke/fill setting:
+        { fill: { type, color }, stroke: { width, color } }. For renderers with several classes,
+        this is the style of the first class. The colors are None if they cannot be converted to
+        RGBA. If no symbol is found, None is returned.
         """
-        renderer = self.json.get('renderer', None)
-        if renderer is None:
-            return None
-
-        symb_ref = renderer.get('symbol', None)
-        if symb_ref is None:
-            return None
-
-        symb_ref_symb = symb_ref.get('symbol', None)
-        if symb_ref_symb is None:
-            return None
-
-        # Initialize an empty style
-        stl = { 'fill': None, 'stroke': None }
-
-        # Get the symbol layers and iterate over them to find fill and stroke styles
-        symb_lyrs = symb_ref_symb.get('symbolLayers', [])
-        for slyr in symb_lyrs:
-            if slyr['type'] == 'CIMSolidStroke' and slyr['enable']:
-                r,g,b,a = slyr['color']['values']
-                stl['stroke'] = {
-                    'width': slyr['width'],
-                    'color': RGBA(r,g,b,a)
-                }
-
-            if slyr['type'] == 'CIMSolidFill' and slyr['enable']:
-                r,g,b,a = slyr['color']['values']
-                stl['fill'] = {
-                    'color': RGBA(r,g,b,a)
-                }
+        if 'style' not in self.cache:
+            symbols = self.renderer_symbols
+            self.cache['style'] = extract_style(symbols[0]) if len(symbols) > 0 else None
 
-        return stl
+        return self.cache['style']
@@ -2,53 +2,126 @@
 Implementation of a Layout.
 """
 
-import json
-import os
-
+from .element import element_class
+from .index import build_index, first
 from .map_frame import MapFrame
+from .project_item import ProjectItem
 
 
-class Layout:
+class Layout(ProjectItem):
     """
-    A layout as it appears in the catalog
+    A layout as it appears in the catalog. The layout JSON is only parsed when its content is
+    accessed.
     """
-    def __init__(self, project: object, properties: dict):
-        self.project = project
-        self.item_id = properties['iD']
-        self.name = properties['name']
-        self.properties = properties
+    def __repr__(self):
+        return f'<Layout: "{self.name}">'
 
-        # For a map, the catalog path is a CIMPATH which is the path to a JSON file inside the
-        # project archive.
-        self.uri = self.properties.get('catalogPath', None)
 
-        # Extract the CIMPATH and keep it around
-        self.cim_path = self.uri.split('=')[1]
+    @property
+    def elements(self) -> list:
+        """
+        Returns the raw JSON of all the elements in the layout.
+        """
+        return self.json.get('elements', [])
 
-        # The cache, empty when starting
-        self.cache = {}
 
-        # Load the JSON file for the layer
-        with open(os.path.join(self.project.tmp_dir, self.cim_path), 'r', encoding='utf-8') as f:
-            self.json = json.loads(f.read())
+    @property
+    def element_index(self) -> dict:
+        """
+        Returns the elements of the layout, wrapped into MapFrame and Element instances (see
+        aprx.element), indexed by kind ("map_frame", "legend", ...) and by CIM type. The index is
+        built in one pass over the elements when first accessed, and kept in the cache. The map
+        frames already created by `map_frames` are reused.
+        """
+        if self.cache.get('element_index', None) is not None:
+            return self.cache['element_index']
 
+        frames = iter(self.cache.get('map_frames', None) or [])
+        by_kind, by_type = {}, {}
+        for elem in self.select(['elements']).get('elements', []):
+            if elem.get('type', None) == 'CIMMapFrame':
+                wrapper = next(frames, None) or MapFrame(self.project, elem, layout=self)
+            else:
+                wrapper = element_class(elem)(self.project, elem, layout=self)
+            by_kind.setdefault(wrapper.kind, []).append(wrapper)
+            by_type.setdefault(wrapper.element_type, []).append(wrapper)
 
-    def __repr__(self):
-        return f'<Layout: "{self.name}">'
+        self.cache['element_index'] = { 'kind': by_kind, 'type': by_type }
+        return self.cache['element_index']
+
+
+    def elements_of_kind(self, kind: str) -> list:
+        """
+        Returns the elements of the given kind (e.g. "legend"), in the order of the layout.
+        """
+        return self.element_index['kind'].get(kind, [])
+
+
+    def elements_of_type(self, elem_type: str) -> list:
+        """
+        Returns the elements of the given CIM type (e.g. "CIMLegend"), in the order of the layout.
+        """
+        return self.element_index['type'].get(elem_type, [])
 
 
     @property
     def map_frames(self) -> list:
         """
-        Returns the map frames of the layout, as a list of Map instances.
+        Returns the map frames of the layout, as a list of MapFrame instances. Unless the element
+        index has been built, only the map frame elements are extracted from the JSON.
         """
-        # Try to get the layers from the JSON
-        elements = self.json.get('elements', [])
+        if self.cache.get('map_frames', None) is not None:
+            return self.cache['map_frames']
 
-        # Return the Map instances
-        map_frames = []
-        for elem in elements:
-            if elem['type'] == 'CIMMapFrame':
-                map_frames.append(MapFrame(project=self.project, element_json=elem))
+        if self.cache.get('element_index', None) is not None:
+            map_frames = self.elements_of_kind('map_frame')
+        else:
+            frame_elements = self.select_items(
+                'elements', lambda elem: elem.get('type', None) == 'CIMMapFrame'
+            )
+            map_frames = [MapFrame(self.project, elem, layout=self) for elem in frame_elements]
 
+        self.cache['map_frames'] = map_frames
         return map_frames
+
+
+    def map_frame_by_name(self, name) -> MapFrame:
+        """
+        Returns the first map frame with the given name, or None if there is no such map frame.
+        """
+        if self.cache.get('map_frames_by_name', None) is None:
+            self.cache['map_frames_by_name'] = build_index(self.map_frames, 'name')
+
+        return first(self.cache['map_frames_by_name'], name)
+
+
+    @property
+    def legends(self) -> list:
+        """
+        Returns the legends of the layout.
+        """
+        return self.elements_of_kind('legend')
+
+
+    @property
+    def scale_bars(self) -> list:
+        """
+        Returns the scale bars (and scale lines) of the layout.
+        """
+        return self.elements_of_kind('scale_bar')
+
+
+    @property
+    def north_arrows(self) -> list:
+        """
+        Returns the north arrows of the layout.
+        """
+        return self.elements_of_kind('north_arrow')
+
+
+    @property
+    def text_elements(self) -> list:
+        """
+        Returns the text elements of the layout.
+        """
+        return self.elements_of_kind('text')
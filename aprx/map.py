@@ -2,39 +2,29 @@
 Implementation of a Map.
 """
 
-import json
-import os
+from . import stats
+from .index import build_index, first, unique
+from .project_item import ProjectItem
 
-from .layer import Layer
 
-
-class Map:
+class Map(ProjectItem):
     """
-    A map as it appears in the catalog
+    A map as it appears in the catalog. The map JSON is only parsed when its content is accessed.
     """
-    def __init__(self, project: object, properties: dict):
-        self.project = project
-        self.item_id = properties['iD']
-        self.name = properties['name']
-        self.properties = properties
-
-        # For a map, the catalog path is a CIMPATH which is the path to a JSON file inside the
-        # project archive. It is used as uRI for other elements (e.g. in the layout)
-        self.uri = self.properties.get('catalogPath', None)
-
-        # Extract the CIMPATH and keep it around
-        self.cim_path = self.uri.split('=')[1]
-
-        # The cache, empty when starting
-        self.cache = {}
+    def __repr__(self):
+        return f'<Map: "{self.name}">'
 
-        # Load the JSON file for the layer
-        with open(os.path.join(self.project.tmp_dir, self.cim_path), 'r', encoding='utf-8') as f:
-            self.json = json.loads(f.read())
 
+    @property
+    def layer_refs(self) -> list:
+        """
+        Returns the references to the layers of the map, as in the JSON (e.g.
+        "CIMPATH=layers/towns.json"), from the top to the bottom of the layer tree.
+        """
+        if self.cache.get('layer_refs', None) is None:
+            self.cache['layer_refs'] = self.select(['layers']).get('layers', [])
 
-    def __repr__(self):
-        return f'<Map: "{self.name}">'
+        return self.cache['layer_refs']
 
 
     @property
@@ -42,14 +32,58 @@ class Map:
         """
         Returns the layers of the map
         """
-        # Try to get the layers from the JSON
-        lyrs_json = self.json.get('layers', [])
+        # If the layers have already been loaded once, return them.
+        if self.cache.get('layers', None) is not None:
+            return self.cache['layers']
 
-        # Convert the layer reference to a Layer instance based on the path
+        # Convert the layer reference to a Layer instance based on the path. The instances are
+        # shared through the project, so a layer is only parsed once even if several maps use it.
         layers = []
-        for lj in lyrs_json:
-            if lj.startswith('CIMPATH='):
-                lpath = lj.split('=')[1]
-                layers.append(Layer(project=self.project, layer_path=lpath))
+        with stats.phase('layers'):
+            for lj in self.layer_refs:
+                if lj.startswith('CIMPATH='):
+                    lpath = lj.split('=')[1]
+                    layers.append(self.project.layer(lpath))
 
+        self.cache['layers'] = layers
         return layers
+
+
+    def layer_index(self, attr) -> dict:
+        """
+        Returns the index of the layers of the map on the given attribute ('uri', 'id' or 'name').
+        The index is built once and kept in the cache.
+        """
+        key = f'layers_by_{attr}'
+        if self.cache.get(key, None) is None:
+            self.cache[key] = build_index(self.layers, attr)
+
+        return self.cache[key]
+
+
+    def layer_by_uri(self, uri):
+        """
+        Returns the layer with the given uRI (e.g. "CIMPATH=layers/towns.json"), or None.
+        """
+        return unique(self.layer_index('uri'), uri)
+
+
+    def layer_by_id(self, layer_id):
+        """
+        Returns the layer with the given ID (e.g. "towns"), or None if there is no such layer.
+        """
+        return unique(self.layer_index('id'), layer_id)
+
+
+    def layer_by_name(self, name):
+        """
+        Returns the first layer (from the top of the layer tree) with the given name, or None.
+        """
+        return first(self.layer_index('name'), name)
+
+
+    def layers_with_name(self, name) -> list:
+        """
+        Returns all the layers with the given name, from the top to the bottom of the layer tree.
+        """
+        return self.layer_index('name').get(name, [])
@@ -2,15 +2,17 @@
 Implementation of the MapFrame.
 """
 
+from .element import Element
 from .map_view import MapView
 
-class MapFrame:
+class MapFrame(Element):
     """
     A MapFrame is an element of the Layout showing a map.
     """
-    def __init__(self, project: object, element_json: dict):
-        self.project = project
-        self.json = element_json
+    kind = 'map_frame'
+
+    def __init__(self, project: object, element_json: dict, layout: object = None):
+        super().__init__(project, element_json, layout)
 
         # Find the map based on the uRI or the viewableObjectPath
         map_uri = self.json.get('uRI', False) or self.json['view']['viewableObjectPath']
@@ -25,3 +27,17 @@ class MapFrame:
         width.
         """
         return MapView(self.json['view'])
+
+
+    def related_elements(self, kind: str) -> list:
+        """
+        Returns the elements of the given kind (e.g. "legend") related to this map frame in the
+        layout, or an empty list if the layout is not known.
+        """
+        if self.layout is None:
+            return []
+
+        return [
+            elem for elem in self.layout.elements_of_kind(kind)
+            if elem.json.get('mapFrame', None) == self.name
+        ]
@@ -2,47 +2,91 @@
 Implementation of a ArcGIS Pro project class.
 """
 
-import json
-import os
-import shutil
-import tempfile
-from zipfile import ZipFile
-
+from . import decode, stats
+from .archive import Archive
+from .index import build_index, first, unique
 from .map import Map
+from .layer import Layer
 from .layout import Layout
+from .project_item import ProjectItem
+from .query import compile_query
+from .select import select_members
+from .snapshot import ProjectSnapshot, snapshot_project
 
 
 class Project:
     """
-    Representation of an ArcGIS Pro project file. To open a project file:
+    Representation of an ArcGIS Pro project file. To open a project file (.aprx), or the project
+    file in a project package (.ppkx):
     proj = aprx.Project(project_path)
 
     The file needs to be closed at the end with:
     proj.close()
     """
 
-    def __init__(self, project_path):
+    def __init__(self, project_path, data=None, members: dict = None):
         """
-        Opens an ArcGIS Pro project file.
+        Opens an ArcGIS Pro project file. The content of the file can be provided in `data`, as
+        bytes or as a file-like object, and members already decompressed in `members` (see
+        Archive).
         """
         # Keep the path around
         self.path = project_path
 
-        # Create a temporary directory and extract the project file in the temp dir.
-        self.tmp_dir = tempfile.mkdtemp(prefix='aprx_')
-
-        # Unzip the project file.
-        with ZipFile(self.path, 'r') as zip_ref:
-            zip_ref.extractall(self.tmp_dir)
+        # Open the project file. The members are read directly from the archive when needed.
+        with stats.phase('open'):
+            self.archive = Archive(self.path, data=data, members=members)
 
         # Prepare a cache variable to avoid loading multiple times the same data.
         self.cache = {}
 
-        # Read the file with all project items (the elements in the catalog)
-        with open(os.path.join(self.tmp_dir, 'GISProject.json'), 'r', encoding='utf-8') as f:
-            self.json = json.loads(f.read())
+        # Read the project items (the elements in the catalog). Only this member is extracted from
+        # GISProject.json, the full document is loaded only if needed.
+        self.project_items = select_members(
+            self.archive.read('GISProject.json'), ['projectItems']
+        ).get('projectItems', [])
+
+
+    @property
+    def json(self) -> dict:
+        """
+        Returns the full JSON document of the project (GISProject.json).
+        """
+        if self.cache.get('json', None) is None:
+            self.cache['json'] = self.read_json('GISProject.json')
+
+        return self.cache['json']
+
+
+    def read_json(self, cim_path) -> dict:
+        """
+        Reads and parses the JSON document at the given CIMPATH inside the project archive.
+        """
+        return decode.loads(self.archive.read(cim_path))
+
+
+    @property
+    def items(self) -> list:
+        """
+        Returns all project items (the elements in the catalog). Maps and layouts are returned as
+        Map and Layout instances, all other items as ProjectItem instances. No JSON document is
+        read to build the catalog.
+        """
+        if self.cache.get('items', None) is not None:
+            return self.cache['items']
+
+        maps, layouts = iter(self.maps), iter(self.layouts)
+        items = []
+        for it in self.project_items:
+            if it['itemType'] == 'Map':
+                items.append(next(maps))
+            elif it['itemType'] == 'Layout':
+                items.append(next(layouts))
+            else:
+                items.append(ProjectItem(self, it))
 
-        self.project_items = self.json.get('projectItems', [])
+        self.cache['items'] = items
+        return items
 
 
     @property
@@ -62,12 +106,64 @@ class Project:
         return self.cache['maps']
 
 
+    def map_index(self, attr) -> dict:
+        """
+        Returns the index of the maps on the given attribute ('uri', 'item_id' or 'name'). The index
+        is built once and kept in the cache.
+        """
+        key = f'maps_by_{attr}'
+        if self.cache.get(key, None) is None:
+            self.cache[key] = build_index(self.maps, attr)
+
+        return self.cache[key]
+
+
+    def map_by_uri(self, uri) -> Map:
+        """
+        Returns a map based on its uRI, or None if there is no such map or the uRI is ambiguous.
+        """
+        return unique(self.map_index('uri'), uri)
+
+
     def map_with_uri(self, uri) -> Map:
         """
-        Returns a map based on its uRI.
+        Returns a map based on its uRI. Same as `map_by_uri`.
+        """
+        return self.map_by_uri(uri)
+
+
+    def map_by_id(self, item_id) -> Map:
+        """
+        Returns a map based on its item ID, or None if there is no such map.
+        """
+        return unique(self.map_index('item_id'), item_id)
+
+
+    def map_by_name(self, name) -> Map:
+        """
+        Returns the first map with the given name, or None if there is no such map.
+        """
+        return first(self.map_index('name'), name)
+
+
+    def maps_with_name(self, name) -> list:
+        """
+        Returns all the maps with the given name (names are not unique in a project).
+        """
+        return self.map_index('name').get(name, [])
+
+
+    def layer(self, cim_path) -> Layer:
+        """
+        Returns the layer defined at the given CIMPATH. There is only one Layer instance per CIMPATH
+        in a project, and it is shared by all maps referencing it.
         """
-        map_lst = [m for m in self.maps if m.uri == uri]
-        return map_lst[0] if len(map_lst) == 1 else None
+        layers = self.cache.setdefault('layers', {})
+
+        if cim_path not in layers:
+            layers[cim_path] = Layer(project=self, layer_path=cim_path)
+
+        return layers[cim_path]
 
 
     @property
@@ -87,9 +183,78 @@ class Project:
         return self.cache['layouts']
 
 
+    def layout_index(self, attr) -> dict:
+        """
+        Returns the index of the layouts on the given attribute ('uri', 'item_id' or 'name'). The
+        index is built once and kept in the cache.
+        """
+        key = f'layouts_by_{attr}'
+        if self.cache.get(key, None) is None:
+            self.cache[key] = build_index(self.layouts, attr)
+
+        return self.cache[key]
+
+
+    def layout_by_uri(self, uri) -> Layout:
+        """
+        Returns a layout based on its uRI, or None if there is no such layout or the uRI is
+        ambiguous.
+        """
+        return unique(self.layout_index('uri'), uri)
+
+
+    def layout_by_id(self, item_id) -> Layout:
+        """
+        Returns a layout based on its item ID, or None if there is no such layout.
+        """
+        return unique(self.layout_index('item_id'), item_id)
+
+
+    def layout_by_name(self, name) -> Layout:
+        """
+        Returns the first layout with the given name, or None if there is no such layout.
+        """
+        return first(self.layout_index('name'), name)
+
+
+    def layouts_with_name(self, name) -> list:
+        """
+        Returns all the layouts with the given name (names are not unique in a project).
+        """
+        return self.layout_index('name').get(name, [])
+
+
+    def query(self, text: str):
+        """
+        Returns a generator over the items (or values) found by the query (see aprx.query), e.g.:
+        proj.query("layout/*/mapframe/*/layer[name='Towns'].labelClasses[0].expression")
+        """
+        return compile_query(text).run(self)
+
+
+    def snapshot(self, release: bool = True) -> ProjectSnapshot:
+        """
+        Returns a compact, immutable snapshot of the graded properties of the project (see
+        aprx.snapshot). With `release`, the parsed JSON documents are released afterwards.
+        """
+        snap = snapshot_project(self)
+        if release:
+            self.release()
+
+        return snap
+
+
+    def release(self):
+        """
+        Releases the parsed JSON documents and the maps, layouts and layers built from them. They
+        are read again from the archive if they are accessed later.
+        """
+        self.cache = {}
+
+
     def close(self):
         """
         Closes the ArcGIS Pro project file.
         """
-        # All we need to do is to remove the temporary directory with the unzipped content.
-        shutil.rmtree(self.tmp_dir)
+        # All we need to do is to close the archive.
+        self.archive.close()
@@ -0,0 +1,72 @@
+"""
+Implementation of a ProjectItem.
+"""
+
+from .select import select_items, select_members
+
+
+class ProjectItem:
+    """
+    An item as it appears in the catalog of the project (a map, a layout, a style, ...).
+
+    The name, item type and URI are taken from the project items in GISProject.json. The JSON
+    document backing the item is only read from the archive when it is accessed for the first time.
+    """
+    def __init__(self, project: object, properties: dict):
+        self.project = project
+        self.item_id = properties['iD']
+        self.name = properties['name']
+        self.item_type = properties.get('itemType', None)
+        self.properties = properties
+
+        # The catalog path is used as URI for other elements (e.g. in the layout). For maps and
+        # layouts, it is a CIMPATH, i.e. the path to a JSON file inside the project archive.
+        self.uri = self.properties.get('catalogPath', None)
+
+        # Extract the CIMPATH and keep it around
+        self.cim_path = None
+        if self.uri is not None and self.uri.startswith('CIMPATH='):
+            self.cim_path = self.uri.split('=')[1]
+
+        # The cache, empty when starting
+        self.cache = {}
+
+
+    def __repr__(self):
+        return f'<ProjectItem: {self.item_type} "{self.name}">'
+
+
+    @property
+    def json(self) -> dict:
+        """
+        Returns the JSON document of the item. It is loaded from the archive on first access.
+        Items without a CIMPATH have no JSON document, and an empty dictionary is returned.
+        """
+        if self.cache.get('json', None) is not None:
+            return self.cache['json']
+
+        self.cache['json'] = {} if self.cim_path is None else self.project.read_json(self.cim_path)
+        return self.cache['json']
+
+
+    def select(self, keys) -> dict:
+        """
+        Returns the requested top-level members of the JSON document, as a dictionary. If the JSON
+        has not been loaded yet, only these members are extracted from the archive.
+        """
+        if self.cache.get('json', None) is not None or self.cim_path is None:
+            return { k: self.json[k] for k in keys if k in self.json }
+
+        return select_members(self.project.archive.read(self.cim_path), keys)
+
+
+    def select_items(self, key: str, predicate) -> list:
+        """
+        Returns the items of the top-level array member `key` for which `predicate(item)` is True.
+        If the JSON has not been loaded yet, only the selected items are extracted from the archive.
+        """
+        if self.cache.get('json', None) is not None or self.cim_path is None:
+            return [item for item in self.json.get(key, []) if predicate(item)]
+
+        items = select_items(self.project.archive.read(self.cim_path), key, predicate)
+        return [] if items is None else items
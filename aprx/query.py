@@ -0,0 +1,305 @@
+"""
+Queries over the maps, layouts, map frames and layers of a project.
+
+A query is a path of steps separated by "/". Every step names a kind of item (layout, mapframe,
+map or layer), followed either by the name of the items ("*" for all of them, quoted if the name
+contains special characters) or by conditions in brackets. The last step can be followed by a
+path in the JSON of the items:
+
+proj.query("layout/*/mapframe/*/layer[name='Towns'].labelClasses[0].textSymbol.symbol.height")
+proj.query("map/'Layers'/layer/HillShadeCH.transparency")
+proj.query("layer[labelVisibility=true]")
+
+A query is compiled once into a plan (see `compile_query`), and the compiled plans are kept for
+the process. The plan looks up the items by name with the indexes of the project and the maps
+when there are some, and is evaluated lazily: `Project.query` returns a generator over the items
+(or the values at the JSON path, missing values are skipped).
+"""
+
+import json
+import re
+
+from .symbology import accessor
+
+
+# The kinds of items which can be queried
+KINDS = ('layout', 'mapframe', 'map', 'layer')
+
+# The attributes of the items which are not read from their JSON
+ATTRIBUTES = frozenset(('name', 'id', 'uri'))
+
+# The compiled queries, by query text
+QUERIES = {}
+
+# The parts of a step: the head (a kind or a name), the conditions and the JSON path
+HEAD = re.compile(r"""\s*(?:'([^']*)'|"([^"]*)"|([^\[\].'"]+))""")
+PATH = r'\w+(?:\.\w+|\[-?\d+\])*'
+CONDITION = re.compile(
+    r"""\[\s*(""" + PATH + r""")\s*(!=|=)\s*('[^']*'|"[^"]*"|[^\]\s]+)\s*\]"""
+)
+TAIL = re.compile(r'((?:\.\w+|\[-?\d+\])*)\s*$')
+KEY = re.compile(r'\.?(\w+)|\[(-?\d+)\]')
+
+
+def all_layers(maps):
+    """
+    Returns a generator over the layers of the maps.
+    """
+    for mp in maps:
+        yield from mp.layers
+
+
+def frame_maps(frames):
+    """
+    Returns a generator over the maps shown in the map frames.
+    """
+    for frame in frames:
+        if frame.map is not None:
+            yield frame.map
+
+
+def all_frames(layouts):
+    """
+    Returns a generator over the map frames of the layouts.
+    """
+    for lyt in layouts:
+        yield from lyt.map_frames
+
+
+# The items of every kind in an item, by (kind of the item, kind of the children)
+CHILDREN = {
+    ('project', 'layout'): lambda proj: proj.layouts,
+    ('project', 'map'): lambda proj: proj.maps,
+    ('project', 'mapframe'): lambda proj: all_frames(proj.layouts),
+    ('project', 'layer'): lambda proj: all_layers(proj.maps),
+    ('layout', 'mapframe'): lambda lyt: lyt.map_frames,
+    ('layout', 'map'): lambda lyt: frame_maps(lyt.map_frames),
+    ('layout', 'layer'): lambda lyt: all_layers(frame_maps(lyt.map_frames)),
+    ('mapframe', 'map'): lambda frame: frame_maps((frame,)),
+    ('mapframe', 'layer'): lambda frame: all_layers(frame_maps((frame,))),
+    ('map', 'layer'): lambda mp: mp.layers,
+}
+
+# The children with a given name, for the items with an index on the names
+NAMED_CHILDREN = {
+    ('project', 'layout'): lambda proj, name: proj.layouts_with_name(name),
+    ('project', 'map'): lambda proj, name: proj.maps_with_name(name),
+    ('map', 'layer'): lambda mp, name: mp.layers_with_name(name),
+    ('mapframe', 'layer'): lambda frame, name: (
+        [] if frame.map is None else frame.map.layers_with_name(name)
+    ),
+}
+
+
+def parse_keys(path: str) -> list:
+    """
+    Returns the keys of a JSON path, e.g. ['labelClasses', 0, 'height'] for
+    "labelClasses[0].height".
+    """
+    return [key if idx == '' else int(idx) for key, idx in KEY.findall(path)]
+
+
+def compile_accessor(path: str):
+    """
+    Compiles a JSON path (e.g. "labelClasses[0].textSymbol.symbol.height") into a function
+    returning the value at this path in a JSON document, or None.
+    """
+    return accessor(*parse_keys(path))
+
+
+def parse_value(text: str):
+    """
+    Parses the value of a condition: a quoted string, or a JSON literal (number, true, false,
+    null). Other values are taken as strings.
+    """
+    if text[0] in '\'"':
+        return text[1:-1]
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def split_steps(text: str) -> list:
+    """
+    Splits a query on the "/" which are not quoted or in brackets.
+    """
+    parts, current, quote, depth = [], [], None, 0
+    for ch in text:
+        if quote is not None:
+            quote = None if ch == quote else quote
+        elif ch in '\'"':
+            quote = ch
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+        elif ch == '/' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(ch)
+
+    parts.append(''.join(current))
+    return parts
+
+
+def parse_step(text: str, query: str) -> tuple:
+    """
+    Parses a step into its head, whether the head was quoted, its conditions as (keys, negated,
+    value) tuples and the keys of the JSON path.
+    """
+    m = HEAD.match(text)
+    if m is None:
+        raise ValueError(f'Invalid step "{text}" in query "{query}"')
+
+    if m.group(3) is not None:
+        head, quoted = m.group(3).strip(), False
+    else:
+        head, quoted = m.group(1) if m.group(1) is not None else m.group(2), True
+    pos = m.end()
+
+    conditions = []
+    while True:
+        cond = CONDITION.match(text, pos)
+        if cond is None:
+            break
+        conditions.append((parse_keys(cond.group(1)), cond.group(2) == '!=',
+                           parse_value(cond.group(3))))
+        pos = cond.end()
+
+    tail = TAIL.match(text, pos)
+    if tail is None:
+        raise ValueError(f'Invalid step "{text}" in query "{query}"')
+
+    return head, quoted, conditions, parse_keys(tail.group(1))
+
+
+class Step:
+    """
+    A compiled step of a query: the items of `kind` in every item of kind `parent`, with the name
+    `name` (None for all) and matching the conditions.
+    """
+    def __init__(self, parent: str, kind: str, name: str = None, conditions: list = ()):
+        if (parent, kind) not in CHILDREN:
+            raise ValueError(f'A {parent} has no {kind}')
+
+        self.parent = parent
+        self.kind = kind
+        self.children = CHILDREN[(parent, kind)]
+
+        # A condition on the name is used as the name of the step if there is an index
+        conditions = list(conditions)
+        for cond in conditions:
+            if name is None and cond[0] == ['name'] and not cond[1]:
+                name = cond[2]
+                conditions.remove(cond)
+                break
+
+        self.name = name
+        self.named_children = NAMED_CHILDREN.get((parent, kind), None)
+        if name is not None and self.named_children is None:
+            # Without index, the name is checked like the other conditions
+            conditions.insert(0, (['name'], False, name))
+
+        self.conditions = [
+            (self.getter(keys), negated, value) for keys, negated, value in conditions
+        ]
+
+
+    def __repr__(self):
+        return f'<Step: {self.parent} → {self.kind} "{self.name or "*"}">'
+
+
+    def getter(self, keys: list):
+        """
+        Returns the function reading the value of a condition from an item: one of the attributes
+        of the item, or a path in its JSON.
+        """
+        if len(keys) == 1 and keys[0] in ATTRIBUTES:
+            attr = keys[0]
+            return lambda item: getattr(item, attr, None)
+
+        get = accessor(*keys)
+        return lambda item: get(item.json)
+
+
+    def apply(self, items):
+        """
+        Returns a generator over the children of the items matching the step.
+        """
+        for item in items:
+            if self.name is not None and self.named_children is not None:
+                children = self.named_children(item, self.name)
+            else:
+                children = self.children(item)
+
+            for child in children:
+                if all((get(child) == value) != negated for get, negated, value in self.conditions):
+                    yield child
+
+
+class Query:
+    """
+    A compiled query. It can be run on any number of projects.
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.steps = []
+        self.keys = []
+
+        parts = split_steps(text)
+        parent, i = 'project', 0
+        while i < len(parts):
+            if len(self.keys) > 0:
+                raise ValueError(f'A JSON path is only allowed at the end of query "{text}"')
+
+            kind, quoted, conditions, keys = parse_step(parts[i], text)
+            if quoted or kind not in KINDS:
+                raise ValueError(f'Unknown kind "{kind}" in query "{text}"')
+            i += 1
+
+            # A kind without conditions is followed by the name of the items
+            name = None
+            if len(conditions) == 0 and len(keys) == 0 and i < len(parts):
+                name, quoted, conditions, keys = parse_step(parts[i], text)
+                if name == '*' and not quoted:
+                    name = None
+                i += 1
+
+            self.steps.append(Step(parent, kind, name, conditions))
+            self.keys = keys
+            parent = kind
+
+        self.get = accessor(*self.keys) if len(self.keys) > 0 else None
+
+
+    def __repr__(self):
+        return f'<Query: "{self.text}">'
+
+
+    def run(self, project):
+        """
+        Returns a generator over the items found in the project, or over the values at the JSON
+        path of the query.
+        """
+        items = iter((project,))
+        for step in self.steps:
+            items = step.apply(items)
+
+        if self.get is None:
+            return items
+
+        return (value for value in map(self.get, (item.json for item in items))
+                if value is not None)
+
+
+def compile_query(text: str) -> Query:
+    """
+    Returns the compiled query. Every query is compiled only once per process.
+    """
+    if text not in QUERIES:
+        QUERIES[text] = Query(text)
+
+    return QUERIES[text]
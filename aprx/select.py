@@ -0,0 +1,161 @@
+"""
+Selective extraction of subtrees from CIM JSON documents.
+
+Most of the time, only a few members of a CIM document are needed: the `projectItems` of
+GISProject.json, the `layers` of a map, or the map frames in the `elements` of a layout. The
+functions in this module walk the document and decode the values one at a time, so that:
+- the walk stops as soon as the requested members have been found,
+- the items of an array are decoded one by one, and the items which are not selected are released
+  immediately instead of being kept in the full object tree.
+
+The values themselves are decoded with the C decoder of the json module. If a faster decoder is
+available (see aprx.decode), decoding the full document with it is faster than walking it, and the
+members are picked from the decoded document instead.
+"""
+
+import json
+import re
+
+from . import decode, stats
+
+
+# Whitespace between the JSON tokens
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def to_text(data) -> str:
+    """
+    Returns the JSON document as a string. Bytes are decoded as UTF-8 (with an optional BOM).
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return data.decode('utf-8-sig')
+
+    return data
+
+
+def skip_whitespace(text: str, idx: int) -> int:
+    """
+    Returns the index of the first character after the whitespace at `idx`.
+    """
+    return WHITESPACE.match(text, idx).end()
+
+
+def expect(text: str, idx: int, char: str) -> int:
+    """
+    Checks that the next token at `idx` is `char` and returns the index after it.
+    """
+    idx = skip_whitespace(text, idx)
+    if text[idx:idx + 1] != char:
+        raise json.JSONDecodeError(f'Expecting "{char}"', text, idx)
+
+    return idx + 1
+
+
+def iter_members(text: str, idx: int = 0):
+    """
+    Iterates over the members of the JSON object starting at `idx`. Yields tuples (key, start) with
+    the index where the value starts. The caller must send back the index where the value ends (or
+    None to let the value be decoded and skipped).
+    """
+    idx = expect(text, idx, '{')
+    idx = skip_whitespace(text, idx)
+    if text[idx:idx + 1] == '}':
+        return
+
+    decoder = decode.json_decoder()
+    while True:
+        key, idx = decoder.raw_decode(text, skip_whitespace(text, idx))
+        idx = skip_whitespace(text, expect(text, idx, ':'))
+
+        end = yield key, idx
+        if end is None:
+            _value, end = decoder.raw_decode(text, idx)
+
+        idx = skip_whitespace(text, end)
+        if text[idx:idx + 1] == '}':
+            return
+
+        idx = expect(text, idx, ',')
+
+
+def iter_items(text: str, idx: int):
+    """
+    Iterates over the items of the JSON array starting at `idx`, decoding them one at a time.
+    """
+    idx = skip_whitespace(text, expect(text, idx, '['))
+    if text[idx:idx + 1] == ']':
+        return
+
+    decoder = decode.json_decoder()
+    while True:
+        item, idx = decoder.raw_decode(text, skip_whitespace(text, idx))
+        yield item
+
+        idx = skip_whitespace(text, idx)
+        if text[idx:idx + 1] == ']':
+            return
+
+        idx = expect(text, idx, ',')
+
+
+def select_members(data, keys) -> dict:
+    """
+    Returns the requested top-level members of a JSON object, as a dictionary. Missing members are
+    not included. The document is only read up to the last requested member.
+    """
+    keys = set(keys)
+    if decode.is_fast():
+        doc = decode.loads(data)
+        return { k: doc[k] for k in keys if k in doc }
+
+    stats.count('json_selected')
+    with stats.phase('json'):
+        return select_text_members(to_text(data), keys)
+
+
+def select_text_members(text: str, keys: set) -> dict:
+    """
+    Returns the requested top-level members of the JSON object in `text`, see `select_members`.
+    """
+    decoder = decode.json_decoder()
+
+    selected = {}
+    members = iter_members(text)
+    try:
+        key, start = next(members)
+        while True:
+            end = None
+            if key in keys:
+                selected[key], end = decoder.raw_decode(text, start)
+                if len(selected) == len(keys):
+                    break
+
+            key, start = members.send(end)
+    except StopIteration:
+        pass
+
+    return selected
+
+
+def select_items(data, key: str, predicate) -> list:
+    """
+    Returns the items of the top-level array member `key` for which `predicate(item)` is True. The
+    items are decoded one by one and only the selected ones are kept. Returns None if there is no
+    member `key`.
+    """
+    if decode.is_fast():
+        items = decode.loads(data).get(key, None)
+        return None if items is None else [item for item in items if predicate(item)]
+
+    stats.count('json_selected')
+    with stats.phase('json'):
+        text = to_text(data)
+        members = iter_members(text)
+        try:
+            name, start = next(members)
+            while name != key:
+                name, start = members.send(None)
+        except StopIteration:
+            return None
+
+        return [item for item in iter_items(text, start) if predicate(item)]
@@ -0,0 +1,282 @@
+"""
+Compact snapshots of the graded properties of a project.
+
+A Project keeps the parsed CIM documents of its maps, layouts and layers around. A snapshot only
+extracts the properties needed for grading (names, ids, labels, symbol, style, transparency, layer
+order and map frame cameras) into immutable records built on tuples. The records have no
+reference to the project or to the JSON, they are cheap to pickle (e.g. to send them between
+processes), and can be compared and hashed like tuples:
+
+proj = aprx.Project(path)
+snap = proj.snapshot()
+proj.close()
+
+By default, `Project.snapshot` releases the parsed JSON documents once the snapshot is taken.
+"""
+
+from typing import NamedTuple
+
+
+class Color(NamedTuple):
+    """
+    RGBA color, like aprx.RGBA.
+    """
+    r: float
+    g: float
+    b: float
+    a: float = 100
+
+    def is_equal(self, other) -> bool:
+        """
+        Checks if two colors are the same. `other` can be a Color or an RGBA instance.
+        """
+        return self.r == other.r and self.g == other.g and self.b == other.b and self.a == other.a
+
+
+class Font(NamedTuple):
+    """
+    The font of the labels.
+    """
+    family: str
+    style: str
+    size: float
+
+
+class Expression(NamedTuple):
+    """
+    The expression of the labels.
+    """
+    value: str
+    engine: str
+
+
+class Labels(NamedTuple):
+    """
+    The labels of a layer, see Layer.labels. `font` and `expression` are None if the labels are
+    not shown.
+    """
+    shown: bool
+    font: Font = None
+    expression: Expression = None
+
+
+class Symbol(NamedTuple):
+    """
+    The top symbol layer of the first symbol of the renderer of a layer, see Layer.symbol: the
+    symbol of a simple renderer, or of the first class of a unique value or class breaks renderer.
+    """
+    type: str
+    enable: bool
+    size: float
+    color: Color = None
+
+
+class Style(NamedTuple):
+    """
+    The stroke and fill of the first symbol of the renderer of a layer, see Layer.style. The
+    colors are None if there is no enabled stroke or fill, or if the color cannot be converted to
+    RGBA.
+    """
+    fill_color: Color = None
+    stroke_color: Color = None
+    stroke_width: float = None
+    has_fill: bool = False
+    has_stroke: bool = False
+
+
+class Camera(NamedTuple):
+    """
+    The camera of a map frame, like aprx.MapView.
+    """
+    x: float
+    y: float
+    scale: float
+    height: float
+    width: float
+
+    def is_equal(self, other, tolerance: dict = None) -> bool:
+        """
+        Compares two cameras (or map views) based on x, y and scale, see MapView.is_equal.
+        """
+        tolerance = {} if tolerance is None else tolerance
+        return abs(self.x - other.x) <= tolerance.get('x', 0) and \
+            abs(self.y - other.y) <= tolerance.get('y', 0) and \
+            abs(self.scale - other.scale) <= tolerance.get('scale', 0)
+
+
+class LayerSnapshot(NamedTuple):
+    """
+    The graded properties of a layer.
+    """
+    id: str
+    uri: str
+    name: str
+    transparency: float
+    labels: Labels
+    symbol: Symbol
+    style: Style
+
+
+class MapSnapshot(NamedTuple):
+    """
+    A map with its layers, from the top to the bottom of the layer tree. `layer_order` keeps the
+    references to all layers as in the JSON, including the ones which are not layer documents.
+    """
+    item_id: str
+    name: str
+    uri: str
+    layer_order: tuple
+    layers: tuple
+
+
+class MapFrameSnapshot(NamedTuple):
+    """
+    A map frame of a layout, with the URI of its map (None if the map is not found).
+    """
+    name: str
+    map_uri: str
+    camera: Camera
+
+
+class LayoutSnapshot(NamedTuple):
+    """
+    A layout with its map frames.
+    """
+    item_id: str
+    name: str
+    uri: str
+    map_frames: tuple
+
+
+class ProjectSnapshot(NamedTuple):
+    """
+    The maps and layouts of a project, in the order of the catalog.
+    """
+    path: str
+    maps: tuple
+    layouts: tuple
+
+    def map_by_uri(self, uri: str) -> MapSnapshot:
+        """
+        Returns the first map with the given URI, or None.
+        """
+        return next((mp for mp in self.maps if mp.uri == uri), None)
+
+
+def to_color(color) -> Color:
+    """
+    Converts an RGBA instance to a Color. None is kept.
+    """
+    return None if color is None else Color(color.r, color.g, color.b, color.a)
+
+
+def snapshot_labels(labels: dict) -> Labels:
+    """
+    Converts the labels of a layer (see Layer.labels) to a Labels record.
+    """
+    font, expr = labels.get('font', None), labels.get('expression', None)
+    return Labels(
+        shown=labels['shown'],
+        font=None if font is None else Font(font['family'], font['style'], font['size']),
+        expression=None if expr is None else Expression(expr['value'], expr['engine'])
+    )
+
+
+def snapshot_symbol(symbol: dict) -> Symbol:
+    """
+    Converts the symbol of a layer (see Layer.symbol) to a Symbol record. None is kept.
+    """
+    if symbol is None:
+        return None
+
+    return Symbol(symbol['type'], symbol['enable'], symbol['size'], to_color(symbol['color']))
+
+
+def snapshot_style(style: dict) -> Style:
+    """
+    Converts the style of a layer (see Layer.style) to a Style record. None is kept.
+    """
+    if style is None:
+        return None
+
+    fill, stroke = style['fill'], style['stroke']
+    return Style(
+        fill_color=None if fill is None else to_color(fill['color']),
+        stroke_color=None if stroke is None else to_color(stroke['color']),
+        stroke_width=None if stroke is None else stroke['width'],
+        has_fill=fill is not None,
+        has_stroke=stroke is not None
+    )
+
+
+def snapshot_layer(layer) -> LayerSnapshot:
+    """
+    Takes a snapshot of a layer.
+    """
+    return LayerSnapshot(
+        id=layer.id,
+        uri=layer.uri,
+        name=layer.name,
+        transparency=layer.json.get('transparency', None),
+        labels=snapshot_labels(layer.labels),
+        symbol=snapshot_symbol(layer.symbol),
+        style=snapshot_style(layer.style)
+    )
+
+
+def snapshot_map(mp, layers: dict) -> MapSnapshot:
+    """
+    Takes a snapshot of a map. The layer snapshots are shared through `layers` (by URI), like the
+    Layer instances in the project.
+    """
+    for lyr in mp.layers:
+        if lyr.uri not in layers:
+            layers[lyr.uri] = snapshot_layer(lyr)
+
+    return MapSnapshot(
+        item_id=mp.item_id,
+        name=mp.name,
+        uri=mp.uri,
+        layer_order=tuple(mp.layer_refs),
+        layers=tuple(layers[lyr.uri] for lyr in mp.layers)
+    )
+
+
+def snapshot_map_frame(map_frame) -> MapFrameSnapshot:
+    """
+    Takes a snapshot of a map frame. The camera is None if the map frame has no camera.
+    """
+    camera = None
+    if 'camera' in map_frame.json.get('view', {}):
+        view = map_frame.map_view
+        camera = Camera(view.x, view.y, view.scale, view.height, view.width)
+
+    return MapFrameSnapshot(
+        name=map_frame.json.get('name', None),
+        map_uri=None if map_frame.map is None else map_frame.map.uri,
+        camera=camera
+    )
+
+
+def snapshot_layout(layout) -> LayoutSnapshot:
+    """
+    Takes a snapshot of a layout.
+    """
+    return LayoutSnapshot(
+        item_id=layout.item_id,
+        name=layout.name,
+        uri=layout.uri,
+        map_frames=tuple(snapshot_map_frame(mf) for mf in layout.map_frames)
+    )
+
+
+def snapshot_project(project) -> ProjectSnapshot:
+    """
+    Takes a snapshot of the maps and layouts of a project.
+    """
+    layers = {}
+    return ProjectSnapshot(
+        path=project.path,
+        maps=tuple(snapshot_map(mp, layers) for mp in project.maps),
+        layouts=tuple(snapshot_layout(layout) for layout in project.layouts)
+    )
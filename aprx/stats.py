@@ -0,0 +1,114 @@
+"""
+Lightweight counters and timers, to find out where the time goes when reading projects.
+
+The counters are always updated, they cost a dictionary update per archive member or JSON
+document. The timers are only active once enabled with `enable()`:
+
+aprx.stats.enable()
+aprx.stats.reset()
+proj = aprx.Project(path)
+...
+print(aprx.stats.snapshot())
+
+The timers measure phases, e.g. "unzip", "json" or "layers". Phases can be nested, and the time of
+a phase does not include the time of the phases nested in it (self time). The sum of all phases
+is therefore the time spent inside any phase.
+"""
+
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+
+# The counters, by name: members read, bytes read and decompressed, JSON documents parsed
+COUNTERS = {}
+
+# The self time of the phases, by name
+TIMES = {}
+
+# The phases being timed, as [name, start, time of the nested phases]
+STACK = []
+
+# The current settings of the timers
+SETTINGS = {
+    'enabled': False,
+}
+
+# A phase doing nothing, returned when the timers are disabled
+NO_PHASE = nullcontext()
+
+
+def enable(enabled: bool = True) -> None:
+    """
+    Enables (or disables) the timers.
+    """
+    SETTINGS['enabled'] = enabled
+
+
+def is_enabled() -> bool:
+    """
+    Returns True if the timers are enabled.
+    """
+    return SETTINGS['enabled']
+
+
+def reset() -> None:
+    """
+    Clears all counters and timers.
+    """
+    COUNTERS.clear()
+    TIMES.clear()
+
+
+def count(name: str, n: int = 1) -> None:
+    """
+    Adds `n` to the counter `name`.
+    """
+    COUNTERS[name] = COUNTERS.get(name, 0) + n
+
+
+@contextmanager
+def timed(name: str):
+    """
+    Measures the self time of the phase `name`, i.e. without the time of the nested phases.
+    """
+    STACK.append([name, perf_counter(), 0.0])
+    try:
+        yield
+    finally:
+        name, start, nested = STACK.pop()
+        elapsed = perf_counter() - start
+        TIMES[name] = TIMES.get(name, 0.0) + elapsed - nested
+        if len(STACK) > 0:
+            STACK[-1][2] += elapsed
+
+
+def phase(name: str):
+    """
+    Returns a context manager timing the phase `name` if the timers are enabled, and doing nothing
+    otherwise.
+    """
+    if SETTINGS['enabled']:
+        return timed(name)
+
+    return NO_PHASE
+
+
+def timed_call(name: str, func):
+    """
+    Wraps `func` so that every call is timed as the phase `name`.
+    """
+    def wrapper(*args, **kwargs):
+        with timed(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def snapshot() -> dict:
+    """
+    Returns a copy of the counters and of the times (in seconds) of the phases.
+    """
+    return {
+        'counters': dict(COUNTERS),
+        'times': dict(TIMES),
+    }
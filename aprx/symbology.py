@@ -0,0 +1,269 @@
+"""
+Extraction of the labels, symbol and style of a layer from its CIM definition.
+
+The paths to the values in the CIM documents are compiled once into accessors, which return None
+instead of failing if a part of the path is missing:
+
+symbol_layers = accessor('symbol', 'symbolLayers')
+symbol_layers(renderer_symbol)    # the list of symbol layers, or None
+
+The symbols are found in simple renderers, and in the classes of unique value and class breaks
+renderers. The colors of markers (vector, character and picture markers) and fills (solid, hatch and
+gradient fills) are read according to the type of the symbol layer, and converted to RGBA according
+to their color model (RGB, HSV, HSL, CMYK or gray).
+"""
+
+import colorsys
+
+from .color import RGBA
+
+
+class Accessor:
+    """
+    A compiled path of keys (or indexes in lists), called with a JSON document to get the value at
+    this path, or None if the path does not exist. Unlike a closure, it can be sent to other
+    processes with the checks using it.
+    """
+    __slots__ = ('keys',)
+
+    def __init__(self, keys: tuple):
+        self.keys = keys
+
+    def __repr__(self):
+        return f'<Accessor: {self.keys}>'
+
+    def __call__(self, doc):
+        try:
+            for k in self.keys:
+                doc = doc[k]
+        except (KeyError, IndexError, TypeError):
+            return None
+        return doc
+
+
+def accessor(*keys) -> Accessor:
+    """
+    Compiles a path of keys (or indexes in lists) into a function returning the value at this path
+    in a JSON document, or None if the path does not exist.
+    """
+    return Accessor(keys)
+
+
+# The paths in the definition of a layer
+LABEL_CLASS = accessor('labelClasses', 0)
+TEXT_SYMBOL = accessor('textSymbol', 'symbol')
+RENDERER = accessor('renderer')
+
+# The paths in a symbol reference (CIMSymbolReference) and a symbol
+SYMBOL = accessor('symbol')
+SYMBOL_LAYERS = accessor('symbolLayers')
+
+# The paths in the renderers with several classes
+DEFAULT_SYMBOL = accessor('defaultSymbol', 'symbol')
+UNIQUE_VALUE_GROUPS = accessor('groups')
+CLASSES = accessor('classes')
+BREAKS = accessor('breaks')
+
+
+def rgb_values(*values) -> tuple:
+    """
+    Scales RGB values between 0 and 1 to values between 0 and 255, rounded to remove the errors of
+    the conversions.
+    """
+    return tuple(round(v * 255, 6) for v in values)
+
+
+def hsv_to_rgba(h, s, v, a=100) -> RGBA:
+    """
+    Converts HSV values (hue between 0 and 360, saturation and value between 0 and 100) to RGBA.
+    """
+    return RGBA(*rgb_values(*colorsys.hsv_to_rgb(h / 360, s / 100, v / 100)), a)
+
+
+def hsl_to_rgba(h, s, light, a=100) -> RGBA:
+    """
+    Converts HSL values (hue between 0 and 360, saturation and lightness between 0 and 100) to
+    RGBA.
+    """
+    return RGBA(*rgb_values(*colorsys.hls_to_rgb(h / 360, light / 100, s / 100)), a)
+
+
+def cmyk_to_rgba(c, m, y, k, a=100) -> RGBA:
+    """
+    Converts CMYK values (between 0 and 100) to RGBA.
+    """
+    return RGBA(*rgb_values(*((1 - x / 100) * (1 - k / 100) for x in (c, m, y))), a)
+
+
+def gray_to_rgba(level, a=100) -> RGBA:
+    """
+    Converts a gray level (between 0 and 255) to RGBA.
+    """
+    return RGBA(level, level, level, a)
+
+
+# The conversion of every CIM color type to RGBA, with the number of values it takes (without and
+# with the alpha value)
+COLOR_TYPES = {
+    'CIMRGBColor': (RGBA, (3, 4)),
+    'CIMHSVColor': (hsv_to_rgba, (3, 4)),
+    'CIMHSLColor': (hsl_to_rgba, (3, 4)),
+    'CIMCMYKColor': (cmyk_to_rgba, (4, 5)),
+    'CIMGrayColor': (gray_to_rgba, (1, 2)),
+}
+
+
+def to_rgba(color) -> RGBA:
+    """
+    Converts a CIM color to an RGBA instance, according to its type (a color without type is taken
+    as RGB). None is returned for the other color types (e.g. Lab or spot colors) and for invalid
+    values.
+    """
+    values = None if color is None else color.get('values', None)
+    if values is None:
+        return None
+
+    convert, n_values = COLOR_TYPES.get(color.get('type', 'CIMRGBColor'), (None, ()))
+    if len(values) not in n_values:
+        return None
+
+    return convert(*values)
+
+
+def ramp_color(ramp) -> RGBA:
+    """
+    Returns the first color of a color ramp (e.g. of a gradient fill), or None.
+    """
+    if ramp is None:
+        return None
+
+    if ramp.get('type', None) == 'CIMMultipartColorRamp':
+        parts = ramp.get('colorRamps', None)
+        return ramp_color(parts[0]) if parts else None
+
+    if 'fromColor' in ramp:
+        return to_rgba(ramp['fromColor'])
+
+    colors = ramp.get('colors', None)
+    return to_rgba(colors[0]) if colors else None
+
+
+# The color of every type of marker
+MARKER_COLORS = {
+    'CIMVectorMarker': accessor('markerGraphics', -1, 'symbol', 'symbolLayers', -1, 'color'),
+    'CIMCharacterMarker': accessor('symbol', 'symbolLayers', -1, 'color'),
+    'CIMPictureMarker': accessor('tintColor'),
+}
+
+# The color of the lines of a hatch fill
+LINE_COLOR = accessor('lineSymbol', 'symbolLayers', -1, 'color')
+
+# The color of every type of fill. For hatch fills, this is the color of the lines, and for
+# gradient fills the first color of the ramp.
+FILL_COLORS = {
+    'CIMSolidFill': lambda slyr: to_rgba(slyr.get('color', None)),
+    'CIMHatchFill': lambda slyr: to_rgba(LINE_COLOR(slyr)),
+    'CIMGradientFill': lambda slyr: ramp_color(slyr.get('colorRamp', None)),
+}
+
+
+def renderer_symbols(renderer) -> list:
+    """
+    Returns the symbols (e.g. CIMPointSymbol) of a renderer. A simple renderer has a single symbol.
+    For unique value and class breaks renderers, there is a symbol for every class, in the order of
+    the renderer, followed by the default symbol if any.
+    """
+    if renderer is None:
+        return []
+
+    renderer_type = renderer.get('type', None)
+    if renderer_type == 'CIMUniqueValueRenderer':
+        refs = [cls.get('symbol', None) for group in UNIQUE_VALUE_GROUPS(renderer) or []
+                for cls in CLASSES(group) or []]
+    elif renderer_type == 'CIMClassBreaksRenderer':
+        refs = [brk.get('symbol', None) for brk in BREAKS(renderer) or []]
+    else:
+        refs = [renderer.get('symbol', None)]
+
+    symbols = [SYMBOL(ref) for ref in refs]
+    if renderer_type in ('CIMUniqueValueRenderer', 'CIMClassBreaksRenderer'):
+        symbols.append(DEFAULT_SYMBOL(renderer))
+
+    return [symb for symb in symbols if symb is not None]
+
+
+def extract_labels(layer_json: dict) -> dict:
+    """
+    Returns a dictionary with some properties for the labels of a layer (see Layer.labels).
+    """
+    props = { 'shown': layer_json.get('labelVisibility', False), 'font': None }
+    if props['shown'] is False:
+        return props
+
+    lbl_cls = LABEL_CLASS(layer_json)
+    if lbl_cls is None:
+        return props
+
+    lbl_symb = TEXT_SYMBOL(lbl_cls)
+    if lbl_symb is not None:
+        props['font'] = {
+            'family': lbl_symb.get('fontFamilyName', None),
+            'style': lbl_symb.get('fontStyleName', None),
+            'size': lbl_symb.get('height', None)
+        }
+
+    props['expression'] = {
+        'value': lbl_cls.get('expression', None),
+        'engine': lbl_cls.get('expressionEngine', None)
+    }
+
+    return props
+
+
+def extract_symbol(symbol: dict, renderer_type: str = None) -> dict:
+    """
+    Returns a simplified version of a symbol (see Layer.symbol), or None if it has no symbol layer.
+    """
+    # Technically, there can be several overlapping symbols. We only extract the *last* one
+    # (the one which is rendered on top)
+    symb_lyrs = SYMBOL_LAYERS(symbol)
+    if not symb_lyrs:
+        return None
+
+    symb = symb_lyrs[-1]
+
+    # The fill color depends on the type of the marker
+    get_color = MARKER_COLORS.get(symb.get('type', None), None)
+
+    return {
+        'type': symb.get('type', None),
+        'enable': symb.get('enable', False),
+        'size': symb.get('size', 0),
+        'color': None if get_color is None else to_rgba(get_color(symb)),
+        'renderer': renderer_type
+    }
+
+
+def extract_style(symbol: dict) -> dict:
+    """
+    Returns the stroke and fill of a symbol (see Layer.style). If several symbol layers are enabled,
+    the last stroke and the last fill are kept. Their color is None if it cannot be converted to
+    RGBA.
+    """
+    stl = { 'fill': None, 'stroke': None }
+
+    for slyr in SYMBOL_LAYERS(symbol) or []:
+        if not slyr.get('enable', False):
+            continue
+
+        # A color which cannot be converted is None, the stroke or fill is kept anyway.
+        slyr_type = slyr.get('type', None)
+        if slyr_type == 'CIMSolidStroke':
+            stl['stroke'] = {
+                'width': slyr.get('width', None), 'color': to_rgba(slyr.get('color', None))
+            }
+
+        elif slyr_type in FILL_COLORS:
+            stl['fill'] = { 'type': slyr_type, 'color': FILL_COLORS[slyr_type](slyr) }
+
+    return stl
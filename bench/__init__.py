@@ -0,0 +1,3 @@
+"""
+Benchmarks of the correction scripts, on synthetic cohorts generated from the test fixtures.
+"""
@@ -0,0 +1,151 @@
+"""
+Benchmark of the correction on synthetic cohorts.
+
+For every cohort size, a cohort is generated (see bench.cohort) and the following phases are timed:
+- open: opening and closing every project with aprx.Project,
+- access: opening every project and accessing the maps, layouts, map frames, layers and their
+  labels, symbol, style and map view,
+- main: the full correction of the TP1 (console output discarded).
+
+The throughput (submissions per second) and the peak memory allocated by Python during the phase
+(measured with tracemalloc in a second run of the phase) are reported.
+
+Usage:
+
+python3 -m bench.benchmark [--sizes 100,1000,10000] [--jobs N] [--no-memory] [--output FILE]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+
+import aprx
+from geoscore.assignments import load_assignment
+from geoscore.correction import correct_submissions
+
+from .cohort import make_cohort
+
+
+def phase_open(paths: list) -> None:
+    """
+    Opens and closes every project.
+    """
+    for path in paths:
+        proj = aprx.Project(path)
+        proj.close()
+
+
+def phase_access(paths: list) -> None:
+    """
+    Opens every project and accesses all the properties used by the criteria.
+    """
+    for path in paths:
+        proj = aprx.Project(path)
+        for mp in proj.maps:
+            for lyr in mp.layers:
+                _ = lyr.name, lyr.labels, lyr.symbol, lyr.style
+        for layout in proj.layouts:
+            for mf in layout.map_frames:
+                _ = mf.map, mf.map_view
+        proj.close()
+
+
+def phase_main(tp_dir: str, jobs: int = 1) -> None:
+    """
+    Runs the full correction of the cohort.
+    """
+    with tempfile.TemporaryDirectory(prefix='bench_') as tmp_dir:
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            correct_submissions(
+                tp_dir, os.path.join(tmp_dir, 'results.tsv'), { 'tp1': load_assignment('tp1') },
+                jobs=jobs
+            )
+
+
+def measure(func, *args, memory: bool = True) -> dict:
+    """
+    Runs `func(*args)` and returns the wall time in seconds. If `memory` is True, the function is
+    run a second time with tracemalloc to get the peak of allocated memory (in bytes). Memory
+    allocated in worker processes is not included.
+    """
+    start = time.perf_counter()
+    func(*args)
+    result = { 'time': time.perf_counter() - start, 'peak_memory': None }
+
+    if memory:
+        tracemalloc.start()
+        func(*args)
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def run(sizes: list, jobs: int = 1, memory: bool = True, seed: int = 0) -> list:
+    """
+    Runs the benchmark for every cohort size, and returns a list of results.
+    """
+    results = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory(prefix='bench_cohort_') as tp_dir:
+            paths = make_cohort(n, tp_dir, seed=seed)
+
+            phases = (
+                ('open', phase_open, (paths,)),
+                ('access', phase_access, (paths,)),
+                ('main', phase_main, (tp_dir, jobs)),
+            )
+            for name, func, args in phases:
+                res = measure(func, *args, memory=memory)
+                res.update({ 'size': n, 'phase': name, 'throughput': n / res['time'] })
+                results.append(res)
+                print_result(res)
+
+    return results
+
+
+def print_result(res: dict) -> None:
+    """
+    Prints one result line to the console.
+    """
+    mem = '-' if res['peak_memory'] is None else f'{res["peak_memory"] / 2**20:.1f} MB'
+    print(
+        f'{res["size"]:>6}  {res["phase"]:<7} {res["time"]:9.3f} s  '
+        f'{res["throughput"]:10.1f} sub/s  peak {mem}'
+    )
+    sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        prog='python -m bench.benchmark',
+        description="Mesure les performances de la correction sur des volées synthétiques"
+    )
+    parser.add_argument(
+        '--sizes', default='100,1000,10000',
+        help="Tailles des volées, séparées par des virgules (défaut: 100,1000,10000)"
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1, metavar='N',
+        help="Nombre de processus pour la correction complète"
+    )
+    parser.add_argument(
+        '--no-memory', action='store_true', help="Ne mesure pas la mémoire (plus rapide)"
+    )
+    parser.add_argument('--seed', type=int, default=0, help="Graine du générateur aléatoire")
+    parser.add_argument('--output', metavar='FILE', help="Écrit les résultats en JSON")
+    args = parser.parse_args()
+
+    bench_results = run(
+        [int(s) for s in args.sizes.split(',')], jobs=args.jobs, memory=not args.no_memory,
+        seed=args.seed
+    )
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(bench_results, indent=2))
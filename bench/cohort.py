@@ -0,0 +1,186 @@
+"""
+Generator of synthetic cohorts of submissions, built from the fixtures in test/data/tp1.
+
+Every synthetic submission is a copy of one of the fixtures, with random mutations of the CIM
+documents: colors, symbol sizes and stroke widths, map frame cameras, layer order, additional maps
+and layouts, and large padding members. The generation is deterministic for a given seed.
+
+Usage:
+
+python3 -m bench.cohort [--seed S] [--padding KB] <n> <out_dir>
+"""
+
+import json
+import os
+import random
+from argparse import ArgumentParser
+from zipfile import ZipFile, ZIP_DEFLATED
+
+
+# The directory with the fixtures
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT_DIR, 'test', 'data', 'tp1')
+
+# The names of the synthetic students
+FIRST_NAMES = ('Amy', 'Bill', 'Claire', 'Dan', 'Emma', 'Fred', 'Greta', 'Harry', 'Ines', 'Jon')
+LAST_NAMES = ('Blacktree', 'Curlyleg', 'Dinosmell', 'Eastlake', 'Featherlight', 'Greatnose')
+
+
+def load_fixtures(fixtures_dir: str = FIXTURES_DIR) -> list:
+    """
+    Reads all fixture projects in memory. Every fixture is a list of (ZipInfo, bytes) tuples.
+    """
+    fixtures = []
+    for st_dir in sorted(os.listdir(fixtures_dir)):
+        aprx_path = os.path.join(fixtures_dir, st_dir, 'TP1.aprx')
+        if not os.path.isfile(aprx_path):
+            continue
+
+        with ZipFile(aprx_path, 'r') as zf:
+            fixtures.append([(info, zf.read(info)) for info in zf.infolist()])
+
+    return fixtures
+
+
+def walk(obj, func) -> None:
+    """
+    Calls `func` on every dictionary of a JSON document.
+    """
+    if isinstance(obj, dict):
+        func(obj)
+        for v in obj.values():
+            walk(v, func)
+    elif isinstance(obj, list):
+        for v in obj:
+            walk(v, func)
+
+
+def mutate_layer(rnd: random.Random, lyr: dict) -> None:
+    """
+    Changes randomly the colors, symbol sizes and stroke widths of a layer definition.
+    """
+    def mutate(obj):
+        if obj.get('type', None) == 'CIMRGBColor' and rnd.random() < 0.3:
+            obj['values'] = [rnd.randrange(256), rnd.randrange(256), rnd.randrange(256), 100]
+        if isinstance(obj.get('size', None), (int, float)) and rnd.random() < 0.3:
+            obj['size'] = rnd.choice((4, 6, 8, 12, 16))
+        if isinstance(obj.get('width', None), (int, float)) and rnd.random() < 0.3:
+            obj['width'] = rnd.choice((0.5, 1, 1.5, 2, 3))
+
+    walk(lyr, mutate)
+
+    if rnd.random() < 0.3:
+        lyr['transparency'] = rnd.choice((0, 30, 50))
+
+    if lyr.get('labelClasses', None) and rnd.random() < 0.3:
+        lyr['labelVisibility'] = not lyr.get('labelVisibility', False)
+
+
+def mutate_layout(rnd: random.Random, layout: dict) -> None:
+    """
+    Changes randomly the cameras of the map frames of a layout.
+    """
+    for elem in layout.get('elements', []):
+        if elem['type'] == 'CIMMapFrame' and rnd.random() < 0.5:
+            cam = elem['view']['camera']
+            cam['x'] += rnd.uniform(-5000, 5000)
+            cam['y'] += rnd.uniform(-5000, 5000)
+            cam['scale'] *= rnd.uniform(0.5, 2)
+
+
+def add_items(rnd: random.Random, members: dict, project: dict) -> None:
+    """
+    Adds copies of the maps and layouts of the project, as new project items and CIM documents.
+    """
+    items = project.get('projectItems', [])
+    for it in list(items):
+        if it['itemType'] not in ('Map', 'Layout') or rnd.random() < 0.5:
+            continue
+
+        cim_path = it['catalogPath'].split('=')[1]
+        copy_path = f'{os.path.splitext(cim_path)[0]}_copy{rnd.randrange(1000)}.json'
+        if copy_path in members or cim_path not in members:
+            continue
+
+        members[copy_path] = members[cim_path]
+        items.append({
+            **it,
+            'name': it['name'] + ' (copy)',
+            'catalogPath': f'CIMPATH={copy_path}',
+            'iD': f'{rnd.getrandbits(128):032x}'
+        })
+
+
+def make_submission(rnd: random.Random, fixture: list, out_path: str, padding: int = 0) -> None:
+    """
+    Writes a mutated copy of the fixture to `out_path`. With `padding` > 0, a member with `padding`
+    KB of incompressible data is added.
+    """
+    members = { info.filename: data for info, data in fixture }
+    docs = {}
+
+    def doc(name):
+        if name not in docs:
+            docs[name] = json.loads(members[name])
+        return docs[name]
+
+    for name in list(members):
+        if name.startswith('layers/') and name != 'layers/layers.json' and rnd.random() < 0.5:
+            mutate_layer(rnd, doc(name))
+        if name.startswith('layout/') and rnd.random() < 0.5:
+            mutate_layout(rnd, doc(name))
+
+    if 'layers/layers.json' in members and rnd.random() < 0.3:
+        rnd.shuffle(doc('layers/layers.json')['layers'])
+
+    if rnd.random() < 0.2:
+        add_items(rnd, members, doc('GISProject.json'))
+
+    for name, content in docs.items():
+        members[name] = json.dumps(content).encode('utf-8')
+
+    if padding > 0:
+        members['Metadata/padding.xml'] = rnd.randbytes(padding * 1024)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with ZipFile(out_path, 'w', ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+
+def make_cohort(n: int, out_dir: str, seed: int = 0, padding: int = 512) -> list:
+    """
+    Creates a cohort of `n` synthetic submissions in `out_dir`, with one subfolder per submission
+    named like in a Moodle export ("<Student>_<id>_assignsubmission_file_"). Every submission has
+    a probability of 10% to get a padding member of `padding` KB. Returns the paths of the files.
+    """
+    rnd = random.Random(seed)
+    fixtures = load_fixtures()
+
+    paths = []
+    for i in range(n):
+        student = f'{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {i:05d}'
+        out_path = os.path.join(out_dir, f'{student}_{i}_assignsubmission_file_', 'TP1.aprx')
+        make_submission(
+            rnd, rnd.choice(fixtures), out_path, padding=padding if rnd.random() < 0.1 else 0
+        )
+        paths.append(out_path)
+
+    return paths
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        prog='python -m bench.cohort',
+        description="Génère une volée de soumissions synthétiques à partir de test/data/tp1"
+    )
+    parser.add_argument('n', type=int, help="Nombre de soumissions")
+    parser.add_argument('out_dir', help="Dossier de destination")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du générateur aléatoire")
+    parser.add_argument(
+        '--padding', type=int, default=512, metavar='KB',
+        help="Taille des membres de remplissage ajoutés à 10%% des soumissions (en KB)"
+    )
+    args = parser.parse_args()
+
+    make_cohort(args.n, args.out_dir, seed=args.seed, padding=args.padding)
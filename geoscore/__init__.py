@@ -0,0 +1,7 @@
+"""
+geoscore contains the building blocks shared by the correction scripts of the Géomatique & SIG
+assignments (caching, ...). The assignments can be corrected with `python3 -m geoscore` (see
+geoscore.correction and geoscore.assignments).
+"""
+
+__version__ = '0.1.0'
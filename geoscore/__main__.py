@@ -0,0 +1,14 @@
+"""
+Correction of one or several assignments (see geoscore.correction for the options):
+
+python3 -m geoscore [--assignment NAME ...] [options] <tp_dir> <result_file>
+python3 -m geoscore --list
+"""
+
+import sys
+
+from .correction import main
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,95 @@
+"""
+Registry of the assignments (tp1, tp2, ...) and correction of several assignments at once.
+
+Every assignment has a rubric. The rubric files in geoscore/rubrics are assignments named after the
+file (e.g. "tp1" for tp1.json), and other assignments can be registered with the path to their
+rubric file, or with "<module>:<attribute>" for a rubric built by a Python module (a Rubric, or a
+function returning one):
+
+register_assignment('tp2', 'courses.tp2:build_rubric')
+
+The rubric of an assignment is only loaded (and its module only imported) when the assignment is
+selected. Several assignments can be corrected in a single pass over the submissions: every project
+file is opened and parsed once, and all rubrics are evaluated on the same project:
+
+rubrics = [load_assignment(name) for name in ('tp1', 'tp2')]
+results_tp1, results_tp2 = grade_submission(path, rubrics)
+"""
+
+import importlib
+import os
+
+from .rubric import RUBRICS_DIR, Rubric, load_rubric
+from .submissions import open_project
+
+
+# The extensions of the rubric files
+RUBRIC_EXTENSIONS = ('.json', '.toml')
+
+# The registered assignments, by name: the path to the rubric file or "<module>:<attribute>"
+ASSIGNMENTS = {}
+
+# The rubrics of the assignments loaded in this process, by name
+RUBRICS = {}
+
+
+def register_assignment(name: str, source: str) -> None:
+    """
+    Registers an assignment, with the path to its rubric file or "<module>:<attribute>". The
+    rubric is not loaded until the assignment is selected.
+    """
+    ASSIGNMENTS[name] = source
+    RUBRICS.pop(name, None)
+
+
+def assignments() -> dict:
+    """
+    Returns the source of the rubric of every assignment, by name: the rubric files in RUBRICS_DIR,
+    and the registered assignments. No rubric is loaded.
+    """
+    found = {
+        os.path.splitext(name)[0]: os.path.join(RUBRICS_DIR, name)
+        for name in sorted(os.listdir(RUBRICS_DIR))
+        if os.path.splitext(name)[1].lower() in RUBRIC_EXTENSIONS
+    }
+
+    return { **found, **ASSIGNMENTS }
+
+
+def load_assignment(name: str, reference_path: str = None) -> Rubric:
+    """
+    Returns the rubric of an assignment. It is loaded once per process, the first time the
+    assignment is selected. `reference_path` replaces the reference project of the rubric.
+    """
+    if reference_path is not None:
+        return Rubric(load_assignment(name).spec, reference_path)
+
+    if name in RUBRICS:
+        return RUBRICS[name]
+
+    source = assignments().get(name, None)
+    if source is None:
+        raise ValueError(f'Unknown assignment "{name}"')
+
+    module_name, sep, attr = source.partition(':')
+    if sep and not os.path.exists(source):
+        rubric = getattr(importlib.import_module(module_name), attr)
+        if not isinstance(rubric, Rubric):
+            rubric = rubric()
+    else:
+        rubric = load_rubric(source)
+
+    RUBRICS[name] = rubric
+    return rubric
+
+
+def grade_submission(aprx_path: str, rubrics: list, data=None, members: dict = None) -> list:
+    """
+    Evaluates several rubrics on a project file, which is opened and parsed only once. Returns the
+    list of Result of every rubric, in the order of `rubrics`.
+    """
+    proj = open_project(aprx_path, data=data, members=members)
+    results = [rubric.evaluate(proj) for rubric in rubrics]
+    proj.close()
+
+    return results
@@ -0,0 +1,124 @@
+"""
+Persistent cache of the correction results, used to avoid correcting unchanged submissions again.
+"""
+
+import hashlib
+import json
+import os
+from zipfile import ZipFile, BadZipFile
+
+from .submissions import export_info
+
+
+def fingerprint(path: str) -> str:
+    """
+    Returns a fingerprint of a submission file. It is based on the size and modification time of
+    the file, as well as on the CRCs in the central directory of the zip archive, which can be read
+    without decompressing anything. For a file in an export archive, it is based on the size and
+    CRC of the file.
+    """
+    # For a submission in an export archive, the CRC of the whole file is known from the central
+    # directory of the export archive.
+    info = export_info(path)
+    if info is not None:
+        return hashlib.sha1(
+            f'{info.file_size}:{info.CRC}:{info.date_time}'.encode('utf-8')
+        ).hexdigest()
+
+    st = os.stat(path)
+    h = hashlib.sha1(f'{st.st_size}:{st.st_mtime_ns}'.encode('utf-8'))
+
+    try:
+        with ZipFile(path, 'r') as zf:
+            for info in zf.infolist():
+                h.update(f'{info.filename}:{info.CRC}:{info.file_size}\n'.encode('utf-8'))
+    except BadZipFile:
+        # Not a zip archive, size and modification time are all we have.
+        pass
+
+    return h.hexdigest()
+
+
+def source_hash(*modules) -> str:
+    """
+    Returns a hash of the source code of the provided modules. For a package, all Python files in
+    the package directory are included. This is used as the version of a rubric: any change in the
+    correction code invalidates the cached results.
+    """
+    h = hashlib.sha1()
+    for mod in modules:
+        mod_file = os.path.abspath(mod.__file__)
+        if os.path.basename(mod_file) == '__init__.py':
+            pkg_dir = os.path.dirname(mod_file)
+            files = sorted(
+                os.path.join(pkg_dir, fn) for fn in os.listdir(pkg_dir) if fn.endswith('.py')
+            )
+        else:
+            files = [mod_file]
+
+        for fn in files:
+            with open(fn, 'rb') as f:
+                h.update(f.read())
+
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    A cache of correction results stored as a JSON sidecar file. Every entry is stored under the
+    path of the submission, together with its fingerprint. The whole cache is invalidated if the
+    rubric hash changes.
+
+    cache = ResultCache(cache_path, rubric_hash)
+    result = cache.get(aprx_path, fp)
+    cache.put(aprx_path, fp, result)
+    cache.save()
+    """
+    def __init__(self, path: str, rubric_hash: str):
+        self.path = path
+        self.rubric_hash = rubric_hash
+
+        # The entries read from the file, and those used or updated during this run. Only the
+        # latter are written back, so submissions which disappeared are dropped from the cache.
+        self.entries = {}
+        self.current = {}
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    content = json.loads(f.read())
+            except (OSError, ValueError):
+                content = {}
+
+            if content.get('rubric', None) == self.rubric_hash:
+                self.entries = content.get('entries', {})
+
+
+    def get(self, key: str, fp: str):
+        """
+        Returns the cached result for the submission `key` if its fingerprint is `fp`, or None.
+        """
+        entry = self.entries.get(key, None)
+        if entry is None or entry.get('fingerprint', None) != fp:
+            return None
+
+        self.current[key] = entry
+        return entry['result']
+
+
+    def put(self, key: str, fp: str, result) -> None:
+        """
+        Stores the result (anything which can be serialized to JSON) of the submission `key`.
+        """
+        self.current[key] = { 'fingerprint': fp, 'result': result }
+
+
+    def save(self) -> None:
+        """
+        Writes the cache to disk. The file is replaced atomically.
+        """
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({ 'rubric': self.rubric_hash, 'entries': self.current }))
+
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,635 @@
+"""
+The kinds of checks which can be used in a rubric.
+
+Every kind is a Criterion built from its specification in the rubric. The reference values are
+compiled once in the constructor, and the same checker is then applied to every submission.
+
+The messages are recorded as Message instances with a code "<kind>.<case>", and only rendered when
+needed (see geoscore.messages).
+
+Some checks can take their reference values from the reference project of the rubric instead of the
+specification. They then use the differences between the submission and the reference project,
+received in `visit_diff` (see aprx.diff).
+"""
+
+import aprx
+from aprx.query import compile_accessor, parse_keys
+
+from .engine import Criterion
+from .messages import Message
+
+
+# The registry of the check kinds, by name.
+CHECKS = {}
+
+
+def register(kind: str):
+    """
+    Class decorator registering a Criterion subclass as check kind `kind`.
+    """
+    def decorator(cls):
+        CHECKS[kind] = cls
+        cls.kind = kind
+        return cls
+
+    return decorator
+
+
+def create_check(spec: dict) -> Criterion:
+    """
+    Creates the checker for the given criterion specification.
+    """
+    kind = spec.get('kind', None)
+    if kind not in CHECKS:
+        raise ValueError(f'Unknown check kind "{kind}" for criterion "{spec.get("id", None)}"')
+
+    return CHECKS[kind](spec)
+
+
+def to_rgba(values) -> aprx.RGBA:
+    """
+    Converts a list of [r, g, b, a] values to a RGBA color.
+    """
+    return aprx.RGBA(*values)
+
+
+class Check(Criterion):
+    """
+    Base class for the check kinds. It keeps the specification and the points of the criterion.
+    """
+    # The default points, overridden by the "points" of the specification.
+    points = {}
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.id = spec.get('id', None)
+        self.title = spec.get('title', self.title)
+        self.points = { **self.points, **spec.get('points', {}) }
+        super().__init__()
+
+
+    def reset(self):
+        super().reset()
+        self.diff = None
+
+
+    def visit_diff(self, diff):
+        self.diff = diff
+
+
+    def require_diff(self):
+        """
+        Returns the differences to the reference project, needed by the checks without reference
+        values in the specification.
+        """
+        if self.diff is None:
+            raise ValueError(
+                f'Criterion "{self.id}" needs a reference value or a reference project'
+            )
+
+        return self.diff
+
+
+@register('map_import')
+class MapImport(Check):
+    """
+    Verifies if the map has been imported. A map is imported if its name starts with `name_prefix`
+    and it contains at least `min_layers` of the layers in `layer_ids`.
+    """
+    points = { 'one': 1.0, 'several': 0.5 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.name_prefix = spec.get('name_prefix', '')
+        self.layer_ids = frozenset(spec.get('layer_ids', []))
+        self.min_layers = spec.get('min_layers', len(self.layer_ids))
+
+
+    def is_imported_map(self, mp: aprx.Map) -> bool:
+        """
+        Returns True if the provided map seems to be imported.
+        """
+        if not mp.name.startswith(self.name_prefix):
+            return False
+
+        n_corresponding_layers = 0
+        for lyr in mp.layers:
+            if lyr.id in self.layer_ids:
+                n_corresponding_layers += 1
+
+        return n_corresponding_layers >= self.min_layers
+
+
+    def visit_project(self, project):
+        maps = project.maps
+
+        if len(maps) == 0:
+            self.score(0.0, Message(
+                'map_import.no_map', '  {RED}{BOLD}✘ No map found at all (!!!){END}'
+            ))
+            return
+
+        # Find the candidate maps
+        layer_maps = [m for m in maps if self.is_imported_map(m)]
+        if len(layer_maps) == 0:
+            self.score(0.0, Message(
+                'map_import.none', '  {RED}{BOLD}✘ No imported map found.{END}'
+            ))
+            return
+
+        layer_maps_str = '", "'.join([l.name for l in layer_maps])
+
+        if len(layer_maps) > 1:
+            self.score(self.points['several'], Message(
+                'map_import.several', '  {MAGENTA}! {n} imported map found: "{maps}"{END}',
+                n=len(layer_maps), maps=layer_maps_str
+            ))
+            return
+
+        self.score(self.points['one'], Message(
+            'map_import.one', '  {GREEN}✔ One imported map found: "{maps}"{END}',
+            maps=layer_maps_str
+        ))
+
+
+    def result(self):
+        return self.best(
+            Message('map_import.no_map', '  {RED}{BOLD}✘ No map found at all (!!!){END}')
+        )
+
+
+@register('layout_count')
+class LayoutCount(Check):
+    """
+    Verifies if there is exactly one layout in the project.
+    """
+    points = { 'one': 1.0, 'several': 0.5 }
+
+    def visit_project(self, project):
+        layouts = project.layouts
+
+        if len(layouts) == 0:
+            self.score(0.0, Message(
+                'layout_count.none', '  {RED}{BOLD}✘ No layout found at all (!!!){END}'
+            ))
+            return
+
+        layout_names = '", "'.join([l.name for l in layouts])
+
+        if len(layouts) > 1:
+            self.score(self.points['several'], Message(
+                'layout_count.several', '  {MAGENTA}! {n} layouts found: "{names}"{END}',
+                n=len(layouts), names=layout_names
+            ))
+            return
+
+        # There is extacly one layout.
+        self.score(self.points['one'], Message(
+            'layout_count.one', '  {GREEN}✔ One layout found: "{names}"{END}', names=layout_names
+        ), layouts[0])
+
+
+    def result(self):
+        return self.best(
+            Message('layout_count.none', '  {RED}{BOLD}✘ No layout found at all (!!!){END}')
+        )
+
+
+@register('map_view_changed')
+class MapViewChanged(Check):
+    """
+    Checks if the map view extent of the first map frame of a layout differs from the `reference`
+    camera (x, y and scale), given the `tolerance`.
+    """
+    points = { 'changed': 1.0, 'several_frames': 0.5 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.reference = aprx.MapView({ 'camera': {
+            'viewportHeight': -1, 'viewportWidth': -1, **spec['reference']
+        }})
+        self.tolerance = spec.get('tolerance', {})
+
+
+    def visit_layout(self, layout):
+        map_frames = layout.map_frames
+        layout_msg = []
+
+        if len(map_frames) == 0:
+            self.score(0.0, Message(
+                'map_view_changed.no_frame',
+                '  {RED}{BOLD}✘ No map frame found in layout "{layout}"{END}',
+                layout=layout.name
+            ), layout)
+            return
+
+        if len(map_frames) > 1:
+            layout_msg.append(Message(
+                'map_view_changed.several_frames',
+                '  {MAGENTA}! Several map frames found in layout "{layout}"{END}',
+                layout=layout.name
+            ))
+
+        # Take the first map frame by default and get its map extent (the MapView)
+        view = map_frames[0].map_view
+
+        mv_change = not view.is_equal(self.reference, tolerance=self.tolerance)
+        if mv_change:
+            layout_msg.append(Message(
+                'map_view_changed.changed',
+                '  {GREEN}✔ Map extent has been changed (in at least one layout)"{END}'
+            ))
+            layout_pts = \
+                self.points['several_frames'] if len(map_frames) > 1 else self.points['changed']
+        else:
+            layout_msg.append(Message(
+                'map_view_changed.not_changed', '  {RED}{BOLD}✘ Map extent did not change{END}'
+            ))
+            layout_pts = 0.0
+
+        self.score(layout_pts, Message.join(layout_msg), layout, map_frames[0])
+
+
+    def result(self):
+        return self.best(Message(
+            'map_view_changed.no_layout',
+            '  {RED}{BOLD}✘ No layout found, map extent did not change{END}'
+        ))
+
+
+@register('labels_shown')
+class LabelsShown(Check):
+    """
+    Checks if there is a `layer` with labels on the field `expression` in one of the layouts.
+    """
+    points = { 'shown': 1.0 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.layer = spec['layer']
+        self.expression = spec['expression']
+        self.layer_names = (self.layer,)
+
+
+    def reset(self):
+        super().reset()
+        self.ok = False
+
+
+    def visit_layer(self, layout, map_frame, layer):
+        lbls = layer.labels
+        if lbls['shown'] and lbls['expression']['value'] == self.expression:
+            if not self.ok:
+                self.chosen = (layout, map_frame)
+            self.ok = True
+
+
+    def result(self):
+        if self.ok:
+            return self.points['shown'], Message(
+                'labels_shown.shown', '  {GREEN}✔ Labels for layer "{layer}" are shown{END}',
+                layer=self.layer
+            )
+
+        return 0.0, Message(
+            'labels_shown.not_shown',
+            '  {RED}{BOLD}✘ No labels found for all layers "{layer}"{END}', layer=self.layer
+        )
+
+
+@register('label_size_smaller')
+class LabelSizeSmaller(Check):
+    """
+    Checks if there is a `layer` with labels on the field `expression`, and for which the font size
+    is smaller than for the labels of the `than` layer (with labels on the field `than_expression`).
+    Comparison is done map frame by map frame.
+    """
+    points = { 'smaller': 1.0, 'not_smaller': 0.5, 'only_layer': 0.5 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.layer = spec['layer']
+        self.expression = spec['expression']
+        self.than = spec['than']
+        self.than_expression = spec['than_expression']
+        self.layer_names = (self.than, self.layer)
+
+
+    def start_frame(self, layout, map_frame):
+        # Set a default value for the font size of 0.
+        self.fsize = { self.than: 0, self.layer: 0 }
+
+
+    def visit_layer(self, layout, map_frame, layer):
+        expression = self.expression if layer.name == self.layer else self.than_expression
+        lbls = layer.labels
+        if lbls['shown'] and lbls['expression']['value'] == expression:
+            self.fsize[layer.name] = lbls['font']['size']
+
+
+    def end_frame(self, layout, map_frame):
+        # Compute the points we should give this map frame
+        lyr, than = self.layer, self.than
+        fsize_lyr, fsize_than = self.fsize[lyr], self.fsize[than]
+
+        if fsize_than > 0 and fsize_lyr > 0 and fsize_lyr < fsize_than:
+            frame_pts, msg = self.points['smaller'], Message(
+                'label_size_smaller.smaller',
+                '  {GREEN}✔ Labels for "{than}" and "{lyr}" shown, '
+                '"{lyr}" smaller than "{than}".{END}',
+                lyr=lyr, than=than
+            )
+        elif fsize_than > 0 and fsize_lyr > 0:
+            # Labels for both layers shown, but the label for the layer is not smaller
+            frame_pts, msg = self.points['not_smaller'], Message(
+                'label_size_smaller.not_smaller',
+                '  {MAGENTA}! Labels for "{than}" and "{lyr}" shown, '
+                'but "{lyr}" not smaller than "{than}".{END}',
+                lyr=lyr, than=than
+            )
+        elif fsize_lyr > 0:
+            frame_pts, msg = self.points['only_layer'], Message(
+                'label_size_smaller.only_layer',
+                '  {MAGENTA}! Labels for "{lyr}" shown, but not for the "{than}".{END}',
+                lyr=lyr, than=than
+            )
+        else:
+            frame_pts, msg = 0.0, Message(
+                'label_size_smaller.not_shown', '  {BOLD}{RED}✘ Labels for "{lyr}" not shown.{END}',
+                lyr=lyr
+            )
+
+        self.score(frame_pts, msg, layout, map_frame)
+
+
+    def result(self):
+        return self.best(Message(
+            'label_size_smaller.not_found', '  {BOLD}{RED}✘ Labels for "{lyr}" not found.{END}',
+            lyr=self.layer
+        ))
+
+
+@register('symbol_changed')
+class SymbolChanged(Check):
+    """
+    Checks if there is a `layer` where the symbol size and color differ from the `references`.
+    The reference size and color depend on the type of the symbol. A symbol of another type counts
+    as changed.
+    """
+    points = { 'size': 0.5, 'color': 0.5 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.layer = spec['layer']
+        self.layer_names = (self.layer,)
+        self.references = {
+            symb_type: (ref.get('size', None), to_rgba(ref['color']) if 'color' in ref else None)
+            for symb_type, ref in spec.get('references', {}).items()
+        }
+
+
+    def visit_layer(self, layout, map_frame, layer):
+        lyr_pts, lyr_msg = [], []
+
+        symb = layer.symbol
+        if symb is None:
+            self.score(0.0, Message(
+                'symbol_changed.no_symbol',
+                '  {BOLD}{RED}✘ No symbol for layer "{layer}" found{END}', layer=self.layer
+            ), layout, map_frame)
+            return
+
+        ref_size, ref_col = self.references.get(symb['type'], (None, None))
+
+        if symb['size'] == ref_size:
+            lyr_pts.append(0.0)
+            lyr_msg.append(Message(
+                'symbol_changed.size_not_changed', '  {BOLD}{RED}✘ Symbol size not changed{END}'
+            ))
+        else:
+            lyr_pts.append(self.points['size'])
+            lyr_msg.append(Message(
+                'symbol_changed.size_changed', '  {GREEN}✔ Symbol size changed{END}'
+            ))
+
+        if ref_col is not None and symb['color'] is not None and ref_col.is_equal(symb['color']):
+            lyr_pts.append(0.0)
+            lyr_msg.append(Message(
+                'symbol_changed.color_not_changed', '  {BOLD}{RED}✘ Symbol color not changed{END}'
+            ))
+        else:
+            lyr_pts.append(self.points['color'])
+            lyr_msg.append(Message(
+                'symbol_changed.color_changed', '  {GREEN}✔ Symbol color changed{END}'
+            ))
+
+        self.score(sum(lyr_pts), Message.join(lyr_msg), layout, map_frame)
+
+
+    def result(self):
+        return self.best(Message(
+            'symbol_changed.no_layer', '  {BOLD}{RED}✘ No candidate layer found{END}'
+        ))
+
+
+@register('style_changed')
+class StyleChanged(Check):
+    """
+    Checks if there is a `layer` where some properties of the stroke or fill style differ from the
+    reference values. Every entry of `properties` names a `part` (stroke or fill), an `attribute`
+    (width or color), the `reference` value and the `points` given if the value changed.
+    If `require` names a part and this part is missing, the layer gets no points. Otherwise, a
+    missing part counts as changed.
+    """
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.layer = spec['layer']
+        self.layer_names = (self.layer,)
+        self.require = spec.get('require', None)
+
+        self.properties = []
+        for prop in spec['properties']:
+            ref = prop['reference']
+            if prop['attribute'] == 'color':
+                ref = to_rgba(ref)
+            label = f'{prop["part"].capitalize()} {prop["attribute"]}'
+            self.properties.append((prop['part'], prop['attribute'], ref, prop['points'], label))
+
+
+    def visit_layer(self, layout, map_frame, layer):
+        lyr_pts, lyr_msg = [], []
+
+        stl = layer.style
+        if stl is None:
+            self.score(0.0, Message(
+                'style_changed.no_style', '  {BOLD}{RED}✘ No style for layer "{layer}" found{END}',
+                layer=self.layer
+            ), layout, map_frame)
+            return
+
+        if self.require is not None and stl[self.require] is None:
+            self.score(0.0, Message(
+                'style_changed.missing_part', '  {BOLD}{RED}✘ No {part} style found{END}',
+                part=self.require
+            ), layout, map_frame)
+            return
+
+        for part, attribute, ref, points, label in self.properties:
+            if stl[part] is None:
+                changed = True
+            elif attribute == 'color':
+                # A color which cannot be converted to RGBA differs from the reference.
+                color = stl[part]['color']
+                changed = color is None or not ref.is_equal(color)
+            else:
+                changed = stl[part][attribute] != ref
+
+            if changed:
+                lyr_pts.append(points)
+                lyr_msg.append(Message(
+                    'style_changed.changed', '  {GREEN}✔ {label} changed{END}', label=label
+                ))
+            else:
+                lyr_pts.append(0.0)
+                lyr_msg.append(Message(
+                    'style_changed.not_changed', '  {BOLD}{RED}✘ {label} not changed{END}',
+                    label=label
+                ))
+
+        self.score(sum(lyr_pts), Message.join(lyr_msg), layout, map_frame)
+
+
+    def result(self):
+        return self.best(Message(
+            'style_changed.no_layer', '  {BOLD}{RED}✘ No candidate layer found{END}'
+        ))
+
+
+@register('property_changed')
+class PropertyChanged(Check):
+    """
+    Checks if there is a `layer` where the value of the CIM `property` differs from `reference`.
+    The property can also be a path in the JSON of the layer (see aprx.query), e.g.
+    "labelClasses[0].textSymbol.symbol.height". Layers without the property are ignored.
+    Without `reference`, the value is compared with the same layer in the reference project.
+    """
+    points = { 'changed': 1.0 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.layer = spec['layer']
+        self.layer_names = (self.layer,)
+        self.property = spec['property']
+        self.get_property = compile_accessor(self.property)
+        self.keys = tuple(parse_keys(self.property))
+        self.reference = spec.get('reference', None)
+        self.label = spec.get('label', self.property.capitalize())
+
+
+    def visit_layer(self, layout, map_frame, layer):
+        value = self.get_property(layer.json)
+
+        if value is None:
+            return
+
+        if self.reference is None:
+            changed = self.require_diff().changed(layer.path, self.keys)
+        else:
+            changed = value != self.reference
+
+        if changed:
+            self.score(self.points['changed'], Message(
+                'property_changed.changed', '  {GREEN}✔ {label} changed{END}', label=self.label
+            ), layout, map_frame)
+        else:
+            self.score(0.0, Message(
+                'property_changed.not_changed', '  {BOLD}{RED}✘ {label} not changed{END}',
+                label=self.label
+            ), layout, map_frame)
+
+
+    def result(self):
+        return self.best(Message(
+            'property_changed.no_layer', '  {BOLD}{RED}✘ No candidate layer found{END}'
+        ))
+
+
+@register('layer_order_changed')
+class LayerOrderChanged(Check):
+    """
+    Checks if the order of the layers differs from the `reference` order in one of the layouts.
+    Without `reference`, the order is compared with the same map in the reference project.
+    """
+    points = { 'changed': 1.0 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.reference = list(spec['reference']) if 'reference' in spec else None
+
+
+    def reset(self):
+        super().reset()
+        self.changed = False
+
+
+    def start_frame(self, layout, map_frame):
+        if map_frame.map is None:
+            return
+
+        if self.reference is None:
+            changed = self.require_diff().changed(map_frame.map.cim_path, ('layers',))
+        else:
+            changed = map_frame.map.layer_refs != self.reference
+
+        if changed:
+            if not self.changed:
+                self.chosen = (layout, map_frame)
+            self.changed = True
+
+
+    def result(self):
+        if self.changed:
+            return self.points['changed'], Message(
+                'layer_order_changed.changed', '  {GREEN}✔ Order of layers changed{END}'
+            )
+
+        return 0.0, Message(
+            'layer_order_changed.not_changed', '  {BOLD}{RED}✘ Order of layers has not changed{END}'
+        )
+
+
+@register('reference_changed')
+class ReferenceChanged(Check):
+    """
+    Checks if there is a `layer` where one of the JSON `paths` (e.g. "renderer" or
+    "labelClasses[0].textSymbol", see aprx.query) differs from the same layer in the reference
+    project. The rubric needs a reference project.
+    """
+    points = { 'changed': 1.0 }
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.layer = spec['layer']
+        self.layer_names = (self.layer,)
+        self.paths = [(path, tuple(parse_keys(path))) for path in spec['paths']]
+        self.label = spec.get('label', ', '.join(path for path, _keys in self.paths))
+
+
+    def visit_layer(self, layout, map_frame, layer):
+        diff = self.require_diff()
+
+        if any(diff.changed(layer.path, keys) for _path, keys in self.paths):
+            self.score(self.points['changed'], Message(
+                'reference_changed.changed', '  {GREEN}✔ {label} changed{END}', label=self.label
+            ), layout, map_frame)
+        else:
+            self.score(0.0, Message(
+                'reference_changed.not_changed', '  {BOLD}{RED}✘ {label} not changed{END}',
+                label=self.label
+            ), layout, map_frame)
+
+
+    def result(self):
+        return self.best(Message(
+            'reference_changed.no_layer', '  {BOLD}{RED}✘ No candidate layer found{END}'
+        ))
@@ -0,0 +1,12 @@
+"""
+Formatting constants for printing to the console.
+"""
+
+# Some formatting constants for printing to the console
+BLACK = '\033[30m'
+RED = '\033[31m'
+GREEN = '\033[32m'
+BLUE = '\033[34m'
+MAGENTA = '\033[35m'
+BOLD = '\033[1m'
+END = '\033[0m'
@@ -0,0 +1,542 @@
+"""
+Correction of the submissions of one or several assignments, and the command line interface.
+
+Usage:
+
+python3 -m geoscore [--assignment NAME ...] [--jobs N] [--cache] [--rubric FILE] [--vectorized]
+                    [--profile] [--prefetch K [--prefetch-mem MB] [--prefetch-decompress]]
+                    [--quiet] [--jsonl] [--feedback DIR] [--watch [SECONDS]]
+                    [--reference FILE] <tp_dir> <result_file>
+python3 -m geoscore --list
+
+where `<tp_dir>` is the path to the directory with all student submissions (or to the zip archive
+of a bulk download from Moodle, read without extracting it), and `<result_file>` the TSV file
+where the points are written. A submission is a .aprx project file, or a .ppkx project package (of
+which only the project file is read). The assignments are selected with `--assignment` (tp1 by
+default, see geoscore.assignments). The scripts of the assignments (e.g. tp1.py) run the same
+interface for their assignment.
+
+All selected assignments are corrected in a single pass over the submissions: every project file
+is opened once, and the rubrics of all assignments are evaluated on it. With a single assignment,
+the points are written to `<result_file>`. With several assignments, they are written to one TSV
+file per assignment, named after the result file (e.g. results.tp1.tsv, results.tp2.tsv), and the
+same goes for the cache files, the JSON Lines files and the feedback directories.
+
+With `--jobs N`, the submissions are corrected in parallel by N processes. With `--cache`, the
+results are kept in a sidecar file next to the result file, and only new or modified submissions
+are corrected on the next run.
+
+Another rubric file can be used with `--rubric`, and the reference project of the rubric (the
+project given to the students, compared with every submission) can be replaced with `--reference`,
+for a single assignment. With `--vectorized`, the criteria are evaluated over the whole cohort at
+once with NumPy, and only the points are printed.
+
+With `--profile`, the wall time of every submission and the time spent in each phase (unzip, JSON
+parsing, layers, criteria) are measured, and written to `<result_file>.profile.json` and
+`<result_file>.profile.tsv` (without the extension of the result file), with a summary of the
+cohort.
+
+With `--prefetch K`, the next K submission files are read in background threads while the current
+one is corrected (for serial corrections only). The files read ahead take at most `--prefetch-mem`
+MB, and with `--prefetch-decompress` their CIM documents are decompressed ahead of time as well.
+
+The results are printed on the console (only the totals with `--quiet`) and written to the TSV
+file. With `--jsonl`, the points, message codes and messages of every criterion are also written to
+`<result_file>.jsonl` (without the extension of the result file), and with `--feedback DIR`, a
+plain text report is written for every student in DIR.
+
+With `--watch`, the process keeps running (e.g. until the deadline, stopped with Ctrl+C): the
+directory of the submissions is checked every few seconds, only the new or modified submissions
+are corrected, and the TSV file is updated.
+"""
+
+import os
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import aprx
+import geoscore
+from aprx import stats
+
+from .assignments import assignments, grade_submission, load_assignment
+from .cache import ResultCache, fingerprint, source_hash
+from .console import BOLD, END, RED
+from .prefetch import Prefetcher
+from .profile import ProfileReport
+from .rubric import Result, load_rubric
+from .sinks import ConsoleSink, FeedbackSink, JsonLinesSink, Submission, TsvSink
+from .submissions import find_submissions
+from .watch import SubmissionWatcher
+
+
+def output_path(path: str, name: str, several: bool) -> str:
+    """
+    Returns the path of an output for the assignment `name`: `path` itself for a single
+    assignment, otherwise `path` with the name of the assignment before the extension.
+    """
+    if not several:
+        return path
+
+    base, ext = os.path.splitext(path)
+    return f'{base}.{name}{ext}'
+
+
+def open_caches(result_file: str, rubrics: dict) -> list:
+    """
+    Returns the result cache of every assignment, kept next to the result file. The cache of an
+    assignment is invalidated as a whole when its rubric or the correction code changes.
+    """
+    several = len(rubrics) > 1
+    code_hash = source_hash(aprx, geoscore)
+    return [
+        ResultCache(
+            output_path(os.path.splitext(result_file)[0] + '.cache.json', name, several),
+            rubric.hash + code_hash
+        )
+        for name, rubric in rubrics.items()
+    ]
+
+
+def correct_submission(
+    aprx_path: str, rubrics: dict, profile: bool = False, data=None, members: dict = None
+) -> tuple:
+    """
+    Evaluates the rubrics of the assignments (by name) on an individual APRX file, which is opened
+    once. The content of the file (and the decompressed members) can be provided if it has been
+    read ahead of time. Returns the results of every rubric (the messages are not rendered) and
+    the profile of the correction (see aprx.stats.snapshot, with the wall time in "wall"), or None
+    without `profile`.
+    """
+    if profile:
+        stats.enable()
+        for name, rubric in rubrics.items():
+            rubric.engine.profile(f'{name}/' if len(rubrics) > 1 else '')
+        stats.reset()
+
+    start = time.perf_counter()
+    results = grade_submission(aprx_path, list(rubrics.values()), data=data, members=members)
+
+    if not profile:
+        return results, None
+
+    return results, { 'wall': time.perf_counter() - start, **stats.snapshot() }
+
+
+def try_correct_submission(aprx_path: str, rubrics: dict) -> tuple:
+    """
+    Corrects an individual APRX file like `correct_submission`, without profile. Returns the
+    results and None, or None and the error if the file cannot be corrected (e.g. a file which is
+    still being uploaded).
+    """
+    try:
+        return correct_submission(aprx_path, rubrics)[0], None
+    except Exception as err:
+        # A partial file can fail in the zip, zlib or JSON decoders, or later in the criteria.
+        return None, err
+
+
+def correct_cohort(aprx_paths: list, rubric, map_func=map):
+    """
+    Corrects all APRX files at once: the features of the projects are extracted into a table (with
+    `map_func`, e.g. the map of a process pool), and the rubric is evaluated over this table with
+    NumPy. Returns an iterator over the results of every submission. Only the points are computed
+    in this mode, the results have no message.
+    """
+    # NumPy is only needed in this mode, so the module is only imported here.
+    from .features import FeatureTable, evaluate, extract_features, rubric_properties
+
+    properties = rubric_properties(rubric)
+    table = FeatureTable(properties)
+    for sub_table in map_func(partial(extract_features, properties=properties), aprx_paths):
+        table.extend(sub_table)
+
+    for pts in evaluate(rubric, table).tolist():
+        yield rubric.points_only(pts)
+
+
+def correct_submissions(
+    tp_dir: str, result_file: str, rubrics: dict, jobs: int = 1, use_cache: bool = False,
+    vectorized: bool = False, profile: bool = False, prefetch: int = 0, prefetch_mem: int = 256,
+    prefetch_decompress: bool = False, quiet: bool = False, jsonl: bool = False,
+    feedback_dir: str = None
+):
+    """
+    Evaluates the ArcGIS project files in `tp_dir` with the rubrics of the assignments in
+    `rubrics` (by name). The directory needs to have a subfolder for each submission, and inside
+    the subfolder a .aprx file. Every project file is opened once for all assignments.
+    With `jobs` > 1, the submissions are corrected in a pool of processes. The console output of
+    each submission is printed as a whole block, and the results are written in the same order as
+    for a serial correction.
+    With `use_cache`, the results of unchanged submissions are taken from the cache files next to
+    the result file.
+    With `vectorized`, the features of all submissions are extracted first, and every rubric is
+    then evaluated over the whole cohort at once (see `correct_cohort`). The cache is not used.
+    With `profile`, every correction is profiled and the report is written next to the result
+    file. The submissions taken from the cache are not profiled.
+    With `prefetch` > 0, a serial correction reads the next `prefetch` files ahead of time, using
+    at most `prefetch_mem` MB (see geoscore.prefetch).
+    The results are sent to the console (only the totals with `quiet`) and to the TSV file of
+    every assignment (see `output_path`), as well as to a JSON Lines file next to the result file
+    with `jsonl`, and to one feedback file per student in `feedback_dir` (see geoscore.sinks).
+    """
+    names = list(rubrics)
+    several = len(names) > 1
+
+    print('--- START CORRECTIONS ---\n')
+
+    # Find the .aprx file of every student submission (one per subdirectory), in alphabetical
+    # order. The errors to print before the correction are kept with the submission.
+    submissions = find_submissions(tp_dir)
+    print(f'Number of subdirectories found: {len(submissions)}\n')
+
+    # Take the results of the unchanged submissions from the caches. A submission is corrected
+    # again if it is missing from the cache of any assignment.
+    caches, cached, fingerprints = [], {}, {}
+    if use_cache and not vectorized:
+        caches = open_caches(result_file, rubrics)
+        for _st, _errors, path in submissions:
+            if path is not None:
+                fingerprints[path] = fingerprint(path)
+                results = [cache.get(path, fingerprints[path]) for cache in caches]
+                if all(res is not None for res in results):
+                    cached[path] = [[Result.from_json(r) for r in res] for res in results]
+
+    # The outputs of the results of every assignment. The console is shared.
+    console = ConsoleSink(quiet=quiet)
+    sinks = []
+    for name, rubric in rubrics.items():
+        assignment_sinks = [TsvSink(output_path(result_file, name, several), rubric.ids)]
+        if jsonl:
+            assignment_sinks.append(JsonLinesSink(
+                output_path(os.path.splitext(result_file)[0] + '.jsonl', name, several)
+            ))
+        if feedback_dir is not None:
+            assignment_sinks.append(FeedbackSink(
+                os.path.join(feedback_dir, name) if several else feedback_dir
+            ))
+        sinks.append(assignment_sinks)
+
+    # Correct the submissions, either one after the other or in a pool of processes. In both cases,
+    # the results come back in the order of the submissions.
+    aprx_paths = [
+        path for _st, _errors, path in submissions if path is not None and path not in cached
+    ]
+    executor = None
+    if jobs > 1 and len(aprx_paths) > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    map_func = map if executor is None else executor.map
+
+    report = ProfileReport() if profile else None
+    if vectorized:
+        graded = (
+            (list(results), None) for results in zip(*(
+                correct_cohort(aprx_paths, rubric, map_func) for rubric in rubrics.values()
+            ))
+        )
+    elif executor is None and prefetch > 0:
+        prefetcher = Prefetcher(
+            aprx_paths, depth=prefetch, max_bytes=prefetch_mem * 1024 * 1024,
+            decompress=prefetch_decompress
+        )
+        graded = (
+            correct_submission(path, rubrics, profile=profile, data=data, members=members)
+            for path, data, members in prefetcher
+        )
+    else:
+        graded = map_func(partial(correct_submission, rubrics=rubrics, profile=profile), aprx_paths)
+
+    for st, errors, path in submissions:
+        all_results = [[] for _name in names]
+        if path in cached:
+            all_results = cached[path]
+        elif path is not None:
+            all_results, prof = next(graded)
+            if prof is not None:
+                report.add(st, path, prof['wall'], prof)
+            for cache, results in zip(caches, all_results):
+                cache.put(path, fingerprints[path], [res.to_json() for res in results])
+
+        for name, results, assignment_sinks in zip(names, all_results, sinks):
+            sub = Submission(st, path, errors, results, cached=path in cached)
+            console.write(sub._replace(student=f'{st} ({name})') if several else sub)
+            for sink in assignment_sinks:
+                sink.write(sub)
+
+    if executor is not None:
+        executor.shutdown()
+
+    for cache in caches:
+        cache.save()
+
+    console.close()
+    for assignment_sinks in sinks:
+        for sink in assignment_sinks:
+            sink.close()
+
+    if report is not None:
+        report.write(os.path.splitext(result_file)[0])
+        report.print_summary()
+
+
+def watch_submissions(
+    tp_dir: str, result_file: str, rubrics: dict, jobs: int = 1, use_cache: bool = False,
+    quiet: bool = False, interval: float = 5.0, rounds: int = None
+):
+    """
+    Corrects the submissions in `tp_dir` as they arrive, with the rubrics of the assignments in
+    `rubrics` (by name). The directory is polled every `interval` seconds (see geoscore.watch), and
+    only the new or modified submissions are corrected. Their results are printed on the console,
+    and the TSV file of every assignment is written again with the results of all submissions. A
+    submission which cannot be corrected (e.g. a file still being uploaded) is reported, left out
+    of the TSV files and corrected again on the next poll. The loop runs until it is interrupted
+    (Ctrl+C), or for `rounds` polls.
+    With `jobs` > 1, the submissions are corrected in a pool of processes kept for all polls. With
+    `use_cache`, the results of the submissions unchanged since the last run are taken from the
+    cache files next to the result file.
+    """
+    if not os.path.isdir(tp_dir):
+        raise NotADirectoryError(f'Only a directory of submissions can be watched: "{tp_dir}"')
+
+    names = list(rubrics)
+    several = len(names) > 1
+    watcher = SubmissionWatcher(tp_dir)
+    caches = open_caches(result_file, rubrics) if use_cache else []
+
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    map_func = map if executor is None else executor.map
+
+    print(f'--- WATCHING SUBMISSIONS (every {interval} seconds, Ctrl+C to stop) ---\n')
+
+    # The results of every submission, by path
+    graded = {}
+    count = 0
+    try:
+        while rounds is None or count < rounds:
+            if count > 0:
+                time.sleep(interval)
+            count += 1
+
+            submissions, changed = watcher.poll()
+            if len(changed) == 0:
+                continue
+
+            # Correct the new and modified submissions, and take the others from the caches.
+            fingerprints = {}
+            aprx_paths = []
+            for path in sorted(changed):
+                results = [None]
+                if len(caches) > 0:
+                    fingerprints[path] = fingerprint(path)
+                    results = [cache.get(path, fingerprints[path]) for cache in caches]
+                if all(res is not None for res in results):
+                    graded[path] = ([[Result.from_json(r) for r in res] for res in results], True)
+                else:
+                    aprx_paths.append(path)
+
+            # A submission which cannot be read is reported, and corrected again on the next poll.
+            failed = {}
+            for path, (all_results, err) in zip(
+                aprx_paths, map_func(partial(try_correct_submission, rubrics=rubrics), aprx_paths)
+            ):
+                if err is not None:
+                    failed[path] = err
+                    graded.pop(path, None)
+                    watcher.forget(path)
+                    continue
+
+                graded[path] = (all_results, False)
+                for cache, results in zip(caches, all_results):
+                    cache.put(path, fingerprints[path], [res.to_json() for res in results])
+
+            for cache in caches:
+                cache.save()
+
+            print(f'{time.strftime("%H:%M:%S")}: {len(changed)} new or modified submission(s)\n')
+            for path, err in failed.items():
+                print(f'{RED}{BOLD} . Cannot correct "{path}" ({type(err).__name__}: {err}). '
+                      f'It will be corrected again on the next check.{END}\n')
+
+            console = ConsoleSink(quiet=quiet)
+            for st, errors, path in submissions:
+                if path in changed and path not in failed:
+                    all_results, was_cached = graded[path]
+                    for name, results in zip(names, all_results):
+                        console.write(Submission(
+                            f'{st} ({name})' if several else st, path, errors, results,
+                            cached=was_cached
+                        ))
+            console.close()
+
+            # Write the TSV files again, and replace the previous ones at once (they may be open by
+            # another program).
+            for i, (name, rubric) in enumerate(rubrics.items()):
+                path_tsv = output_path(result_file, name, several)
+                tsv = TsvSink(path_tsv + '.tmp', rubric.ids)
+                for st, errors, path in submissions:
+                    if path in graded:
+                        tsv.write(Submission(st, path, errors, graded[path][0][i]))
+                tsv.close()
+                os.replace(path_tsv + '.tmp', path_tsv)
+    except KeyboardInterrupt:
+        print('\n--- STOP WATCHING ---')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main(argv: list = None, prog: str = 'python -m geoscore', assignment: str = None):
+    """
+    Runs the command line interface. The script of an assignment (e.g. tp1.py) gives its
+    `assignment`, which cannot be changed on the command line.
+    """
+    parser = ArgumentParser(
+        prog=prog,
+        description="Correction automatique des TP de Géomatique & SIG" if assignment is None
+        else f"Correction automatique du {assignment.upper()} de Géomatique & SIG"
+    )
+    parser.add_argument(
+        'tp_dir',
+        metavar='<TP_DIR>',
+        nargs='?',
+        help="Chemin vers le dossier (ou l'archive zip) avec l'ensemble des soumissions"
+    )
+    parser.add_argument(
+        'result_file',
+        metavar='<RESULT_FILE>',
+        nargs='?',
+        help="Chemin vers le fichier avec les résultats"
+    )
+    if assignment is None:
+        parser.add_argument(
+            '-a', '--assignment',
+            action='append',
+            metavar='NAME',
+            help="TP à corriger (plusieurs TP peuvent être corrigés à la fois, tp1 par défaut)"
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help="Affiche la liste des TP disponibles"
+        )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        metavar='N',
+        help="Nombre de processus pour corriger les soumissions en parallèle (0: tous les CPU)"
+    )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help="Garde les résultats dans un cache et ne corrige que les soumissions modifiées"
+    )
+    parser.add_argument(
+        '--rubric',
+        metavar='FILE',
+        help="Fichier avec les critères de correction (JSON ou TOML), à la place de ceux du TP"
+    )
+    parser.add_argument(
+        '--reference',
+        metavar='FILE',
+        help="Projet de référence (donné aux étudiants) avec lequel comparer les soumissions"
+    )
+    parser.add_argument(
+        '--vectorized',
+        action='store_true',
+        help="Évalue les critères pour toute la volée à la fois avec NumPy (seulement les points)"
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help="Mesure le temps passé dans chaque phase et écrit un rapport à côté des résultats"
+    )
+    parser.add_argument(
+        '--prefetch',
+        type=int,
+        default=0,
+        metavar='K',
+        help="Lit les K soumissions suivantes en arrière-plan pendant la correction"
+    )
+    parser.add_argument(
+        '--prefetch-mem',
+        type=int,
+        default=256,
+        metavar='MB',
+        help="Mémoire maximale pour les soumissions lues en avance (en MB)"
+    )
+    parser.add_argument(
+        '--prefetch-decompress',
+        action='store_true',
+        help="Décompresse aussi les documents CIM des soumissions lues en avance"
+    )
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help="Affiche seulement le total de chaque étudiant"
+    )
+    parser.add_argument(
+        '--jsonl',
+        action='store_true',
+        help="Écrit aussi les résultats détaillés dans un fichier JSON Lines à côté des résultats"
+    )
+    parser.add_argument(
+        '--feedback',
+        metavar='DIR',
+        help="Écrit un fichier de retour par étudiant dans le dossier DIR"
+    )
+    parser.add_argument(
+        '--watch',
+        type=float,
+        nargs='?',
+        const=5.0,
+        metavar='SECONDS',
+        help="Surveille le dossier et corrige les nouvelles soumissions (toutes les 5 s par défaut)"
+    )
+    args = parser.parse_args(argv)
+
+    if assignment is None and args.list:
+        for name, source in assignments().items():
+            print(f'{name}\t{source}')
+        return
+
+    if args.tp_dir is None or args.result_file is None:
+        parser.error("<TP_DIR> et <RESULT_FILE> sont nécessaires")
+
+    names = [assignment]
+    if assignment is None:
+        names = list(dict.fromkeys(args.assignment or ['tp1']))
+    unknown = [name for name in names if name not in assignments()]
+    if len(unknown) > 0:
+        parser.error(f"TP inconnu: {', '.join(unknown)} (voir --list)")
+
+    if len(names) > 1 and (args.rubric is not None or args.reference is not None):
+        parser.error("--rubric et --reference ne sont disponibles que pour un seul TP")
+    if args.profile and args.vectorized:
+        parser.error("--profile n'est pas disponible avec --vectorized")
+
+    if args.rubric is not None:
+        rubrics = { names[0]: load_rubric(args.rubric, args.reference) }
+    else:
+        rubrics = { name: load_assignment(name, args.reference) for name in names }
+
+    jobs = args.jobs or os.cpu_count()
+    if args.watch is not None:
+        if args.vectorized or args.profile or args.prefetch > 0 or args.jsonl or args.feedback:
+            parser.error(
+                "--watch n'est pas disponible avec --vectorized, --profile, --prefetch, --jsonl "
+                "ou --feedback"
+            )
+        watch_submissions(
+            args.tp_dir, args.result_file, rubrics, jobs=jobs, use_cache=args.cache,
+            quiet=args.quiet, interval=args.watch
+        )
+        return
+
+    correct_submissions(
+        args.tp_dir, args.result_file, rubrics, jobs=jobs, use_cache=args.cache,
+        vectorized=args.vectorized, profile=args.profile, prefetch=args.prefetch,
+        prefetch_mem=args.prefetch_mem, prefetch_decompress=args.prefetch_decompress,
+        quiet=args.quiet, jsonl=args.jsonl, feedback_dir=args.feedback
+    )
@@ -0,0 +1,195 @@
+"""
+Single-pass evaluation of criteria over the layouts of a project.
+"""
+
+from aprx import stats
+
+
+# The hooks called by the engine on the criteria
+HOOKS = ('reset', 'visit_diff', 'visit_project', 'visit_layout', 'start_frame', 'visit_layer',
+         'end_frame', 'result')
+
+
+class Criterion:
+    """
+    Base class for a criterion evaluated by the Engine.
+
+    The engine walks the layouts, map frames and layers only once, and calls the hooks of the
+    criteria along the way:
+    - `visit_diff(diff)` once, with the differences to the reference project (see aprx.diff), if
+      there is a reference project,
+    - `visit_project(project)` once, before the layouts,
+    - `visit_layout(layout)` once for every layout,
+    - `start_frame(layout, map_frame)` before the layers of a map frame (the map frames without
+      map are skipped),
+    - `visit_layer(layout, map_frame, layer)` for every layer of the map shown in the map frame
+      whose name is in `layer_names` (or for every layer if `layer_names` is None),
+    - `end_frame(layout, map_frame)` after the layers of a map frame.
+
+    A criterion usually collects one score per layout, map frame or layer with `score()`, and
+    returns the best of them in `result()`. The layout and map frame of the best score are kept in
+    `self.chosen`.
+
+    A criterion can be reused for several projects: the engine calls `reset()` before every run.
+    """
+    # The title of the criterion, shown on the console.
+    title = ''
+
+    # The names of the layers sent to `visit_layer`. None means all layers, an empty tuple none.
+    layer_names = ()
+
+    def __init__(self):
+        self.reset()
+
+
+    def reset(self) -> None:
+        """
+        Clears the scores collected for the previous project.
+        """
+        self.pts, self.msg, self.where = [], [], []
+        self.chosen = (None, None)
+
+
+    def score(self, pts: float, msg, layout=None, map_frame=None) -> None:
+        """
+        Collects a score, with its message and the layout and map frame it was given for.
+        """
+        self.pts.append(pts)
+        self.msg.append(msg)
+        self.where.append((layout, map_frame))
+
+
+    def visit_diff(self, diff) -> None:
+        """
+        Called once with the differences between the project and the reference project, before
+        the project is visited.
+        """
+
+
+    def visit_project(self, project) -> None:
+        """
+        Called once for the project, before the layouts are visited.
+        """
+
+
+    def visit_layout(self, layout) -> None:
+        """
+        Called once for every layout.
+        """
+
+
+    def start_frame(self, layout, map_frame) -> None:
+        """
+        Called for every map frame, before its layers are visited.
+        """
+
+
+    def visit_layer(self, layout, map_frame, layer) -> None:
+        """
+        Called for every layer of the map frame whose name is in `layer_names`.
+        """
+
+
+    def end_frame(self, layout, map_frame) -> None:
+        """
+        Called for every map frame, after its layers have been visited.
+        """
+
+
+    def result(self) -> tuple:
+        """
+        Returns the points and the message for this criterion.
+        """
+        raise NotImplementedError
+
+
+    def best(self, default_msg: str) -> tuple:
+        """
+        Returns the maximum of the collected points, together with the message of the first score
+        reaching it. If there is no score at all, 0 points and `default_msg` are returned.
+        """
+        if len(self.pts) == 0:
+            return 0.0, default_msg
+
+        max_pts = max(self.pts)
+        max_idx = self.pts.index(max_pts)
+        self.chosen = self.where[max_idx]
+        return max_pts, self.msg[max_idx]
+
+
+class Engine:
+    """
+    Walks the layouts of a project once and dispatches the layouts, map frames and layers to the
+    registered criteria. Layers are routed by name, so a criterion only receives the layers it is
+    interested in.
+
+    engine = Engine([crit1, crit2])
+    engine.run(project)
+    pts, msg = crit1.result()
+    """
+    def __init__(self, criteria: list):
+        self.criteria = criteria
+
+        # Route the layers by name. Criteria interested in all layers are kept aside.
+        self.routes = {}
+        self.all_layers = []
+        for crit in self.criteria:
+            if crit.layer_names is None:
+                self.all_layers.append(crit)
+                continue
+
+            for name in crit.layer_names:
+                self.routes.setdefault(name, []).append(crit)
+
+        self.profiled = False
+
+
+    def profile(self, prefix: str = '') -> None:
+        """
+        Times the hooks of every criterion with aprx.stats, as the phase "criterion:<prefix><id>".
+        The documents read by a criterion are timed in their own phases ("unzip", "json", ...).
+        """
+        if self.profiled:
+            return
+
+        for crit in self.criteria:
+            name = f'criterion:{prefix}{getattr(crit, "id", type(crit).__name__)}'
+            for hook in HOOKS:
+                setattr(crit, hook, stats.timed_call(name, getattr(crit, hook)))
+
+        self.profiled = True
+
+
+    def run(self, project, diff=None) -> None:
+        """
+        Evaluates all criteria on the provided project. `diff` are the differences to the
+        reference project, if any.
+        """
+        for crit in self.criteria:
+            crit.reset()
+            if diff is not None:
+                crit.visit_diff(diff)
+            crit.visit_project(project)
+
+        for layout in project.layouts:
+            for crit in self.criteria:
+                crit.visit_layout(layout)
+
+            for mf in layout.map_frames:
+                # An empty map frame (without map) has no layers to grade
+                if mf.map is None:
+                    continue
+
+                for crit in self.criteria:
+                    crit.start_frame(layout, mf)
+
+                if len(self.routes) > 0 or len(self.all_layers) > 0:
+                    for lyr in mf.map.layers:
+                        for crit in self.routes.get(lyr.name, ()):
+                            crit.visit_layer(layout, mf, lyr)
+
+                        for crit in self.all_layers:
+                            crit.visit_layer(layout, mf, lyr)
+
+                for crit in self.criteria:
+                    crit.end_frame(layout, mf)
@@ -0,0 +1,461 @@
+"""
+Fact store: the properties extracted from the submissions of a cohort, kept in a SQLite file.
+
+Extracting the facts is the only step which opens the project files. Every submission is reduced
+to a snapshot (see aprx.snapshot), and its maps, layers (labels, symbol, style, transparency),
+layer order, layouts and map frame cameras are written as rows of a single SQLite file, with
+indexes on the student and on the layer name:
+
+python3 -m geoscore.facts extract [--jobs N] <tp_dir> <facts.sqlite>
+
+The rubric is then evaluated with queries over the store, without any archive I/O. After a change
+of a reference value or a tolerance in the rubric, only this step needs to run again:
+
+python3 -m geoscore.facts score [--rubric FILE] <facts.sqlite> <result_file>
+
+The rows are loaded into a FeatureTable and the criteria are evaluated with the vectorized
+evaluators of geoscore.features, so this module requires NumPy for scoring. Only the points are
+computed, the messages of the criteria are not rendered.
+"""
+
+import math
+import os
+import sqlite3
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+
+import aprx
+
+from .cache import fingerprint
+from .console import BOLD, END
+from .rubric import RUBRICS_DIR, load_rubric
+from .submissions import find_submissions, open_project
+
+
+# The tables of the store, and the indexes on the student and the layer name
+SCHEMA = """
+CREATE TABLE submissions (
+    id INTEGER PRIMARY KEY,
+    student TEXT NOT NULL,
+    path TEXT,
+    fingerprint TEXT
+);
+CREATE TABLE maps (
+    id INTEGER PRIMARY KEY,
+    submission INTEGER NOT NULL REFERENCES submissions(id),
+    item_id TEXT,
+    name TEXT,
+    uri TEXT,
+    layer_order TEXT
+);
+CREATE TABLE layers (
+    id INTEGER PRIMARY KEY,
+    submission INTEGER NOT NULL REFERENCES submissions(id),
+    layer_id TEXT,
+    uri TEXT,
+    name TEXT,
+    transparency REAL,
+    label_shown INTEGER,
+    label_expression TEXT,
+    label_engine TEXT,
+    font_family TEXT,
+    font_style TEXT,
+    label_size REAL,
+    symbol_type TEXT,
+    symbol_enable INTEGER,
+    symbol_size REAL,
+    symbol_r REAL, symbol_g REAL, symbol_b REAL, symbol_a REAL,
+    has_style INTEGER,
+    has_fill INTEGER,
+    fill_r REAL, fill_g REAL, fill_b REAL, fill_a REAL,
+    has_stroke INTEGER,
+    stroke_r REAL, stroke_g REAL, stroke_b REAL, stroke_a REAL,
+    stroke_width REAL
+);
+CREATE TABLE map_layers (
+    map INTEGER NOT NULL REFERENCES maps(id),
+    position INTEGER NOT NULL,
+    layer INTEGER NOT NULL REFERENCES layers(id)
+);
+CREATE TABLE layouts (
+    id INTEGER PRIMARY KEY,
+    submission INTEGER NOT NULL REFERENCES submissions(id),
+    item_id TEXT,
+    name TEXT,
+    uri TEXT
+);
+CREATE TABLE frames (
+    id INTEGER PRIMARY KEY,
+    submission INTEGER NOT NULL REFERENCES submissions(id),
+    layout INTEGER NOT NULL REFERENCES layouts(id),
+    position INTEGER NOT NULL,
+    name TEXT,
+    map INTEGER REFERENCES maps(id),
+    x REAL, y REAL, scale REAL, height REAL, width REAL
+);
+CREATE INDEX submissions_student ON submissions(student);
+CREATE INDEX layers_name ON layers(name);
+CREATE INDEX layers_submission ON layers(submission);
+CREATE INDEX maps_submission ON maps(submission);
+CREATE INDEX map_layers_map ON map_layers(map, position);
+CREATE INDEX layouts_submission ON layouts(submission);
+CREATE INDEX frames_layout ON frames(layout, position);
+"""
+
+# The CIM layer properties kept in the store, for the property_changed checks
+PROPERTIES = ('transparency',)
+
+
+def color_values(col) -> tuple:
+    """
+    Returns the RGBA values of a snapshot color, or NULL values for a missing color.
+    """
+    return (None, None, None, None) if col is None else tuple(col)
+
+
+def nan(value) -> float:
+    """
+    Converts a NULL value to NaN.
+    """
+    return math.nan if value is None else value
+
+
+def take_snapshot(aprx_path: str) -> aprx.ProjectSnapshot:
+    """
+    Opens a project file and returns its snapshot.
+    """
+    proj = open_project(aprx_path)
+    snap = proj.snapshot()
+    proj.close()
+
+    return snap
+
+
+class FactStore:
+    """
+    A SQLite file with the facts of a cohort of submissions.
+
+    store = FactStore(db_path)
+    store.create()
+    store.add_submission(student, path, fp, snapshot)
+    store.close()
+    """
+    def __init__(self, db_path: str):
+        self.path = db_path
+        self.db = sqlite3.connect(self.path)
+
+
+    def __repr__(self):
+        return f'<FactStore: "{self.path}">'
+
+
+    def create(self) -> None:
+        """
+        Creates the tables of the store. The previous content is removed.
+        """
+        tables = self.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        for (name,) in tables:
+            self.db.execute(f'DROP TABLE IF EXISTS {name}')
+
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+
+    def insert(self, table: str, **values) -> int:
+        """
+        Inserts a row in a table and returns its ID.
+        """
+        cur = self.db.execute(
+            f'INSERT INTO {table} ({", ".join(values)}) VALUES ({", ".join("?" * len(values))})',
+            tuple(values.values())
+        )
+        return cur.lastrowid
+
+
+    def add_submission(self, student: str, path: str, fp: str, snap) -> int:
+        """
+        Adds the facts of a submission from its snapshot. `path` and `snap` are None for a
+        submission without project file. Returns the ID of the submission.
+        """
+        sub = self.insert('submissions', student=student, path=path, fingerprint=fp)
+        if snap is None:
+            return sub
+
+        # The layers are shared by the maps of a submission, like the Layer instances
+        layer_ids = {}
+        map_ids = {}
+        for mp in snap.maps:
+            map_id = self.insert(
+                'maps', submission=sub, item_id=mp.item_id, name=mp.name, uri=mp.uri,
+                layer_order='\n'.join(mp.layer_order)
+            )
+            map_ids.setdefault(mp.uri, map_id)
+
+            for pos, lyr in enumerate(mp.layers):
+                if lyr.uri not in layer_ids:
+                    layer_ids[lyr.uri] = self.add_layer(sub, lyr)
+                self.insert('map_layers', map=map_id, position=pos, layer=layer_ids[lyr.uri])
+
+        for layout in snap.layouts:
+            layout_id = self.insert(
+                'layouts', submission=sub, item_id=layout.item_id, name=layout.name, uri=layout.uri
+            )
+            for pos, mf in enumerate(layout.map_frames):
+                cam = mf.camera
+                self.insert(
+                    'frames', submission=sub, layout=layout_id, position=pos, name=mf.name,
+                    map=map_ids.get(mf.map_uri, None),
+                    x=None if cam is None else cam.x,
+                    y=None if cam is None else cam.y,
+                    scale=None if cam is None else cam.scale,
+                    height=None if cam is None else cam.height,
+                    width=None if cam is None else cam.width
+                )
+
+        return sub
+
+
+    def add_layer(self, sub: int, lyr) -> int:
+        """
+        Adds the facts of a layer snapshot and returns the ID of the layer.
+        """
+        lbls, symb, stl = lyr.labels, lyr.symbol, lyr.style
+        values = {
+            'submission': sub,
+            'layer_id': lyr.id,
+            'uri': lyr.uri,
+            'name': lyr.name,
+            'transparency': lyr.transparency,
+            'label_shown': bool(lbls.shown),
+            'label_expression': None if lbls.expression is None else lbls.expression.value,
+            'label_engine': None if lbls.expression is None else lbls.expression.engine,
+            'font_family': None if lbls.font is None else lbls.font.family,
+            'font_style': None if lbls.font is None else lbls.font.style,
+            'label_size': None if lbls.font is None else lbls.font.size,
+            'symbol_type': None if symb is None else symb.type,
+            'symbol_enable': None if symb is None else bool(symb.enable),
+            'symbol_size': None if symb is None else symb.size,
+            'has_style': stl is not None,
+            'has_fill': stl is not None and stl.has_fill,
+            'has_stroke': stl is not None and stl.has_stroke,
+            'stroke_width': None if stl is None else stl.stroke_width,
+        }
+        for prefix, col in (('symbol', None if symb is None else symb.color),
+                            ('fill', None if stl is None else stl.fill_color),
+                            ('stroke', None if stl is None else stl.stroke_color)):
+            for channel, value in zip('rgba', color_values(col)):
+                values[f'{prefix}_{channel}'] = value
+
+        return self.insert('layers', **values)
+
+
+    def commit(self) -> None:
+        """
+        Writes the pending changes to the file.
+        """
+        self.db.commit()
+
+
+    def students(self) -> list:
+        """
+        Returns the students of the submissions with a project file, in the order of the store.
+        """
+        return [
+            st for (st,) in self.db.execute(
+                'SELECT student FROM submissions WHERE path IS NOT NULL ORDER BY id'
+            )
+        ]
+
+
+    def features(self, properties: tuple = ()):
+        """
+        Loads the facts of the submissions with a project file into a FeatureTable (see
+        geoscore.features), with one row per map, layout, map frame and layer shown in a map frame.
+        """
+        from .features import FeatureTable
+
+        for prop in properties:
+            if prop not in PROPERTIES:
+                raise ValueError(f'The layer property "{prop}" is not kept in the fact store')
+
+        table = FeatureTable(properties)
+        rows = self.db.execute
+        subs = {
+            sub: i for i, (sub,) in enumerate(
+                rows('SELECT id FROM submissions WHERE path IS NOT NULL ORDER BY id')
+            )
+        }
+        table.n_submissions = len(subs)
+
+        maps = {}
+        for map_id, sub, name in rows('SELECT id, submission, name FROM maps ORDER BY id'):
+            maps[map_id] = table.add_row('maps', sub=subs[sub], name=name)
+
+        for map_id, layer_id in rows(
+            'SELECT ml.map, l.layer_id FROM map_layers ml JOIN layers l ON l.id = ml.layer '
+            'ORDER BY ml.map, ml.position'
+        ):
+            table.add_row('map_layers', map=maps[map_id], layer_id=layer_id)
+
+        # The camera of the first map frame of every layout
+        for sub, n_frames, x, y, scale in rows(
+            'SELECT lt.submission, '
+            '(SELECT COUNT(*) FROM frames f WHERE f.layout = lt.id), f0.x, f0.y, f0.scale '
+            'FROM layouts lt LEFT JOIN frames f0 ON f0.layout = lt.id AND f0.position = 0 '
+            'ORDER BY lt.id'
+        ):
+            table.add_row(
+                'layouts', sub=subs[sub], n_frames=n_frames, x=nan(x), y=nan(y), scale=nan(scale)
+            )
+
+        # The map frames showing a map of the project, and the layers of these maps
+        frames = {}
+        for frame_id, sub, x, y, scale, order in rows(
+            'SELECT f.id, f.submission, f.x, f.y, f.scale, m.layer_order '
+            'FROM frames f JOIN maps m ON m.id = f.map ORDER BY f.layout, f.position'
+        ):
+            frames[frame_id] = table.add_row(
+                'frames', sub=subs[sub], x=nan(x), y=nan(y), scale=nan(scale), order=order
+            )
+
+        for (frame_id, sub, name, label_shown, label_expression, label_size, symbol_type,
+             symbol_size, symbol_r, symbol_g, symbol_b, symbol_a, has_style, has_stroke,
+             stroke_width, stroke_r, stroke_g, stroke_b, stroke_a, has_fill, fill_r, fill_g,
+             fill_b, fill_a, transparency) in rows(
+            'SELECT f.id, l.submission, l.name, l.label_shown, l.label_expression, l.label_size, '
+            'l.symbol_type, l.symbol_size, l.symbol_r, l.symbol_g, l.symbol_b, l.symbol_a, '
+            'l.has_style, l.has_stroke, l.stroke_width, l.stroke_r, l.stroke_g, l.stroke_b, '
+            'l.stroke_a, l.has_fill, l.fill_r, l.fill_g, l.fill_b, l.fill_a, l.transparency '
+            'FROM frames f JOIN map_layers ml ON ml.map = f.map JOIN layers l ON l.id = ml.layer '
+            'ORDER BY f.layout, f.position, ml.position'
+        ):
+            values = {
+                'name': name,
+                'label_shown': bool(label_shown),
+                'label_expression': label_expression,
+                'label_size': nan(label_size),
+                'has_symbol': symbol_type is not None,
+                'symbol_type': symbol_type,
+                'symbol_size': nan(symbol_size),
+                'symbol_color': tuple(nan(v) for v in (symbol_r, symbol_g, symbol_b, symbol_a)),
+                'has_style': bool(has_style),
+                'has_stroke': bool(has_stroke),
+                'stroke_width': nan(stroke_width),
+                'stroke_color': tuple(nan(v) for v in (stroke_r, stroke_g, stroke_b, stroke_a)),
+                'has_fill': bool(has_fill),
+                'fill_color': tuple(nan(v) for v in (fill_r, fill_g, fill_b, fill_a)),
+            }
+            if 'transparency' in properties:
+                values['property.transparency'] = transparency
+
+            table.add_row('layers', sub=subs[sub], frame=frames[frame_id], **values)
+
+        return table
+
+
+    def close(self) -> None:
+        """
+        Closes the SQLite file.
+        """
+        self.db.close()
+
+
+def extract(tp_dir: str, db_path: str, jobs: int = 1) -> int:
+    """
+    Extracts the facts of all submissions in `tp_dir` into the store at `db_path`. The previous
+    content of the store is replaced. Returns the number of submissions.
+    """
+    submissions = find_submissions(tp_dir)
+    aprx_paths = [path for _st, _errors, path in submissions if path is not None]
+
+    executor = None
+    if jobs > 1 and len(aprx_paths) > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+    snapshots = (map if executor is None else executor.map)(take_snapshot, aprx_paths)
+
+    store = FactStore(db_path)
+    store.create()
+    for st, _errors, path in submissions:
+        if path is None:
+            store.add_submission(st, None, None, None)
+        else:
+            store.add_submission(st, path, fingerprint(path), next(snapshots))
+    store.commit()
+    store.close()
+
+    if executor is not None:
+        executor.shutdown()
+
+    return len(submissions)
+
+
+def score(db_path: str, rubric) -> list:
+    """
+    Evaluates the rubric over the facts in the store. Returns a list of (student, points) tuples,
+    with the points of every criterion.
+    """
+    from .features import evaluate, rubric_properties
+
+    store = FactStore(db_path)
+    students = store.students()
+    table = store.features(rubric_properties(rubric))
+    store.close()
+
+    return list(zip(students, evaluate(rubric, table).tolist()))
+
+
+def write_results(results: list, rubric, result_file: str) -> None:
+    """
+    Writes the points to a TSV file, in the same format as the correction scripts.
+    """
+    with open(result_file, 'w', encoding='utf-8') as f:
+        f.write('\t'.join(['Student', *rubric.ids, 'tot']) + '\n')
+        for st, pts in results:
+            pts_str = '\t'.join([f'{p:.1f}' for p in pts])
+            f.write(f'{st}\t{pts_str}\t{sum(pts)}\n')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        prog='python -m geoscore.facts',
+        description="Extraction des propriétés des soumissions dans une base SQLite, et correction "
+                    "à partir de cette base"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    extract_parser = commands.add_parser(
+        'extract', help="Extrait les propriétés de toutes les soumissions dans la base"
+    )
+    extract_parser.add_argument(
+        'tp_dir', metavar='<TP_DIR>',
+        help="Chemin vers le dossier (ou l'archive zip) avec l'ensemble des soumissions"
+    )
+    extract_parser.add_argument('db', metavar='<DB>', help="Fichier SQLite à créer")
+    extract_parser.add_argument(
+        '-j', '--jobs', type=int, default=1, metavar='N',
+        help="Nombre de processus pour lire les soumissions en parallèle (0: tous les CPU)"
+    )
+
+    score_parser = commands.add_parser(
+        'score', help="Corrige toutes les soumissions à partir de la base"
+    )
+    score_parser.add_argument('db', metavar='<DB>', help="Fichier SQLite avec les propriétés")
+    score_parser.add_argument(
+        'result_file', metavar='<RESULT_FILE>',
+        help="Chemin vers le fichier avec les résultats"
+    )
+    score_parser.add_argument(
+        '--rubric', default=os.path.join(RUBRICS_DIR, 'tp1.json'), metavar='FILE',
+        help="Fichier avec les critères de correction (JSON ou TOML)"
+    )
+    args = parser.parse_args()
+
+    if args.command == 'extract':
+        n = extract(args.tp_dir, args.db, jobs=args.jobs or os.cpu_count())
+        print(f'{n} submissions extracted to "{args.db}"')
+    else:
+        rubric = load_rubric(args.rubric)
+        results = score(args.db, rubric)
+        write_results(results, rubric, args.result_file)
+        for st, pts in results:
+            print(f'{BOLD}{st}: {sum(pts)} points{END}')
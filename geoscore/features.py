@@ -0,0 +1,473 @@
+"""
+Cohort-wide evaluation of a rubric over a table of extracted features.
+
+The evaluation works in two stages:
+1. The features needed by the checks are extracted from every submission into columnar tables
+   (one row per map, layout, map frame or layer of a submission). This is the only stage which
+   opens the project files.
+2. Every criterion of the rubric is evaluated with NumPy array operations over the whole cohort at
+   once. Changing a reference value or the points of a rubric only requires to run this stage again.
+
+table = FeatureTable()
+for path in aprx_paths:
+    table.extend(extract_features(path, rubric_properties(rubric)))
+pts = evaluate(rubric, table)
+
+Only the points are computed in this mode, the messages of the criteria are not rendered.
+This module requires NumPy.
+"""
+
+import math
+
+import numpy as np
+
+import aprx
+from aprx.query import compile_accessor
+
+from .submissions import open_project
+
+
+# The columns of the tables. "sub" is the index of the submission, "map" and "frame" are the
+# indexes of a row in the "maps" and "frames" tables.
+COLUMNS = {
+    'maps': ('sub', 'name'),
+    'map_layers': ('map', 'layer_id'),
+    'layouts': ('sub', 'n_frames', 'x', 'y', 'scale'),
+    'frames': ('sub', 'x', 'y', 'scale', 'order'),
+    'layers': (
+        'sub', 'frame', 'name',
+        'label_shown', 'label_expression', 'label_size',
+        'has_symbol', 'symbol_type', 'symbol_size', 'symbol_color',
+        'has_style', 'has_stroke', 'stroke_width', 'stroke_color', 'has_fill', 'fill_color'
+    ),
+}
+
+# The columns holding a color, converted to a (n, 4) array of RGBA values.
+COLOR_COLUMNS = ('symbol_color', 'stroke_color', 'fill_color')
+
+# The columns holding strings, kept as arrays of objects.
+STR_COLUMNS = ('name', 'layer_id', 'label_expression', 'symbol_type', 'order')
+
+# The columns holding indexes.
+INT_COLUMNS = ('sub', 'map', 'frame', 'n_frames')
+
+# The columns holding flags.
+BOOL_COLUMNS = ('label_shown', 'has_symbol', 'has_style', 'has_stroke', 'has_fill')
+
+
+def color_values(col: aprx.RGBA) -> tuple:
+    """
+    Returns the RGBA values of a color as a tuple, with NaN values for a missing color.
+    """
+    if col is None:
+        return (math.nan, math.nan, math.nan, math.nan)
+
+    return (col.r, col.g, col.b, col.a)
+
+
+def layer_order_key(layers: list) -> str:
+    """
+    Returns the order of the layers of a map (the list of CIMPATHs) as a single string.
+    """
+    return '\n'.join(layers)
+
+
+class FeatureTable:
+    """
+    Columnar tables with the features of a cohort of submissions. The rows are added as lists, and
+    converted to NumPy arrays with `arrays()`.
+
+    Besides the columns in COLUMNS, the "layers" table has a column "property.<name>" for every
+    CIM property listed in `properties` (e.g. "transparency", or a path such as
+    "labelClasses[0].textSymbol.symbol.height"). These columns keep the JSON values as objects
+    (numbers, strings, lists...), with None for a missing property.
+    """
+    def __init__(self, properties: tuple = ()):
+        self.properties = tuple(properties)
+        self.getters = [compile_accessor(prop) for prop in self.properties]
+        self.n_submissions = 0
+        self.tables = { name: { col: [] for col in cols } for name, cols in COLUMNS.items() }
+        for prop in self.properties:
+            self.tables['layers'][f'property.{prop}'] = []
+
+
+    def __len__(self):
+        return self.n_submissions
+
+
+    def add_row(self, table: str, **values) -> int:
+        """
+        Adds a row to a table and returns its index.
+        """
+        columns = self.tables[table]
+        for col, lst in columns.items():
+            lst.append(values[col])
+
+        return len(columns[next(iter(columns))]) - 1
+
+
+    def add_project(self, project: aprx.Project) -> int:
+        """
+        Extracts the features of a project as a new submission. Returns the index of the submission.
+        """
+        sub = self.n_submissions
+        self.n_submissions += 1
+
+        for mp in project.maps:
+            map_idx = self.add_row('maps', sub=sub, name=mp.name)
+            for lyr in mp.layers:
+                self.add_row('map_layers', map=map_idx, layer_id=lyr.id)
+
+        for layout in project.layouts:
+            map_frames = layout.map_frames
+
+            view = map_frames[0].map_view if len(map_frames) > 0 else None
+            self.add_row(
+                'layouts', sub=sub, n_frames=len(map_frames),
+                x=math.nan if view is None else view.x,
+                y=math.nan if view is None else view.y,
+                scale=math.nan if view is None else view.scale
+            )
+
+            for mf in map_frames:
+                if mf.map is None:
+                    continue
+
+                view = mf.map_view
+                frame_idx = self.add_row(
+                    'frames', sub=sub, x=view.x, y=view.y, scale=view.scale,
+                    order=layer_order_key(mf.map.layer_refs)
+                )
+
+                for lyr in mf.map.layers:
+                    self.add_layer(sub, frame_idx, lyr)
+
+        return sub
+
+
+    def add_layer(self, sub: int, frame_idx: int, lyr) -> None:
+        """
+        Adds the features of a layer shown in a map frame.
+        """
+        lbls = lyr.labels
+        font = lbls.get('font', None)
+        symb = lyr.symbol
+        stl = lyr.style
+        stroke = None if stl is None else stl['stroke']
+        fill = None if stl is None else stl['fill']
+
+        values = {
+            'sub': sub,
+            'frame': frame_idx,
+            'name': lyr.name,
+            'label_shown': bool(lbls['shown']),
+            'label_expression': lbls.get('expression', {}).get('value', None),
+            'label_size': math.nan if font is None else font['size'],
+            'has_symbol': symb is not None,
+            'symbol_type': None if symb is None else symb['type'],
+            'symbol_size': math.nan if symb is None else symb['size'],
+            'symbol_color': color_values(None if symb is None else symb['color']),
+            'has_style': stl is not None,
+            'has_stroke': stroke is not None,
+            'stroke_width': math.nan if stroke is None else stroke['width'],
+            'stroke_color': color_values(None if stroke is None else stroke['color']),
+            'has_fill': fill is not None,
+            'fill_color': color_values(None if fill is None else fill['color']),
+        }
+
+        for prop, get in zip(self.properties, self.getters):
+            values[f'property.{prop}'] = get(lyr.json)
+
+        self.add_row('layers', **values)
+
+
+    def extend(self, other: object) -> None:
+        """
+        Appends all submissions of another table. The indexes of the other table are shifted.
+        """
+        offsets = {
+            'sub': self.n_submissions,
+            'map': len(self.tables['maps']['sub']),
+            'frame': len(self.tables['frames']['sub']),
+        }
+
+        for name, columns in self.tables.items():
+            for col, lst in columns.items():
+                offset = offsets.get(col, 0)
+                if offset == 0:
+                    lst.extend(other.tables[name][col])
+                else:
+                    lst.extend(v + offset for v in other.tables[name][col])
+
+        self.n_submissions += other.n_submissions
+
+
+    def arrays(self) -> dict:
+        """
+        Returns the tables as dictionaries of NumPy arrays.
+        """
+        tables = {}
+        for name, columns in self.tables.items():
+            tables[name] = {}
+            for col, lst in columns.items():
+                if col in COLOR_COLUMNS:
+                    arr = np.array(lst, dtype=float).reshape(-1, 4)
+                elif col in STR_COLUMNS:
+                    arr = np.empty(len(lst), dtype=object)
+                    arr[:] = lst
+                elif col.startswith('property.'):
+                    # The values are set one by one, so that lists are not taken as rows
+                    arr = np.empty(len(lst), dtype=object)
+                    for i, value in enumerate(lst):
+                        arr[i] = value
+                elif col in INT_COLUMNS:
+                    arr = np.array(lst, dtype=np.int64)
+                elif col in BOOL_COLUMNS:
+                    arr = np.array(lst, dtype=bool)
+                else:
+                    arr = np.array(lst, dtype=float)
+                tables[name][col] = arr
+
+        return tables
+
+
+def extract_features(aprx_path: str, properties: tuple = ()) -> FeatureTable:
+    """
+    Opens a project file and returns a table with the features of this single submission.
+    """
+    table = FeatureTable(properties)
+
+    proj = open_project(aprx_path)
+    table.add_project(proj)
+    proj.close()
+
+    return table
+
+
+def rubric_properties(rubric) -> tuple:
+    """
+    Returns the CIM layer properties needed by the criteria of a rubric.
+    """
+    return tuple(sorted({
+        crit.property for crit in rubric.criteria
+        if getattr(crit, 'kind', None) == 'property_changed'
+    }))
+
+
+# The vectorized evaluation of the check kinds, by name.
+EVALUATORS = {}
+
+
+def evaluator(kind: str):
+    """
+    Function decorator registering the vectorized evaluation of the check kind `kind`. The
+    function is called with the checker, the tables and the number of submissions, and returns an
+    array with the points of every submission.
+    """
+    def decorator(func):
+        EVALUATORS[kind] = func
+        return func
+
+    return decorator
+
+
+def evaluate(rubric, table: FeatureTable) -> np.ndarray:
+    """
+    Evaluates all criteria of a rubric over the whole cohort in the table. Returns an array with
+    one row per submission and one column per criterion.
+    """
+    tables = table.arrays()
+    n = len(table)
+
+    pts = np.zeros((n, len(rubric.criteria)))
+    for i, crit in enumerate(rubric.criteria):
+        func = EVALUATORS.get(getattr(crit, 'kind', None), None)
+        if func is None:
+            raise ValueError(f'No vectorized evaluation for criterion "{crit.id}"')
+        pts[:, i] = func(crit, tables, n)
+
+    return pts
+
+
+def max_by(n: int, sub: np.ndarray, pts: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+    """
+    Returns the maximum of the points per submission, or 0 for submissions without any row.
+    """
+    if mask is not None:
+        sub, pts = sub[mask], pts[mask]
+
+    out = np.zeros(n)
+    np.maximum.at(out, sub, pts)
+    return out
+
+
+def any_by(n: int, sub: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Returns True for the submissions where at least one row matches the mask.
+    """
+    return np.bincount(sub[mask], minlength=n) > 0
+
+
+def last_by(n: int, key: np.ndarray, values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Returns, for each of the `n` keys, the value of the last row matching the mask, or 0.
+    """
+    out = np.zeros(n)
+    idx = np.nonzero(mask)[0][::-1]
+    keys, first = np.unique(key[idx], return_index=True)
+    out[keys] = values[idx[first]]
+    return out
+
+
+@evaluator('map_import')
+def evaluate_map_import(check, tables, n):
+    maps, map_layers = tables['maps'], tables['map_layers']
+
+    hit = np.isin(map_layers['layer_id'], list(check.layer_ids))
+    n_hits = np.bincount(map_layers['map'][hit], minlength=len(maps['sub']))
+    prefix = np.array([name.startswith(check.name_prefix) for name in maps['name']], dtype=bool)
+
+    imported = prefix & (n_hits >= check.min_layers)
+    n_imported = np.bincount(maps['sub'][imported], minlength=n)
+
+    return np.where(
+        n_imported == 0, 0.0,
+        np.where(n_imported > 1, check.points['several'], check.points['one'])
+    )
+
+
+@evaluator('layout_count')
+def evaluate_layout_count(check, tables, n):
+    n_layouts = np.bincount(tables['layouts']['sub'], minlength=n)
+
+    return np.where(
+        n_layouts == 0, 0.0,
+        np.where(n_layouts > 1, check.points['several'], check.points['one'])
+    )
+
+
+@evaluator('map_view_changed')
+def evaluate_map_view_changed(check, tables, n):
+    layouts = tables['layouts']
+    ref, tol = check.reference, check.tolerance
+
+    # NaN values (layouts without map frame) never compare as changed
+    changed = (np.abs(layouts['x'] - ref.x) > tol.get('x', 0)) | \
+        (np.abs(layouts['y'] - ref.y) > tol.get('y', 0)) | \
+        (np.abs(layouts['scale'] - ref.scale) > tol.get('scale', 0))
+
+    row_pts = np.where(
+        changed,
+        np.where(layouts['n_frames'] > 1, check.points['several_frames'], check.points['changed']),
+        0.0
+    )
+    return max_by(n, layouts['sub'], row_pts)
+
+
+@evaluator('labels_shown')
+def evaluate_labels_shown(check, tables, n):
+    lyrs = tables['layers']
+    mask = (lyrs['name'] == check.layer) & lyrs['label_shown'] & \
+        (lyrs['label_expression'] == check.expression)
+
+    return np.where(any_by(n, lyrs['sub'], mask), check.points['shown'], 0.0)
+
+
+@evaluator('label_size_smaller')
+def evaluate_label_size_smaller(check, tables, n):
+    lyrs, frames = tables['layers'], tables['frames']
+    n_frames = len(frames['sub'])
+
+    # The font size of the labels in every map frame (the last matching layer wins), 0 if none.
+    fsize = {}
+    for name, expression in ((check.layer, check.expression), (check.than, check.than_expression)):
+        mask = (lyrs['name'] == name) & lyrs['label_shown'] & \
+            (lyrs['label_expression'] == expression)
+        fsize[name] = last_by(n_frames, lyrs['frame'], lyrs['label_size'], mask)
+
+    fsize_lyr, fsize_than = fsize[check.layer], fsize[check.than]
+    both = (fsize_lyr > 0) & (fsize_than > 0)
+
+    row_pts = np.select(
+        [both & (fsize_lyr < fsize_than), both, fsize_lyr > 0],
+        [check.points['smaller'], check.points['not_smaller'], check.points['only_layer']],
+        0.0
+    )
+    return max_by(n, frames['sub'], row_pts)
+
+
+@evaluator('symbol_changed')
+def evaluate_symbol_changed(check, tables, n):
+    lyrs = tables['layers']
+    n_rows = len(lyrs['sub'])
+
+    # The reference size and color of every row, depending on the symbol type. NaN never compares
+    # as equal, so symbols without reference count as changed.
+    ref_size = np.full(n_rows, math.nan)
+    ref_color = np.full((n_rows, 4), math.nan)
+    for symb_type, (size, col) in check.references.items():
+        mask = lyrs['symbol_type'] == symb_type
+        ref_size[mask] = math.nan if size is None else size
+        ref_color[mask] = color_values(col)
+
+    size_changed = lyrs['symbol_size'] != ref_size
+    color_changed = ~np.all(lyrs['symbol_color'] == ref_color, axis=1)
+
+    row_pts = np.where(
+        lyrs['has_symbol'],
+        np.where(size_changed, check.points['size'], 0.0) +
+        np.where(color_changed, check.points['color'], 0.0),
+        0.0
+    )
+    return max_by(n, lyrs['sub'], row_pts, lyrs['name'] == check.layer)
+
+
+@evaluator('style_changed')
+def evaluate_style_changed(check, tables, n):
+    lyrs = tables['layers']
+
+    valid = lyrs['has_style'].copy()
+    if check.require is not None:
+        valid &= lyrs[f'has_{check.require}']
+
+    row_pts = np.zeros(len(lyrs['sub']))
+    for part, attribute, ref, points, _label in check.properties:
+        if attribute == 'color':
+            differ = ~np.all(lyrs[f'{part}_color'] == color_values(ref), axis=1)
+        else:
+            differ = lyrs[f'{part}_{attribute}'] != ref
+
+        # A missing part counts as changed
+        row_pts += np.where(~lyrs[f'has_{part}'] | differ, points, 0.0)
+
+    row_pts = np.where(valid, row_pts, 0.0)
+    return max_by(n, lyrs['sub'], row_pts, lyrs['name'] == check.layer)
+
+
+@evaluator('property_changed')
+def evaluate_property_changed(check, tables, n):
+    if check.reference is None:
+        raise ValueError(f'Criterion "{check.id}" needs a reference value in vectorized mode')
+
+    lyrs = tables['layers']
+    values = lyrs[f'property.{check.property}']
+
+    # Layers without the property are ignored. The values can be of any JSON type, so they are
+    # compared one by one as in the scalar check.
+    present = np.array([value is not None for value in values], dtype=bool)
+    changed = np.array([value != check.reference for value in values], dtype=bool)
+
+    mask = (lyrs['name'] == check.layer) & present
+    row_pts = np.where(changed, check.points['changed'], 0.0)
+    return max_by(n, lyrs['sub'], row_pts, mask)
+
+
+@evaluator('layer_order_changed')
+def evaluate_layer_order_changed(check, tables, n):
+    if check.reference is None:
+        raise ValueError(f'Criterion "{check.id}" needs a reference value in vectorized mode')
+
+    frames = tables['frames']
+    changed = frames['order'] != layer_order_key(check.reference)
+
+    return np.where(any_by(n, frames['sub'], changed), check.points['changed'], 0.0)
@@ -0,0 +1,110 @@
+"""
+Messages of the criteria, rendered only when needed.
+
+A check does not format its messages when it evaluates a submission. It records a Message with a
+stable code (e.g. "map_import.several"), a template and the values to insert in the template. The
+message is only rendered by the sinks which need it, with or without the console colors:
+
+msg = Message('layout_count.several', '  {MAGENTA}! {n} layouts found: "{names}"{END}', n=2,
+              names='Layout 1", "Layout 2')
+msg.render()             # with the ANSI colors, as on the console
+msg.render(color=False)  # plain text, e.g. for feedback files
+
+The templates use the color names of geoscore.console. Messages can be joined into a message with
+several lines.
+"""
+
+from . import console
+
+
+# The colors available in the templates, and the same without colors
+COLORS = {
+    name: getattr(console, name) for name in ('BLACK', 'RED', 'GREEN', 'BLUE', 'MAGENTA', 'BOLD',
+                                              'END')
+}
+NO_COLORS = { name: '' for name in COLORS }
+
+
+class Message:
+    """
+    A message with a code, rendered from its template on demand. A message joining several
+    messages (one per line) has no template, but `parts`.
+    """
+    __slots__ = ('code', 'template', 'params', 'parts')
+
+    def __init__(self, code: str, template: str = '', parts: tuple = (), **params):
+        self.code = code
+        self.template = template
+        self.params = params
+        self.parts = tuple(parts)
+
+
+    def __repr__(self):
+        return f'<Message: {", ".join(self.codes)}>'
+
+
+    def __str__(self):
+        return self.render()
+
+
+    @classmethod
+    def join(cls, parts: list) -> 'Message':
+        """
+        Returns a message with one line for every message in `parts`.
+        """
+        return cls(None, parts=parts)
+
+
+    @property
+    def codes(self) -> list:
+        """
+        Returns the codes of the message, one per line for a joined message.
+        """
+        if len(self.parts) > 0:
+            return [code for part in self.parts for code in part.codes]
+
+        return [self.code]
+
+
+    def render(self, color: bool = True) -> str:
+        """
+        Renders the message, with the ANSI colors of the console or as plain text.
+        """
+        if len(self.parts) > 0:
+            return '\n'.join(part.render(color) for part in self.parts)
+
+        return self.template.format(**(COLORS if color else NO_COLORS), **self.params)
+
+
+    def to_json(self) -> dict:
+        """
+        Returns the message as a dictionary which can be written as JSON (e.g. in the cache).
+        """
+        if len(self.parts) > 0:
+            return { 'parts': [part.to_json() for part in self.parts] }
+
+        return { 'code': self.code, 'template': self.template, 'params': self.params }
+
+
+    @classmethod
+    def from_json(cls, data: dict) -> 'Message':
+        """
+        Creates a message from a dictionary returned by `to_json`.
+        """
+        if 'parts' in data:
+            return cls.join([cls.from_json(part) for part in data['parts']])
+
+        return cls(data['code'], data['template'], **data['params'])
+
+
+def render(msg, color: bool = True) -> str:
+    """
+    Renders a message. Plain strings are returned as they are, None as an empty string.
+    """
+    if msg is None:
+        return ''
+
+    if isinstance(msg, Message):
+        return msg.render(color)
+
+    return msg
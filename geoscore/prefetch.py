@@ -0,0 +1,123 @@
+"""
+Read-ahead of the submission files while the current submission is being corrected.
+
+When the submissions are on a network share, reading a file takes longer than correcting it. The
+Prefetcher reads the next submissions in background threads, so that the files are already in
+memory when their turn comes:
+
+for path, data, members in Prefetcher(aprx_paths, depth=4):
+    proj = aprx.Project(path, data=data, members=members)
+
+The submissions are returned in the order of the paths. At most `depth` files are read ahead, and
+the total size of the files read ahead is kept under `max_bytes` (at least one file is always read
+ahead, whatever its size).
+"""
+
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from zipfile import ZipFile
+
+from .submissions import export_info, read_submission_file
+
+
+# The default number of files read ahead and the default memory cap
+DEPTH = 4
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def read_submission(path: str, decompress: bool = False) -> tuple:
+    """
+    Reads a submission file in memory. With `decompress`, the CIM documents (the JSON members)
+    are also decompressed. Returns the content of the file and the dictionary of decompressed
+    members (None without `decompress`). Project packages (.ppkx) are not read ahead: they hold
+    the data of the project, and only the project file inside is read when the package is opened.
+    """
+    if path.lower().endswith('.ppkx'):
+        return None, None
+
+    data = read_submission_file(path)
+
+    if not decompress:
+        return data, None
+
+    with ZipFile(io.BytesIO(data), 'r') as zf:
+        members = {
+            info.filename: zf.read(info) for info in zf.infolist()
+            if info.filename.lower().endswith('.json')
+        }
+
+    return data, members
+
+
+class Prefetcher:
+    """
+    Iterates over the submission files, read ahead by a pool of threads. Yields tuples (path, data,
+    members) with the content of the file and the decompressed members (see `read_submission`).
+    """
+    def __init__(
+        self, paths: list, depth: int = DEPTH, max_bytes: int = MAX_BYTES, workers: int = 2,
+        decompress: bool = False
+    ):
+        self.paths = paths
+        self.depth = max(depth, 1)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.decompress = decompress
+
+
+    def __repr__(self):
+        return f'<Prefetcher: {len(self.paths)} files, depth {self.depth}>'
+
+
+    def size(self, path: str) -> int:
+        """
+        Returns the memory needed for a file read ahead. The decompressed members are not
+        included, their size is only known once the file has been read. Project packages are not
+        read ahead (see `read_submission`).
+        """
+        if path.lower().endswith('.ppkx'):
+            return 0
+
+        try:
+            info = export_info(path)
+            return os.path.getsize(path) if info is None else info.file_size
+        except (OSError, KeyError):
+            # The error is raised when the file is read.
+            return 0
+
+
+    def __iter__(self):
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        paths = iter(self.paths)
+        next_path = next(paths, None)
+
+        # The files being read, as (path, size, future), and the size of these files
+        pending = deque()
+        pending_bytes = 0
+
+        try:
+            while True:
+                # Fill the queue up to the depth and the memory cap
+                while next_path is not None and len(pending) < self.depth:
+                    size = self.size(next_path)
+                    if len(pending) > 0 and pending_bytes + size > self.max_bytes:
+                        break
+
+                    future = executor.submit(read_submission, next_path, self.decompress)
+                    pending.append((next_path, size, future))
+                    pending_bytes += size
+                    next_path = next(paths, None)
+
+                if len(pending) == 0:
+                    return
+
+                path, size, future = pending.popleft()
+                pending_bytes -= size
+                data, members = future.result()
+                yield path, data, members
+        finally:
+            for _path, _size, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
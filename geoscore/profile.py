@@ -0,0 +1,132 @@
+"""
+Profiling report of a correction run.
+
+For every corrected submission, the report keeps the wall time, the self time of the phases timed
+with aprx.stats ("open", "unzip", "json", "layers" and "criterion:<id>" for every criterion), and
+the counters of aprx.stats (members read, bytes read and decompressed, JSON documents parsed). The
+time not spent in any phase (walking the project, printing the results, ...) is kept as "other".
+
+The report is written as JSON, with a summary of the cohort (total times, slowest submissions and
+hottest phases), and as TSV with one row per submission.
+"""
+
+import json
+
+
+# The number of submissions and phases in the summary
+TOP_N = 10
+
+
+class ProfileReport:
+    """
+    Collects the profile of every submission of a correction run.
+    """
+    def __init__(self):
+        self.submissions = []
+
+
+    def add(self, student: str, path: str, wall: float, profile: dict) -> None:
+        """
+        Adds the profile of a submission, as returned by aprx.stats.snapshot(), and its wall time.
+        """
+        times = dict(profile['times'])
+        times['other'] = max(wall - sum(times.values()), 0.0)
+
+        self.submissions.append({
+            'student': student,
+            'path': path,
+            'wall': wall,
+            'phases': { k: v for k, v in times.items() if not k.startswith('criterion:') },
+            'criteria': {
+                k.split(':', 1)[1]: v for k, v in times.items() if k.startswith('criterion:')
+            },
+            'counters': dict(profile['counters']),
+        })
+
+
+    def summary(self) -> dict:
+        """
+        Returns the summary of the cohort: the totals of the wall time, phases, criteria and
+        counters, the slowest submissions and the hottest phases.
+        """
+        phases, criteria, counters = {}, {}, {}
+        for sub in self.submissions:
+            for totals, values in ((phases, sub['phases']), (criteria, sub['criteria']),
+                                   (counters, sub['counters'])):
+                for k, v in values.items():
+                    totals[k] = totals.get(k, 0) + v
+
+        wall = sum(sub['wall'] for sub in self.submissions)
+        slowest = sorted(self.submissions, key=lambda sub: sub['wall'], reverse=True)[:TOP_N]
+        hottest = sorted(
+            [*phases.items(), *[(f'criterion:{k}', v) for k, v in criteria.items()]],
+            key=lambda kv: kv[1], reverse=True
+        )[:TOP_N]
+
+        return {
+            'submissions': len(self.submissions),
+            'wall': wall,
+            'phases': phases,
+            'criteria': criteria,
+            'counters': counters,
+            'slowest': [
+                { 'student': sub['student'], 'path': sub['path'], 'wall': sub['wall'] }
+                for sub in slowest
+            ],
+            'hottest': [
+                { 'phase': k, 'time': v, 'share': v / wall if wall > 0 else 0.0 }
+                for k, v in hottest
+            ],
+        }
+
+
+    def write(self, base_path: str) -> list:
+        """
+        Writes the report to `<base_path>.profile.json` and `<base_path>.profile.tsv`. Returns the
+        paths of the written files.
+        """
+        json_path = base_path + '.profile.json'
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                { 'summary': self.summary(), 'submissions': self.submissions },
+                f, ensure_ascii=False, indent=1
+            )
+
+        # One column per phase, criterion and counter seen in any submission
+        columns = {}
+        for sub in self.submissions:
+            for group in ('phases', 'criteria', 'counters'):
+                for k in sub[group]:
+                    columns.setdefault((group, k), None)
+
+        tsv_path = base_path + '.profile.tsv'
+        with open(tsv_path, 'w', encoding='utf-8') as f:
+            header = [k if group != 'criteria' else f'criterion:{k}' for group, k in columns]
+            f.write('\t'.join(['Student', 'wall', *header]) + '\n')
+            for sub in self.submissions:
+                values = [sub[group].get(k, 0) for group, k in columns]
+                f.write('\t'.join(
+                    [sub['student'], f'{sub["wall"]:.6f}', *[
+                        f'{v:.6f}' if isinstance(v, float) else str(v) for v in values
+                    ]]
+                ) + '\n')
+
+        return [json_path, tsv_path]
+
+
+    def print_summary(self) -> None:
+        """
+        Prints the slowest submissions and the hottest phases on the console.
+        """
+        summary = self.summary()
+        print(f'--- PROFILE: {summary["submissions"]} submissions in {summary["wall"]:.3f} s ---')
+        print('Slowest submissions:')
+        for sub in summary['slowest']:
+            print(f'  {sub["wall"]:8.3f} s  {sub["student"]}')
+        print('Hottest phases:')
+        for ph in summary['hottest']:
+            print(f'  {ph["time"]:8.3f} s  {100 * ph["share"]:5.1f} %  {ph["phase"]}')
+        print('Counters:')
+        for k, v in summary['counters'].items():
+            print(f'  {v:>12}  {k}')
+        print('')
@@ -0,0 +1,174 @@
+"""
+Declarative rubrics: the criteria of an assignment, written as data (JSON or TOML).
+
+A rubric file lists the criteria with their check kind, the targeted layers, the reference values,
+the tolerances and the points. It is compiled once into a Rubric holding reusable checkers, which
+is then applied to every submission:
+
+rubric = load_rubric('geoscore/rubrics/tp1.json')
+results = rubric.evaluate(project)
+
+A rubric can also name a reference project (the project given to the students) with
+"reference_project", relative to the rubric file. The submissions are then compared with it (see
+aprx.diff), and the checks can take their reference values from this project.
+"""
+
+import hashlib
+import json
+import os
+from typing import NamedTuple
+
+from aprx import ReferenceProject
+
+from .checks import create_check
+from .engine import Engine
+from .messages import Message
+
+
+# The directory with the rubrics shipped with geoscore.
+RUBRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rubrics')
+
+# The reference projects loaded in this process, by path. A rubric sent to another process only
+# keeps the path, and the reference is loaded once per process.
+REFERENCES = {}
+
+
+def load_reference(path: str) -> ReferenceProject:
+    """
+    Returns the reference project at `path`. It is read and hashed once per process.
+    """
+    if path not in REFERENCES:
+        REFERENCES[path] = ReferenceProject(path)
+
+    return REFERENCES[path]
+
+
+class Result(NamedTuple):
+    """
+    The result of a criterion for a submission: the points, the message (not rendered, None if
+    the messages are not computed) and the names of the layout and map frame the points were
+    given for (None if not relevant).
+    """
+    id: str
+    title: str
+    points: float
+    message: Message = None
+    layout: str = None
+    frame: str = None
+
+    def to_json(self) -> list:
+        """
+        Returns the result as a list which can be written as JSON (e.g. in the cache).
+        """
+        msg = self.message.to_json() if isinstance(self.message, Message) else self.message
+        return [self.id, self.title, self.points, msg, self.layout, self.frame]
+
+
+    @classmethod
+    def from_json(cls, data: list) -> 'Result':
+        """
+        Creates a result from a list returned by `to_json`.
+        """
+        crit_id, title, points, msg, layout, frame = data
+        if isinstance(msg, dict):
+            msg = Message.from_json(msg)
+        return cls(crit_id, title, points, msg, layout, frame)
+
+
+class Rubric:
+    """
+    A compiled rubric. The checkers are created once from the specification, and reset by the
+    engine for every project. `reference_path` is the path to the reference project, if any.
+    """
+    def __init__(self, spec: dict, reference_path: str = None):
+        self.spec = spec
+        self.name = spec.get('name', None)
+        self.title = spec.get('title', self.name)
+        self.reference_path = reference_path
+
+        # The hash of the specification (and of the reference project) identifies the version of
+        # the rubric (e.g. for caching).
+        sha = hashlib.sha1(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        if self.reference_path is not None:
+            with open(self.reference_path, 'rb') as f:
+                sha.update(f.read())
+        self.hash = sha.hexdigest()
+
+        self.criteria = [create_check(crit_spec) for crit_spec in spec.get('criteria', [])]
+        self.engine = Engine(self.criteria)
+
+
+    def __repr__(self):
+        return f'<Rubric: "{self.name}" ({len(self.criteria)} criteria)>'
+
+
+    @property
+    def ids(self) -> list:
+        """
+        Returns the IDs of the criteria, in the order of the rubric.
+        """
+        return [crit.id for crit in self.criteria]
+
+
+    @property
+    def reference(self) -> ReferenceProject:
+        """
+        Returns the reference project, or None if the rubric has none.
+        """
+        if self.reference_path is None:
+            return None
+
+        return load_reference(self.reference_path)
+
+
+    def evaluate(self, project) -> list:
+        """
+        Evaluates all criteria on the project, in a single pass. Returns a list of Result tuples,
+        one per criterion. If there is a reference project, the project is compared with it first.
+        """
+        reference = self.reference
+        self.engine.run(project, None if reference is None else reference.diff(project))
+
+        results = []
+        for crit in self.criteria:
+            pts, msg = crit.result()
+            layout, map_frame = crit.chosen
+            results.append(Result(
+                crit.id, crit.title, pts, msg,
+                None if layout is None else layout.name,
+                None if map_frame is None else map_frame.json.get('name', None)
+            ))
+
+        # The criteria do not keep the project: the rubric can still be sent to worker processes
+        for crit in self.criteria:
+            crit.reset()
+
+        return results
+
+
+    def points_only(self, pts: list) -> list:
+        """
+        Returns the results of a submission for which only the points have been computed (e.g.
+        with the vectorized evaluation).
+        """
+        return [Result(crit.id, crit.title, p) for crit, p in zip(self.criteria, pts)]
+
+
+def load_rubric(path: str, reference_path: str = None) -> Rubric:
+    """
+    Reads a rubric file and compiles it. The format depends on the file extension: .toml files are
+    read as TOML, all other files as JSON. `reference_path` replaces the reference project of the
+    rubric, if any.
+    """
+    if os.path.splitext(path)[1].lower() == '.toml':
+        import tomllib
+        with open(path, 'rb') as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = json.loads(f.read())
+
+    if reference_path is None and spec.get('reference_project', None) is not None:
+        reference_path = os.path.join(os.path.dirname(path), spec['reference_project'])
+
+    return Rubric(spec, reference_path)
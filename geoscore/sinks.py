@@ -0,0 +1,213 @@
+"""
+Output of the correction results.
+
+The results of every submission are collected as a Submission (the student, the errors found
+before the correction and the Result of every criterion), and sent to a list of sinks. Each sink
+writes the results in its own format, and renders the messages of the criteria only if it needs
+them:
+- ConsoleSink: the detailed report on the console (or a single line per student with `quiet`),
+- TsvSink: the points in a TSV file,
+- JsonLinesSink: one JSON object per submission, with the points, message codes and messages,
+- FeedbackSink: one plain text file per student with the detailed report.
+
+The sinks buffer their output, and write it in batches.
+"""
+
+import json
+import os
+import sys
+from typing import NamedTuple
+
+from .console import BOLD, END, RED
+from .messages import render
+
+
+class Submission(NamedTuple):
+    """
+    A corrected submission. `results` is empty if there was no project file to correct.
+    """
+    student: str
+    path: str
+    errors: list
+    results: list
+    cached: bool = False
+
+    @property
+    def points(self) -> list:
+        """
+        Returns the points of every criterion.
+        """
+        return [res.points for res in self.results]
+
+
+def format_results(results: list, color: bool = True) -> str:
+    """
+    Returns the detailed report of the results of a submission, as printed on the console. If the
+    messages have not been computed, only the total is reported.
+    """
+    bold, end = (BOLD, END) if color else ('', '')
+
+    if any(res.message is None for res in results):
+        return f'{bold}. Total: {sum(res.points for res in results)} points{end}\n\n'
+
+    lines = []
+    pts = 0.0
+    for i, res in enumerate(results, start=1):
+        lines.append(f'{bold}. Criteria {i:02d}:   {res.title}{end}')
+        lines.append(f'{render(res.message, color)} {bold}→ {res.points} points{end}')
+        pts += res.points
+
+    lines.append(f'{bold}. Total: {pts} points{end}')
+    lines.append('')
+
+    return '\n'.join(lines) + '\n'
+
+
+class Sink:
+    """
+    Base class for the sinks.
+    """
+    def write(self, sub: Submission) -> None:
+        """
+        Writes the results of a submission.
+        """
+        raise NotImplementedError
+
+
+    def close(self) -> None:
+        """
+        Writes the buffered output and closes the sink.
+        """
+
+
+class ConsoleSink(Sink):
+    """
+    Prints the results on the console, every `batch` submissions. With `quiet`, only the total of
+    every student is printed, and the messages are not rendered.
+    """
+    def __init__(self, quiet: bool = False, batch: int = 20, stream=None):
+        self.quiet = quiet
+        self.batch = batch
+        self.stream = stream
+        self.buffer = []
+        self.pending = 0
+
+
+    def write(self, sub: Submission) -> None:
+        if self.quiet:
+            chunk = f'{sub.student}: ' + (
+                f'{sum(sub.points)} points' if len(sub.results) > 0 else 'no APRX file'
+            )
+            self.buffer.append(chunk + '\n')
+        else:
+            self.buffer.append(f'Correction for {sub.student}:\n')
+            for err in sub.errors:
+                self.buffer.append(RED + BOLD + err + END + '\n')
+            if len(sub.results) > 0:
+                self.buffer.append(format_results(sub.results))
+
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.flush()
+
+
+    def flush(self) -> None:
+        """
+        Prints the buffered output.
+        """
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write(''.join(self.buffer))
+        stream.flush()
+        self.buffer = []
+        self.pending = 0
+
+
+    def close(self) -> None:
+        self.flush()
+
+
+class TsvSink(Sink):
+    """
+    Writes the points of every criterion and the total to a TSV file, one line per student.
+    """
+    def __init__(self, path: str, ids: list):
+        self.path = path
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write('\t'.join(['Student', *ids, 'tot']) + '\n')
+
+
+    def write(self, sub: Submission) -> None:
+        if len(sub.results) == 0:
+            return
+
+        pts = sub.points
+        pts_str = '\t'.join([f'{p:.1f}' for p in pts])
+        self.file.write(f'{sub.student}\t{pts_str}\t{sum(pts)}\n')
+
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class JsonLinesSink(Sink):
+    """
+    Writes one JSON object per submission, with the points, message codes and plain text messages
+    of every criterion, and the layout and map frame the points were given for.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+
+    def write(self, sub: Submission) -> None:
+        record = {
+            'student': sub.student,
+            'path': sub.path,
+            'errors': [err.strip() for err in sub.errors],
+            'cached': sub.cached,
+            'total': sum(sub.points),
+            'criteria': [
+                {
+                    'id': res.id,
+                    'points': res.points,
+                    'codes': getattr(res.message, 'codes', None),
+                    'message': None if res.message is None else render(res.message, color=False),
+                    'layout': res.layout,
+                    'frame': res.frame,
+                }
+                for res in sub.results
+            ],
+        }
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class FeedbackSink(Sink):
+    """
+    Writes the detailed report of every student to a plain text file `<student>.txt` in the
+    directory `feedback_dir`. An export can have several submissions with the same student name:
+    the next files are numbered in the order of the submissions (`<student> (2).txt`, ...).
+    """
+    def __init__(self, feedback_dir: str):
+        self.feedback_dir = feedback_dir
+        os.makedirs(self.feedback_dir, exist_ok=True)
+
+        # The number of files written for every student name
+        self.counts = {}
+
+
+    def write(self, sub: Submission) -> None:
+        text = ''.join(err.strip() + '\n' for err in sub.errors)
+        if len(sub.results) > 0:
+            text += format_results(sub.results, color=False)
+
+        count = self.counts.get(sub.student, 0) + 1
+        self.counts[sub.student] = count
+
+        name = sub.student if count == 1 else f'{sub.student} ({count})'
+        path = os.path.join(self.feedback_dir, f'{name}.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
@@ -0,0 +1,179 @@
+"""
+Discovery of the student submissions of an assignment, and access to the submission files.
+
+The submissions are either in a directory, or in the zip archive of a bulk download from Moodle.
+In both cases, there is a folder for each submission (e.g. "<Student>_<id>_assignsubmission_file_")
+with the project file inside (a .aprx project file, or a .ppkx project package). The submissions
+in an archive are never extracted to disk: their path is the path of the archive followed by the
+path of the member in the archive (e.g.
+"export.zip/Amy Blacktree_12345_assignsubmission_file_/TP1.aprx"), and the file is read in memory
+from the archive when needed:
+
+for st, errors, path in find_submissions('export.zip'):
+    proj = open_project(path)
+"""
+
+import os
+from fnmatch import fnmatch
+from glob import glob
+from zipfile import ZipFile, is_zipfile
+
+import aprx
+
+
+# The opened export archives, by (process id, path). A forked worker inherits the archives of
+# its parent, but needs its own file object: the offset of a shared file is shared as well.
+EXPORTS = {}
+
+# The patterns of the project files: project files, then project packages
+PATTERNS = ('*.aprx', '*.ppkx')
+
+
+def find_submissions(tp_dir: str, pattern=PATTERNS) -> list:
+    """
+    Finds the project file of every submission in `tp_dir`, a directory or the zip archive of a
+    bulk download. `tp_dir` needs to have a folder for each submission, and inside the folder a
+    file matching `pattern` (a glob pattern, or a tuple of patterns in order of preference).
+
+    Returns a list of (student, errors, path) tuples in alphabetical order of the folders, with
+    the errors to print before the correction. The path is None if no file was found.
+    """
+    basedir = os.path.abspath(tp_dir)
+
+    if os.path.isfile(basedir) and is_zipfile(basedir):
+        student_files = list_export(basedir, pattern)
+    else:
+        student_files = {
+            d: glob_files(os.path.join(basedir, d), pattern)
+            for d in os.listdir(basedir) if os.path.isdir(os.path.join(basedir, d))
+        }
+
+    return build_submissions(basedir, student_files)
+
+
+def build_submissions(basedir: str, student_files: dict) -> list:
+    """
+    Returns the list of (student, errors, path) tuples (see `find_submissions`) from the files
+    matching the pattern in every folder of `basedir`.
+    """
+    submissions = []
+    for st_dir in sorted(student_files):
+        st = st_dir.split('_')[0]
+        errors = []
+
+        # Is there a project file in the student submission ?
+        files = student_files[st_dir]
+
+        if len(files) == 0:
+            errors.append(' . No APRX file found. Skipping.\n')
+            submissions.append((st, errors, None))
+            continue
+        elif len(files) > 1:
+            errors.append(f' . Several APRX files found. "{files[0]}" will be used.')
+
+        submissions.append((st, errors, os.path.join(basedir, st_dir, files[0])))
+
+    return submissions
+
+
+def as_patterns(pattern) -> tuple:
+    """
+    Returns a tuple of patterns for a single pattern or a tuple of patterns.
+    """
+    return (pattern,) if isinstance(pattern, str) else tuple(pattern)
+
+
+def glob_files(folder: str, pattern) -> list:
+    """
+    Returns the files in `folder` matching the pattern (or the tuple of patterns, in this order).
+    """
+    return [path for pat in as_patterns(pattern) for path in glob(os.path.join(folder, pat))]
+
+
+def list_export(export_path: str, pattern) -> dict:
+    """
+    Returns the folders at the top of an export archive, with the paths of the files matching
+    `pattern` in every folder.
+    """
+    patterns = as_patterns(pattern)
+    student_files = {}
+    for name in export_archive(export_path).namelist():
+        parts = name.rstrip('/').split('/')
+        if len(parts) < 2 and not name.endswith('/'):
+            continue
+
+        files = student_files.setdefault(parts[0], [])
+        if len(parts) == 2 and not name.endswith('/'):
+            files.extend(
+                (i, os.path.join(export_path, *parts))
+                for i, pat in enumerate(patterns) if fnmatch(parts[1], pat)
+            )
+
+    # The files are sorted by pattern, as for a directory
+    return {
+        st_dir: [path for _i, path in sorted(files, key=lambda f: f[0])]
+        for st_dir, files in student_files.items()
+    }
+
+
+def export_archive(export_path: str) -> ZipFile:
+    """
+    Returns the opened export archive. The archive is opened once per process, and kept open.
+    """
+    key = (os.getpid(), export_path)
+    if key not in EXPORTS:
+        EXPORTS[key] = ZipFile(export_path, 'r')
+
+    return EXPORTS[key]
+
+
+def split_export_path(path: str) -> tuple:
+    """
+    Splits the path of a submission in an export archive into the path of the archive and the
+    name of the member. Returns (None, None) for a file on disk.
+    """
+    export_path = path
+    while not os.path.isfile(export_path):
+        parent = os.path.dirname(export_path)
+        if parent == export_path:
+            return None, None
+        export_path = parent
+
+    if export_path == path:
+        return None, None
+
+    return export_path, os.path.relpath(path, export_path).replace(os.sep, '/')
+
+
+def export_info(path: str):
+    """
+    Returns the ZipInfo of a submission in an export archive, or None for a file on disk.
+    """
+    export_path, member = split_export_path(path)
+    if export_path is None:
+        return None
+
+    return export_archive(export_path).getinfo(member)
+
+
+def read_submission_file(path: str) -> bytes:
+    """
+    Reads the content of a submission file, on disk or in an export archive.
+    """
+    export_path, member = split_export_path(path)
+    if export_path is not None:
+        return export_archive(export_path).read(member)
+
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def open_project(path: str, data=None, members: dict = None) -> aprx.Project:
+    """
+    Opens the project file of a submission. A file in an export archive is read in memory, unless
+    its content is provided in `data`.
+    """
+    if data is None and split_export_path(path)[0] is not None:
+        data = read_submission_file(path)
+
+    return aprx.Project(path, data=data, members=members)
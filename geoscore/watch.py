@@ -0,0 +1,99 @@
+"""
+Detection of new and modified submissions in the directory of an assignment.
+
+The watcher is polled regularly (e.g. during the submission window). Every poll lists the
+directory with os.scandir, but a submission folder is only listed again if its modification time
+changed. The project files are compared with their size and modification time, so a poll does not
+read anything when nothing changed:
+
+watcher = SubmissionWatcher(tp_dir)
+while True:
+    submissions, changed = watcher.poll()
+    ...
+    time.sleep(5)
+"""
+
+import os
+
+from .submissions import PATTERNS, build_submissions, glob_files
+
+
+class SubmissionWatcher:
+    """
+    Keeps the state of the submission directory between two polls.
+    """
+    def __init__(self, tp_dir: str, pattern=PATTERNS):
+        self.basedir = os.path.abspath(tp_dir)
+        self.pattern = pattern
+
+        # The modification time and the matching files of every folder, by folder name
+        self.folders = {}
+
+        # The size and modification time of every project file, by path
+        self.signatures = {}
+
+        # The submissions found by the last poll
+        self.submissions = None
+
+
+    def __repr__(self):
+        return f'<SubmissionWatcher: "{self.basedir}">'
+
+
+    def list_folders(self) -> dict:
+        """
+        Returns the files matching the pattern in every folder. Only the folders modified since the
+        last poll are listed again.
+        """
+        folders = {}
+        with os.scandir(self.basedir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+
+                mtime = entry.stat().st_mtime_ns
+                known = self.folders.get(entry.name, None)
+                if known is not None and known[0] == mtime:
+                    folders[entry.name] = known
+                else:
+                    folders[entry.name] = (mtime, glob_files(entry.path, self.pattern))
+
+        self.folders = folders
+        return { name: files for name, (_mtime, files) in folders.items() }
+
+
+    def poll(self) -> tuple:
+        """
+        Looks for changes since the last poll. Returns the list of all submissions (see
+        `find_submissions`) and the set of paths of the project files which are new or modified.
+        On the first poll, all project files are new.
+        """
+        submissions = build_submissions(self.basedir, self.list_folders())
+
+        signatures = {}
+        changed = set()
+        for _st, _errors, path in submissions:
+            if path is None:
+                continue
+
+            try:
+                st = os.stat(path)
+            except OSError:
+                # The file is being replaced, it is checked again on the next poll.
+                continue
+
+            signatures[path] = (st.st_size, st.st_mtime_ns)
+            if self.signatures.get(path, None) != signatures[path]:
+                changed.add(path)
+
+        self.signatures = signatures
+        self.submissions = submissions
+        return submissions, changed
+
+
+    def forget(self, path: str) -> None:
+        """
+        Forgets the signature of a project file, so it is reported as modified on the next poll
+        (e.g. a file which could not be read yet).
+        """
+        self.signatures.pop(path, None)
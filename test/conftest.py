@@ -0,0 +1,26 @@
+"""
+Shared setup of the tests: the packages of the repository are imported from its root directory.
+"""
+
+import os
+import sys
+
+import pytest
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture
+def json_backend():
+    """
+    Decodes the CIM documents with the json module of the standard library during the test, so
+    the selective extraction of aprx.select is used even if orjson is installed.
+    """
+    from aprx import decode
+
+    settings = dict(decode.SETTINGS)
+    decode.configure(backend='json')
+    yield
+    decode.configure(**settings)
@@ -0,0 +1,237 @@
+"""
+Tests that the three ways of grading a cohort give the same points: the scalar engine, the
+vectorized evaluation (--vectorized) and the fact store (geoscore.facts).
+"""
+
+import json
+import os
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pytest
+
+from bench.cohort import make_cohort
+from geoscore import facts
+from geoscore.assignments import grade_submission, load_assignment
+from geoscore.correction import correct_cohort, correct_submissions
+from geoscore.features import extract_features
+from geoscore.rubric import Rubric
+from geoscore.submissions import find_submissions
+
+
+# The vectorized evaluation and the fact store need NumPy
+pytest.importorskip('numpy')
+
+TP1_DIR = os.path.join(os.path.dirname(__file__), 'data', 'tp1')
+
+
+def write_variant(src: str, out_path: str, edits: dict) -> None:
+    """
+    Writes a copy of the project file `src` to `out_path`, with the JSON documents of `edits`
+    modified by their function.
+    """
+    with ZipFile(src) as zf:
+        members = { info.filename: zf.read(info) for info in zf.infolist() }
+
+    for name, edit in edits.items():
+        doc = json.loads(members[name])
+        edit(doc)
+        members[name] = json.dumps(doc).encode('utf-8')
+
+    os.makedirs(os.path.dirname(out_path))
+    with ZipFile(out_path, 'w', ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+
+def remove_map_frames(layout: dict) -> None:
+    layout['elements'] = [elem for elem in layout['elements'] if elem['type'] != 'CIMMapFrame']
+
+
+def add_empty_frame(layout: dict) -> None:
+    """
+    Adds a map frame without map before the other elements of the layout.
+    """
+    frame = next(elem for elem in layout['elements'] if elem['type'] == 'CIMMapFrame')
+    empty = json.loads(json.dumps(frame))
+    empty['name'] = 'Empty Map Frame'
+    empty['uRI'] = 'CIMPATH=map/missing.json'
+    empty['view']['viewableObjectPath'] = 'CIMPATH=map/missing.json'
+    layout['elements'].insert(0, empty)
+
+
+def set_color(idx: int, color: dict):
+    """
+    Returns the edit replacing the color of the symbol layer `idx` of a simple renderer.
+    """
+    def edit(layer: dict) -> None:
+        layer['renderer']['symbol']['symbol']['symbolLayers'][idx]['color'] = color
+
+    return edit
+
+
+@pytest.fixture(scope='module')
+def cohort_dir(tmp_path_factory) -> str:
+    """
+    A synthetic cohort, with some submissions for the edge cases: a layout without map frame, a
+    map frame without map, and colors in other color models than RGB (some of them cannot be
+    converted).
+    """
+    out_dir = str(tmp_path_factory.mktemp('cohort'))
+    make_cohort(20, out_dir, seed=0, padding=0)
+
+    def variant(student: str, fixture: str, edits: dict):
+        write_variant(
+            os.path.join(TP1_DIR, fixture, 'TP1.aprx'),
+            os.path.join(out_dir, f'{student}_0_assignsubmission_file_', 'TP1.aprx'),
+            edits
+        )
+
+    variant('Zed Noframe', 'Dan Eastlake', { 'layout/switzerland.json': remove_map_frames })
+    variant('Zed Emptyframe', 'Dan Eastlake', { 'layout/switzerland.json': add_empty_frame })
+    variant('Zed Cmyk', 'Amy Blacktree', {
+        'layers/roads.json': set_color(0, { 'type': 'CIMCMYKColor', 'values': [0, 0, 0, 61, 100] }),
+        'layers/cantons.json': set_color(
+            0, { 'type': 'CIMCMYKColor', 'values': [0, 0, 0, 100, 100] }
+        ),
+    })
+    variant('Zed Hsv', 'Amy Blacktree', {
+        'layers/cantons.json': set_color(1, { 'type': 'CIMHSVColor', 'values': [0, 25, 100, 100] }),
+        'layers/roads.json': set_color(0, { 'type': 'CIMHSLColor', 'values': [0, 0, 61, 100] }),
+    })
+    variant('Zed Lab', 'Amy Blacktree', {
+        'layers/roads.json': set_color(0, { 'type': 'CIMLABColor', 'values': [50, 0, 0, 100] }),
+        'layers/cantons.json': set_color(1, { 'type': 'CIMGrayColor', 'values': [128, 100] }),
+    })
+
+    return out_dir
+
+
+def scalar_points(tp_dir: str, rubric) -> dict:
+    """
+    Returns the points of every criterion by student, with the scalar engine.
+    """
+    return {
+        st: [res.points for res in grade_submission(path, [rubric])[0]]
+        for st, _errors, path in find_submissions(tp_dir) if path is not None
+    }
+
+
+def vectorized_points(tp_dir: str, rubric) -> dict:
+    """
+    Returns the points of every criterion by student, with the vectorized evaluation.
+    """
+    submissions = [(st, path) for st, _errors, path in find_submissions(tp_dir) if path is not None]
+    results = correct_cohort([path for _st, path in submissions], rubric)
+    return {
+        st: [res.points for res in result] for (st, _path), result in zip(submissions, results)
+    }
+
+
+def fact_points(tp_dir: str, rubric, db_path: str) -> dict:
+    """
+    Returns the points of every criterion by student, with the fact store.
+    """
+    facts.extract(tp_dir, db_path)
+    return dict(facts.score(db_path, rubric))
+
+
+@pytest.mark.parametrize('tp_dir', ['fixtures', 'cohort'])
+def test_same_points(tp_dir, cohort_dir, tmp_path):
+    tp_dir = TP1_DIR if tp_dir == 'fixtures' else cohort_dir
+    rubric = load_assignment('tp1')
+
+    expected = scalar_points(tp_dir, rubric)
+    assert len(expected) > 0
+
+    assert vectorized_points(tp_dir, rubric) == expected
+    assert fact_points(tp_dir, rubric, str(tmp_path / 'facts.db')) == expected
+
+
+def test_no_map_frame(cohort_dir):
+    rubric = load_assignment('tp1')
+    points = scalar_points(cohort_dir, rubric)
+
+    # Without map frame, the criteria on the map frame give no points, but the others still do
+    assert sum(points['Zed Noframe']) > 0
+    assert sum(points['Zed Noframe']) < sum(scalar_points(TP1_DIR, rubric)['Dan Eastlake'])
+
+
+def test_empty_map_frame(cohort_dir):
+    rubric = load_assignment('tp1')
+    points = scalar_points(cohort_dir, rubric)
+
+    # The layers of the other map frame are still graded
+    assert sum(points['Zed Emptyframe']) == sum(scalar_points(TP1_DIR, rubric)['Dan Eastlake'])
+
+
+# A rubric with properties of other types than numbers: a string and an object
+PROPERTY_RUBRIC = {
+    'name': 'properties',
+    'criteria': [
+        {
+            'id': 'p01', 'title': 'label expression of "Towns" changed', 'kind': 'property_changed',
+            'layer': 'Towns', 'property': 'labelClasses[0].expression', 'reference': '[FID]',
+        },
+        {
+            'id': 'p02', 'title': 'label placement of "Lakes" changed', 'kind': 'property_changed',
+            'layer': 'Lakes', 'property': 'labelClasses[0].standardLabelPlacementProperties',
+            'reference': {},
+        },
+        {
+            'id': 'p03', 'title': 'transparency of "DEM" changed', 'kind': 'property_changed',
+            'layer': 'DEM', 'property': 'transparency', 'reference': 0,
+        },
+    ],
+}
+
+
+def test_property_values():
+    table = extract_features(
+        os.path.join(TP1_DIR, 'Amy Blacktree', 'TP1.aprx'), ('labelClasses[0].expression',)
+    )
+    values = table.arrays()['layers']['property.labelClasses[0].expression']
+    assert values.dtype == object
+    assert '[ID0]' in list(values)
+
+
+@pytest.mark.parametrize('tp_dir', ['fixtures', 'cohort'])
+def test_property_types(tp_dir, cohort_dir):
+    tp_dir = TP1_DIR if tp_dir == 'fixtures' else cohort_dir
+    rubric = Rubric(PROPERTY_RUBRIC)
+
+    expected = scalar_points(tp_dir, rubric)
+    assert any(pts[0] > 0 for pts in expected.values())
+    assert vectorized_points(tp_dir, rubric) == expected
+
+
+def test_fact_store_properties(tmp_path):
+    # Only some properties are kept in the fact store
+    with pytest.raises(ValueError):
+        fact_points(TP1_DIR, Rubric(PROPERTY_RUBRIC), str(tmp_path / 'facts.db'))
+
+
+@pytest.fixture(scope='module')
+def export_path(cohort_dir, tmp_path_factory) -> str:
+    """
+    The cohort as the zip archive of a bulk download from Moodle.
+    """
+    path = str(tmp_path_factory.mktemp('export') / 'export.zip')
+    with ZipFile(path, 'w', ZIP_DEFLATED) as zf:
+        for st_dir in sorted(os.listdir(cohort_dir)):
+            zf.write(os.path.join(cohort_dir, st_dir, 'TP1.aprx'), f'{st_dir}/TP1.aprx')
+
+    return path
+
+
+def test_export_jobs(export_path, cohort_dir, tmp_path, capsys):
+    # Every worker of the pool reads the export archive with its own file object
+    rubrics = { 'tp1': load_assignment('tp1') }
+    correct_submissions(cohort_dir, str(tmp_path / 'serial.tsv'), rubrics, quiet=True)
+    correct_submissions(export_path, str(tmp_path / 'export.tsv'), rubrics, jobs=2, quiet=True)
+
+    with open(tmp_path / 'serial.tsv') as f, open(tmp_path / 'export.tsv') as g:
+        assert f.read() == g.read()
+
+    db_path = str(tmp_path / 'facts.db')
+    facts.extract(export_path, db_path, jobs=2)
+    assert dict(facts.score(db_path, rubrics['tp1'])) == scalar_points(cohort_dir, rubrics['tp1'])
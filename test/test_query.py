@@ -0,0 +1,125 @@
+"""
+Tests of the queries over the items of a project (aprx.query).
+"""
+
+import os
+
+import pytest
+
+from aprx import Project
+from aprx.query import QUERIES, Query, compile_query, parse_step, split_steps
+
+
+# A project with the maps "Map" and "Layers", and the layout "Switzerland" with a map frame
+# on the map "Layers"
+PROJECT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'tp1', 'Amy Blacktree', 'TP1.aprx')
+
+
+@pytest.fixture(scope='module')
+def project():
+    proj = Project(PROJECT_PATH)
+    yield proj
+    proj.close()
+
+
+def test_split_steps():
+    assert split_steps('layout/*/mapframe') == ['layout', '*', 'mapframe']
+    assert split_steps('layer') == ['layer']
+    assert split_steps("map/'a/b'/layer[name='x/y'].foo") == [
+        'map', "'a/b'", "layer[name='x/y'].foo"
+    ]
+    assert split_steps('map/"a/b"/layer') == ['map', '"a/b"', 'layer']
+    assert split_steps('layer[a[0]=1]/x') == ['layer[a[0]=1]', 'x']
+
+
+def test_parse_step():
+    assert parse_step('layer', 'q') == ('layer', False, [], [])
+    assert parse_step(' Towns ', 'q') == ('Towns', False, [], [])
+    assert parse_step("'Towns.shp'", 'q') == ('Towns.shp', True, [], [])
+    assert parse_step('"Layers [1]"', 'q') == ('Layers [1]', True, [], [])
+    assert parse_step('*', 'q') == ('*', False, [], [])
+
+
+def test_parse_step_conditions():
+    step = "layer[name='Towns'][transparency!=0].labelClasses[0].textSymbol"
+    assert parse_step(step, 'q') == (
+        'layer', False,
+        [(['name'], False, 'Towns'), (['transparency'], True, 0)],
+        ['labelClasses', 0, 'textSymbol'],
+    )
+    assert parse_step('layer[ visibility = false ]', 'q') == (
+        'layer', False, [(['visibility'], False, False)], []
+    )
+    assert parse_step('layer[labelClasses[0].visibility!=true]', 'q') == (
+        'layer', False, [(['labelClasses', 0, 'visibility'], True, True)], []
+    )
+    assert parse_step('layer[name="a b"][id=towns]', 'q') == (
+        'layer', False, [(['name'], False, 'a b'), (['id'], False, 'towns')], []
+    )
+
+
+def test_parse_step_json_path():
+    assert parse_step('Towns.transparency', 'q') == ('Towns', False, [], ['transparency'])
+    assert parse_step("'Towns'.labelClasses[-1]", 'q') == ('Towns', True, [], ['labelClasses', -1])
+
+
+@pytest.mark.parametrize('text', [
+    'layers',
+    'layers/x',
+    "'map'/x",
+    '"layer"',
+    'layer/Towns.a/layer',
+    'layer[visibility=true].a/map',
+    "map/'Layers'[",
+    'layer[name=]',
+    'layer.a b',
+    'layout/*/layer/*/map',
+    'layer/*/map',
+    'map/*/layout',
+])
+def test_invalid_queries(text):
+    with pytest.raises(ValueError):
+        Query(text)
+
+
+def test_compile_query():
+    query = compile_query("map/'Layers'/layer")
+    assert QUERIES["map/'Layers'/layer"] is query
+    assert compile_query("map/'Layers'/layer") is query
+    assert [(step.parent, step.kind, step.name) for step in query.steps] == [
+        ('project', 'map', 'Layers'), ('map', 'layer', None)
+    ]
+
+
+def test_named_steps():
+    # An equality on the name is looked up with the index of the names
+    query = Query("map[name='Layers']/layer[name!='Towns'][visibility=true]")
+    assert [step.name for step in query.steps] == ['Layers', None]
+    assert len(query.steps[1].conditions) == 2
+
+
+def test_query_items(project):
+    assert [mp.name for mp in project.query('map')] == ['Map', 'Layers']
+    assert [mp.name for mp in project.query('map/*')] == ['Map', 'Layers']
+    assert [lyt.name for lyt in project.query('layout')] == ['Switzerland']
+    assert [frame.name for frame in project.query('layout/Switzerland/mapframe')] == [
+        'Layers Map Frame'
+    ]
+    assert [mp.name for mp in project.query('mapframe/*/map')] == ['Layers']
+    assert list(project.query("map/'Missing'/layer")) == []
+
+
+def test_query_conditions(project):
+    layers = list(project.query("map/'Layers'/layer[visibility!=true]"))
+    assert [lyr.name for lyr in layers] == ['DEM']
+
+    towns = list(project.query("map/Layers/layer[name='Towns']"))
+    assert len(towns) == 2
+    assert [lyr.name for lyr in project.query(f'layer[id={towns[0].id}]')] == ['Towns']
+
+
+def test_query_values(project):
+    query = "layout/*/mapframe/*/layer[name='Towns'].labelClasses[0].expression"
+    assert list(project.query(query)) == ['[ID0]', '[FID]']
+    assert list(project.query("map/'Layers'/layer/HillShadeCH.transparency")) == [30]
+    assert list(project.query("map/'Layers'/layer/HillShadeCH.missing")) == []
@@ -0,0 +1,128 @@
+"""
+Tests of the selective extraction of members and array items from CIM documents (aprx.select),
+with the decoder of the standard library.
+"""
+
+import json
+import os
+from zipfile import ZipFile
+
+import pytest
+
+from aprx import decode
+from aprx.select import select_items, select_members
+
+
+# A project of the fixtures with a single map frame
+PROJECT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'tp1', 'Dan Eastlake', 'TP1.aprx')
+
+DOC = {
+    'type': 'CIMLayout',
+    'name': 'Layout',
+    'nested': { 'elements': 'not the top-level member', 'name': 'nested' },
+    'elements': [
+        { 'type': 'CIMMapFrame', 'name': 'Frame 1' },
+        { 'type': 'CIMLegend', 'name': 'Legend', 'items': [{ 'name': 'Towns' }] },
+        { 'type': 'CIMMapFrame', 'name': 'Frame 2' },
+    ],
+    'empty': [],
+    'last': 'é',
+}
+
+
+def is_map_frame(elem: dict) -> bool:
+    return elem['type'] == 'CIMMapFrame'
+
+
+@pytest.fixture(params=['compact', 'indented', 'bom'])
+def data(request) -> bytes:
+    """
+    The document as bytes, compact, indented, or with a UTF-8 byte order mark.
+    """
+    if request.param == 'compact':
+        return json.dumps(DOC, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if request.param == 'indented':
+        return json.dumps(DOC, indent='\t', ensure_ascii=False).encode('utf-8')
+    return b'\xef\xbb\xbf' + json.dumps(DOC, ensure_ascii=False).encode('utf-8')
+
+
+def test_backend(json_backend):
+    assert decode.SETTINGS['backend'] == 'json'
+    assert not decode.is_fast()
+
+
+def test_select_members(json_backend, data):
+    assert select_members(data, ['name']) == { 'name': 'Layout' }
+    assert select_members(data, ['elements', 'last']) == {
+        'elements': DOC['elements'], 'last': 'é'
+    }
+
+
+def test_select_members_top_level_only(json_backend, data):
+    # The members of nested objects with the same name are not selected.
+    assert select_members(data, ['nested'])['nested']['name'] == 'nested'
+    assert select_members(data, ['elements'])['elements'] == DOC['elements']
+
+
+def test_select_missing_members(json_backend, data):
+    assert select_members(data, ['missing']) == {}
+    assert select_members(data, ['missing', 'type']) == { 'type': 'CIMLayout' }
+
+
+def test_select_members_from_text(json_backend):
+    assert select_members(json.dumps(DOC), ['type', 'empty']) == {
+        'type': 'CIMLayout', 'empty': []
+    }
+    assert select_members('{}', ['type']) == {}
+    assert select_members(' { "type" : 1 } ', ['type']) == { 'type': 1 }
+
+
+def test_select_items(json_backend, data):
+    frames = select_items(data, 'elements', is_map_frame)
+    assert [frame['name'] for frame in frames] == ['Frame 1', 'Frame 2']
+    assert select_items(data, 'elements', lambda elem: True) == DOC['elements']
+    assert select_items(data, 'elements', lambda elem: False) == []
+    assert select_items(data, 'empty', is_map_frame) == []
+
+
+def test_select_items_missing_member(json_backend, data):
+    assert select_items(data, 'missing', is_map_frame) is None
+
+
+def test_invalid_documents(json_backend):
+    for text in ('', '[]', '{"type" "CIMLayout"}', '{"elements": [{"type": 1} {"type": 2}]}'):
+        with pytest.raises(json.JSONDecodeError):
+            select_members(text, ['elements'])
+        with pytest.raises(json.JSONDecodeError):
+            select_items(text, 'elements', is_map_frame)
+
+
+def test_interned_keys(json_backend):
+    decode.configure(intern_keys=True)
+    try:
+        assert select_items(json.dumps(DOC), 'elements', is_map_frame) == [
+            DOC['elements'][0], DOC['elements'][2]
+        ]
+    finally:
+        decode.configure(intern_keys=False)
+
+
+def test_project_documents(json_backend):
+    """
+    The members selected from the documents of a project are the same as in the full documents.
+    """
+    with ZipFile(PROJECT_PATH) as zf:
+        project = zf.read('GISProject.json')
+        layout = zf.read('layout/switzerland.json')
+        layers = zf.read('layers/layers.json')
+
+    full = json.loads(project.decode('utf-8-sig'))
+    assert select_members(project, ['projectItems']) == { 'projectItems': full['projectItems'] }
+
+    full = json.loads(layers.decode('utf-8-sig'))
+    assert select_members(layers, ['layers']) == { 'layers': full['layers'] }
+
+    full = json.loads(layout.decode('utf-8-sig'))
+    frames = select_items(layout, 'elements', is_map_frame)
+    assert frames == [elem for elem in full['elements'] if is_map_frame(elem)]
+    assert len(frames) == 1
@@ -0,0 +1,22 @@
+"""
+Tests of the outputs of the results (geoscore.sinks).
+"""
+
+from geoscore.rubric import Result
+from geoscore.sinks import FeedbackSink, Submission
+
+
+def test_feedback_same_student(tmp_path):
+    # Two submissions of an export with the same student name get their own feedback file
+    sink = FeedbackSink(str(tmp_path))
+    sink.write(Submission('Amy Blacktree', 'a/TP1.aprx', [], [Result('c01', 'First', 1.0)]))
+    sink.write(Submission('Amy Blacktree', 'b/TP1.aprx', [' . No APRX file found.'], []))
+    sink.write(Submission('Bill Curlyleg', 'c/TP1.aprx', [], [Result('c01', 'First', 0.0)]))
+    sink.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'Amy Blacktree (2).txt', 'Amy Blacktree.txt', 'Bill Curlyleg.txt'
+    ]
+    assert (tmp_path / 'Amy Blacktree (2).txt').read_text(encoding='utf-8') == (
+        '. No APRX file found.\n'
+    )